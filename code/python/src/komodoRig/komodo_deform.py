@@ -15,18 +15,29 @@ References:
 
 """
 
+import collections
+import json
+import multiprocessing
+import multiprocessing.pool
 import os
 
 import maya.cmds as mc
 import maya.mel as mm
 
 from rigTools import bSkinSaver
+from rigTools import skinWeightCache
+from rigTools import skinWeightFile
+from rigTools import skinWeightStore
 
 from rigLib.utils import name
 from . import project
 
 skinWeightsDir = "weights/skinCluster"
 swExt = ".swt"
+swBinaryExt = ".swb"
+swCompressedExt = ".swz"
+swManifestFile = "manifest.json"
+swStoreDir = "store"
 
 bodyGeo = 'body_geo'
 bodyMidresGeo = "body_midres_geo"
@@ -158,39 +169,293 @@ def maketwistJoints(baseRig, parentJoints):
         mc.parentConstraint(parentJntChild, twistIk)
 
 
-def saveSkinWeights(characterName, geoList=[]):
+def saveSkinWeights(characterName, geoList=[], binary=False, sparse=False,
+                    compression=None,
+                    level=skinWeightFile.DEFAULT_COMPRESSION_LEVEL,
+                    quantize=None, incremental=False, snapshot=False,
+                    tag=None, pruneThreshold=0.0, maxInfluences=None,
+                    keepSnapshots=None, removeStale=False, positions=None):
     u"""Save weights for character geometry objects.
 
+    Every save records a fingerprint of the weights and influences of each
+    object, and the settings they were saved with, in a manifest next to the
+    weight files. With ``incremental`` set, objects whose fingerprint and
+    settings match the manifest are not saved again. Objects that were
+    deleted from the scene or are no longer skinned are reported as
+    ``stale``, and their weight files are kept unless ``removeStale`` is
+    set. A second fingerprint, of the influences and weights only, lets
+    `loadSkinWeights` find the objects that share their weights. The
+    modification time and size of every file written are recorded too, so a
+    file saved over by other tools is not mistaken for the one the manifest
+    describes.
+
+    With ``snapshot`` set, the save is also recorded as a snapshot of the
+    versioned weight store next to the weight files, which `loadSkinWeights`
+    can restore. A snapshot holds the weights exactly as they were written to
+    the files, and the rest positions of the vertices.
+
     Args:
         characterName (str): Character name.
         geoList (list[str], optional): List of selected geometry names. Defaults to [].
+        binary (bool, optional): Save binary (``.swb``) files instead of text
+            (``.swt``) files. Defaults to False.
+        sparse (bool, optional): Only store the non-zero weights of every
+            vertex. Requires ``binary``. Defaults to False.
+        compression (str, optional): Save compressed (``.swz``) files,
+            ``"zlib"`` or ``"lzma"``. Defaults to None.
+        level (int, optional): Compression level, 0 to 9. Defaults to
+            `rigTools.skinWeightFile.DEFAULT_COMPRESSION_LEVEL`.
+        quantize (int, optional): Store the weights as 8 or 16 bit fixed
+            point. Requires ``binary``. Defaults to None.
+        incremental (bool, optional): Skip the objects that did not change
+            since they were last saved. Defaults to False.
+        snapshot (bool, optional): Also record the weights of all objects as
+            a snapshot of the versioned weight store next to the weight files
+            (see `rigTools.skinWeightStore`). Only the data that changed since
+            earlier snapshots takes up space. Defaults to False.
+        tag (str, optional): Name of the snapshot, to restore it by. Defaults
+            to None.
+        pruneThreshold (float, optional): Remove the weights below it before
+            saving, see `rigTools.skinWeightFile.pruneWeights`. Defaults to
+            0.0.
+        maxInfluences (int, optional): Keep only this many influences per
+            vertex. Defaults to None.
+        keepSnapshots (int, optional): Number of most recent snapshots to
+            keep in the store, see
+            `rigTools.skinWeightStore.SkinWeightStore.prune`. Defaults to
+            None, meaning all snapshots are kept.
+        removeStale (bool, optional): Remove the weight files, index files
+            and manifest entries of the stale objects. Defaults to False.
+        positions (bool, optional): Also save the rest position of every
+            vertex, see `rigTools.bSkinSaver.bSaveSkinValues`. Defaults to
+            None, meaning in binary files only.
+
+    Returns:
+        dict: Names of the objects ``written``, ``skipped``, ``stale`` and
+        ``removed``.
     """
 
+    if compression:
+        ext = swCompressedExt
+    else:
+        ext = swBinaryExt if binary else swExt
+
+    settings = {"binary": binary, "sparse": sparse,
+                "compression": compression, "level": level,
+                "quantize": quantize, "pruneThreshold": pruneThreshold,
+                "maxInfluences": maxInfluences, "positions": positions}
+
+    # weights folder
+    wtDir = os.path.join(project.mainProjectPath,
+                         characterName, skinWeightsDir)
+    manifestFile = os.path.join(wtDir, swManifestFile)
+    manifest = skinWeightFile.readManifest(manifestFile)
+
+    report = {"written": [], "skipped": [], "stale": [], "removed": []}
+    snapshotObjects = []
     for obj in geoList:
         # weight file
-        wtFile = os.path.join(project.mainProjectPath,
-                              characterName, skinWeightsDir, obj + swExt)
+        wtFile = os.path.join(wtDir, obj + ext)
+        entry = manifest["objects"].get(obj)
+
+        # objects that were deleted or are no longer skinned keep their
+        # weights, unless asked otherwise
+        objects = []
+        if mc.objExists(obj):
+            objects = bSkinSaver.bGetSkinWeights(obj)
+        if not objects:
+            report["stale"].append(obj)
+            if not removeStale:
+                continue
+
+            oldWtFiles = set([wtFile])
+            if entry:
+                oldWtFiles.add(os.path.join(wtDir, entry["file"]))
+                del manifest["objects"][obj]
+            removed = bool(entry)
+            for oldWtFile in oldWtFiles:
+                if os.path.exists(oldWtFile):
+                    os.remove(oldWtFile)
+                    removed = True
+                if os.path.exists(skinWeightFile.indexPath(oldWtFile)):
+                    os.remove(skinWeightFile.indexPath(oldWtFile))
+            if removed:
+                report["removed"].append(obj)
+            continue
+
+        # skip unchanged objects
+        fingerprint = skinWeightFile.fingerprint(objects)
+        weightsFingerprint = skinWeightFile.fingerprint(
+            objects, names=False, positions=False)
+        skip = incremental and entry and entry["fingerprint"] == fingerprint \
+            and entry["file"] == obj + ext \
+            and entry["settings"] == settings \
+            and _fileMatchesEntry(wtFile, entry)
+
+        # the weights as they are in the file
+        if (snapshot or not skip) and \
+                (pruneThreshold > 0 or maxInfluences is not None):
+            prunedObjects = []
+            for skinWeights in objects:
+                skinWeights, pruneReport = skinWeightFile.pruneSkinWeights(
+                    skinWeights, pruneThreshold, maxInfluences)
+                if not skip:
+                    print("{}: pruned {} weights, max weight change "
+                          "{:.3g}".format(skinWeights.name,
+                                          pruneReport.removed,
+                                          pruneReport.maxChange))
+                prunedObjects.append(skinWeights)
+            objects = prunedObjects
+
+        if snapshot:
+            snapshotObjects.extend(objects)
+
+        if skip:
+            entry["weights"] = weightsFingerprint
+            report["skipped"].append(obj)
+            continue
 
         # save skin weight file
-        mc.select(obj)
-        bSkinSaver.bSaveSkinValues(wtFile)
+        bSkinSaver.bSaveSkinValues(wtFile, binary=binary, sparse=sparse,
+                                   compression=compression, level=level,
+                                   quantize=quantize, objects=objects,
+                                   positions=positions)
+        manifest["objects"][obj] = {"file": obj + ext,
+                                    "fingerprint": fingerprint,
+                                    "weights": weightsFingerprint,
+                                    "settings": settings,
+                                    "mtime": os.path.getmtime(wtFile),
+                                    "size": os.path.getsize(wtFile)}
+        report["written"].append(obj)
+
+    skinWeightFile.writeManifest(manifestFile, manifest)
+
+    if snapshot and snapshotObjects:
+        store = skinWeightStore.SkinWeightStore(os.path.join(wtDir, swStoreDir))
+        commitReport = store.commit(snapshotObjects, tag)
+        print("stored snapshot {}, {} of {} chunks new".format(
+            commitReport.snapshot["id"], commitReport.newChunks,
+            commitReport.chunks))
+        if keepSnapshots is not None:
+            print("removed {} snapshots and {} chunks".format(
+                *store.prune(keepSnapshots)))
+
+    for action in ["written", "skipped", "stale", "removed"]:
+        if report[action]:
+            print("{} {}: {}".format(len(report[action]), action,
+                                     ", ".join(report[action])))
+
+    return report
+
+
+def _fileMatchesEntry(wtFile, entry):
+    u"""Checks that a weight file is the one a manifest entry was written for.
+
+    Args:
+        wtFile (str): Path of the weight file.
+        entry (dict): Manifest entry of the object.
+
+    Returns:
+        bool: True if the file exists and has the modification time and size
+        recorded in the entry.
+    """
+
+    return os.path.exists(wtFile) \
+        and entry.get("mtime") == os.path.getmtime(wtFile) \
+        and entry.get("size") == os.path.getsize(wtFile)
 
 
-def loadSkinWeights(characterName, geoList=[]):
+def loadSkinWeights(characterName, geoList=[], workers=0, processes=False,
+                    validate=False, version=None, pruneThreshold=0.0,
+                    maxInfluences=None, removeUnusedInfluences=False,
+                    blockSize=skinWeightFile.DEFAULT_BLOCK_SIZE, cache=False,
+                    shareWeights=False):
     u"""Load skin weights for character geometry objects.
 
+    Text (``.swt``), binary (``.swb``) and compressed (``.swz``) weight files
+    are loaded; the layout is detected from the file content. If an object
+    has more than one, the most recently saved one is used.
+
+    With ``workers`` set, the weight files are read and parsed by a pool of
+    workers while the weights of the files already parsed are applied, in file
+    order, by the main thread. The weights are the same as with a serial
+    load.
+
+    With ``cache`` set, the files are read through
+    `rigTools.skinWeightCache.sessionCache`, so rebuilding the rig in the same
+    session does not read or parse the text and compressed files that did
+    not change again. The cache keeps the decoded weights in memory for the
+    rest of the session, so it is meant for interactive rig development: it
+    is not used in batch mode or with ``processes``, and files too large for
+    it are still loaded block by block.
+
+    With ``shareWeights`` set, objects of the same topology whose files hold
+    the same weights and influences, saved with the same settings, are
+    grouped. The weights of a group are read once and set on every object
+    of the group, so loading many duplicated meshes costs about as much as
+    loading one. Files the manifest does not describe as they are on disk,
+    such as files saved from the bSkinSaver UI, are loaded on their own.
+
     Args:
         characterName (str): Character name.
         geoList (list[str], optional): List of selected geometry names. Defaults to [].
+        workers (int, optional): Number of workers parsing weight files. 0
+            loads the files one after the other. Defaults to 0.
+        processes (bool, optional): Use a pool of processes instead of threads.
+            Inside the Maya GUI this needs ``multiprocessing.set_executable``
+            to point at mayapy. Defaults to False.
+        validate (bool, optional): Check the weight files against the
+            checksums of their index files first, and skip the files that do
+            not match. Files without an index are loaded unchecked. Defaults
+            to False.
+        version (str or float or datetime.datetime, optional): Restore a
+            snapshot of the versioned weight store instead of loading the
+            weight files: a snapshot id or tag, or a time to restore the last
+            snapshot saved before it (see
+            `rigTools.skinWeightStore.SkinWeightStore.findSnapshot`). Defaults
+            to None.
+        pruneThreshold (float, optional): Remove the weights below it while
+            loading, see `rigTools.skinWeightFile.pruneWeights`. Defaults to
+            0.0.
+        maxInfluences (int, optional): Keep only this many influences per
+            vertex, and use it as the maximum influences of new skinClusters.
+            Defaults to None.
+        removeUnusedInfluences (bool, optional): Once loaded, remove the
+            influences without weight on any vertex from the skinClusters of
+            the objects. Defaults to False.
+        blockSize (int, optional): Number of vertices whose weights are set at
+            once. Lower it to bound the memory used on very large meshes, see
+            `rigTools.bSkinSaver.bSkinObject`. Defaults to
+            `rigTools.skinWeightFile.DEFAULT_BLOCK_SIZE`.
+        cache (bool, optional): Keep the decoded weights in the session cache,
+            and use it. Defaults to False.
+        shareWeights (bool, optional): Read the weights shared by several
+            objects of the same topology once. Defaults to False.
     """
 
     # weights folder
     wtDir = os.path.join(project.mainProjectPath,
                          characterName, skinWeightsDir).replace("\\", "/")
+
+    # restore a snapshot
+    if version is not None:
+        store = skinWeightStore.SkinWeightStore(os.path.join(wtDir, swStoreDir))
+        objects = [skinWeights for skinWeights in
+                   store.load(version, geoList or None)
+                   if mc.objExists(skinWeights.name)]
+        bSkinSaver.bLoadSkinObjects(objects, blockSize,
+                                    pruneThreshold=pruneThreshold,
+                                    maxInfluences=maxInfluences)
+        if removeUnusedInfluences:
+            _removeUnusedInfluences([skinWeights.name for skinWeights in
+                                     objects])
+        return
+
     wtFiles = os.listdir(wtDir)
 
-    # load skin weights
-    for wtFile in wtFiles:
+    # pick one weight file per object
+    objFiles = {}
+    for wtFile in sorted(wtFiles):
         extRes = os.path.splitext(wtFile)
 
         # check extension format
@@ -198,7 +463,7 @@ def loadSkinWeights(characterName, geoList=[]):
             continue
 
         # check skin weight file
-        if not extRes[1] == swExt:
+        if not extRes[1] in [swExt, swBinaryExt, swCompressedExt]:
             continue
 
         # check geometry list
@@ -210,5 +475,219 @@ def loadSkinWeights(characterName, geoList=[]):
             continue
 
         fullpathWtFile = os.path.join(wtDir, wtFile).replace("\\", "/")
-        bSkinSaver.bLoadSkinValues(
-            loadOnSelection=False, inputFile=fullpathWtFile)
+        if extRes[0] in objFiles and os.path.getmtime(objFiles[extRes[0]]) >= os.path.getmtime(fullpathWtFile):
+            continue
+
+        objFiles[extRes[0]] = fullpathWtFile
+
+    loadFiles = [objFiles[obj] for obj in sorted(objFiles)]
+    fileObjects = dict((objFiles[obj], obj) for obj in objFiles)
+
+    # check the files against their index
+    if validate:
+        for fullpathWtFile in list(loadFiles):
+            corruptObjects = skinWeightFile.verifyWeightFile(fullpathWtFile)
+            if corruptObjects:
+                print("skipping {}, checksum mismatch for: {}".format(
+                    fullpathWtFile, ", ".join(corruptObjects)))
+                loadFiles.remove(fullpathWtFile)
+
+    # load skin weights
+    useCache = cache and not processes and not mc.about(batch=True)
+    if useCache:
+        readWeightFile = skinWeightCache.sessionCache.read
+    else:
+        readWeightFile = skinWeightFile.readWeightFile
+
+    loadedObjects = [fileObjects[wtFile] for wtFile in loadFiles]
+
+    # read the weights shared by several objects once
+    if shareWeights:
+        for sharedFiles in _sharedWeightFiles(wtDir, loadFiles):
+            objects = readWeightFile(sharedFiles[0])
+            bSkinSaver.bLoadSharedSkinWeights(
+                objects[0], [fileObjects[wtFile] for wtFile in sharedFiles],
+                blockSize, pruneThreshold, maxInfluences)
+            print("{} objects share the weights of {}".format(
+                len(sharedFiles), sharedFiles[0]))
+            for wtFile in sharedFiles:
+                loadFiles.remove(wtFile)
+
+    if not workers:
+        for fullpathWtFile in loadFiles:
+            if useCache and skinWeightCache.sessionCache.fits(fullpathWtFile):
+                bSkinSaver.bLoadSkinObjects(
+                    readWeightFile(fullpathWtFile), blockSize,
+                    pruneThreshold=pruneThreshold,
+                    maxInfluences=maxInfluences)
+            else:
+                bSkinSaver.bLoadSkinValues(
+                    loadOnSelection=False, inputFile=fullpathWtFile,
+                    blockSize=blockSize, pruneThreshold=pruneThreshold,
+                    maxInfluences=maxInfluences)
+
+    # parse in parallel, apply in file order
+    else:
+        if processes:
+            pool = multiprocessing.Pool(workers)
+        else:
+            pool = multiprocessing.pool.ThreadPool(workers)
+
+        # at most two files per worker are parsed ahead of the one being
+        # applied, so the weights held do not grow with the number of files
+        try:
+            pending = collections.deque()
+            nextFile = 0
+            while pending or nextFile < len(loadFiles):
+                while nextFile < len(loadFiles) and \
+                        len(pending) < workers * 2:
+                    pending.append(pool.apply_async(
+                        readWeightFile, (loadFiles[nextFile],)))
+                    nextFile += 1
+
+                bSkinSaver.bLoadSkinObjects(
+                    pending.popleft().get(), blockSize,
+                    pruneThreshold=pruneThreshold,
+                    maxInfluences=maxInfluences)
+        finally:
+            pool.terminate()
+            pool.join()
+
+    if removeUnusedInfluences:
+        _removeUnusedInfluences(loadedObjects)
+
+
+def _removeUnusedInfluences(objectNames):
+    u"""Removes the unused influences from the skinClusters of objects.
+
+    Args:
+        objectNames (list[str]): Names of the skinned objects.
+    """
+
+    for obj in objectNames:
+        if mc.objExists(obj):
+            bSkinSaver.bRemoveUnusedInfluences(obj)
+
+
+def _sharedWeightFiles(wtDir, loadFiles):
+    u"""Groups the weight files of objects that can share their weights.
+
+    Two objects share their weights if their meshes have the same topology,
+    and the manifest records the same fingerprint of the influences and
+    weights, and the same settings, for their files. The object names and
+    rest positions are not part of it, so duplicated meshes moved apart
+    share their weights too. Files that changed since the manifest was
+    written are left out of the groups.
+
+    Args:
+        wtDir (str): Weights folder, holding the manifest.
+        loadFiles (list[str]): Paths of the weight files, one object each.
+
+    Returns:
+        list[list[str]]: The paths of the files of every group of more than
+        one object, in the order of ``loadFiles``.
+    """
+
+    manifest = skinWeightFile.readManifest(os.path.join(wtDir,
+                                                        swManifestFile))
+
+    groups = {}
+    order = []
+    for wtFile in loadFiles:
+        fileName = os.path.basename(wtFile)
+        obj = os.path.splitext(fileName)[0]
+        entry = manifest["objects"].get(obj)
+        if not entry or "weights" not in entry or entry["file"] != fileName:
+            continue
+        if not _fileMatchesEntry(wtFile, entry):
+            print("{} changed since it was saved, loading it on its "
+                  "own".format(wtFile))
+            continue
+
+        topology = bSkinSaver.bTopologyFingerprint(obj)
+        if topology is None:
+            continue
+
+        key = (topology, entry["weights"],
+               json.dumps(entry["settings"], sort_keys=True))
+        if key not in groups:
+            groups[key] = []
+            order.append(key)
+        groups[key].append(wtFile)
+
+    return [groups[key] for key in order if len(groups[key]) > 1]
+
+
+def mirrorSkinWeights(characterName, geoList=[], axis=0, positive=True,
+                      tolerance=skinWeightFile.DEFAULT_MIRROR_TOLERANCE,
+                      save=True, binary=False):
+    u"""Mirrors the skin weights of character geometry objects from one side
+    to the other.
+
+    The weights of every object are mirrored at its rest positions in object
+    space, swapping the ``l_`` and ``r_`` influences like
+    `rigLib.utils.name.mirrorName` (see
+    `rigTools.skinWeightFile.mirrorWeights`), and set back on the object.
+
+    Args:
+        characterName (str): Character name.
+        geoList (list[str], optional): List of geometry names. Defaults to [],
+            meaning all the geometry of the character model.
+        axis (int, optional): Axis normal to the symmetry plane, 0 for x, 1
+            for y and 2 for z. Defaults to 0.
+        positive (bool, optional): Mirror the positive side (the left side of
+            the character) onto the negative side, else the other way around.
+            Defaults to True.
+        tolerance (float, optional): Largest distance between a vertex and
+            the mirrored position of its match. Defaults to
+            `rigTools.skinWeightFile.DEFAULT_MIRROR_TOLERANCE`.
+        save (bool, optional): Save the mirrored weights with
+            `saveSkinWeights`. Defaults to True.
+        binary (bool, optional): Save binary (``.swb``) files. Defaults to
+            False.
+
+    Returns:
+        dict: The indices of the vertices left unmatched, per object name.
+        Objects whose mirrored weights could not be set, for instance
+        because a mirrored influence does not exist, are reported as skipped
+        and are neither listed nor saved.
+    """
+
+    if not geoList:
+        geoList = _getModelGeoObjects("%s_model_grp" % characterName)
+
+    unmatched = {}
+    mirroredObjects = []
+    skippedObjects = []
+    for obj in geoList:
+        objects = bSkinSaver.bGetSkinWeights(obj, positions=True)
+        skipped = False
+        for skinWeights in objects:
+            weights, influences, report = skinWeightFile.mirrorWeights(
+                skinWeights.positions, skinWeights.weights,
+                skinWeights.influences, name.mirrorName, axis, positive,
+                tolerance)
+            if bSkinSaver.bLoadSkinObjects([skinWeightFile.SkinWeights(
+                    skinWeights.name, influences, weights)]):
+                print("{}: skipped, the mirrored weights could not be "
+                      "set".format(skinWeights.name))
+                skipped = True
+                continue
+
+            print("{}: mirrored {} vertices, {} unmatched".format(
+                skinWeights.name, report.mirrored, len(report.unmatched)))
+            if report.unmatched:
+                unmatched[skinWeights.name] = report.unmatched
+        if skipped:
+            skippedObjects.append(obj)
+        elif objects:
+            mirroredObjects.append(obj)
+
+    if skippedObjects:
+        print("{} skipped: {}".format(len(skippedObjects),
+                                      ", ".join(skippedObjects)))
+
+    if save and mirroredObjects:
+        saveSkinWeights(characterName, mirroredObjects, binary=binary)
+
+    return unmatched
@@ -22,4 +22,24 @@ def removeSuffix(name):
     suffix = "_" + edits[-1]
     nameNoSuffix = name[:-len(suffix)]
 
-    return nameNoSuffix
\ No newline at end of file
+    return nameNoSuffix
+
+def mirrorName(name):
+    """Swap the side prefix of given name string.
+
+    The ``l_`` prefix becomes ``r_`` and the other way around, so
+    "l_hand1_jnt" becomes "r_hand1_jnt". Names without a side prefix, like
+    "spine1_jnt", are returned unchanged.
+
+    Args:
+        name (str): Given name string to process.
+
+    Returns:
+        str: Name of the other side.
+    """
+
+    for side, otherSide in [("l_", "r_"), ("r_", "l_")]:
+        if name.startswith(side):
+            return otherSide + name[len(side):]
+
+    return name
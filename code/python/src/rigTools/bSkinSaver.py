@@ -15,16 +15,18 @@ u"""
 
 """
 
+import os
 import time
 
 import maya.OpenMaya as OpenMaya
 import maya.OpenMayaAnim as OpenMayaAnim
-import maya.mel
 import maya.cmds as cmds
 import maya.OpenMayaUI as mui
 from PySide2 import QtCore, QtWidgets
 import shiboken2
 
+from . import skinWeightFile
+
 
 def showUI():
     global mainWin
@@ -34,11 +36,15 @@ def showUI():
 
 def getMayaWindow():
     ptr = mui.MQtUtil.mainWindow()
-    return shiboken2.wrapInstance(long(ptr), QtWidgets.QWidget)
+    if ptr is None:
+        return None
+    return shiboken2.wrapInstance(int(ptr), QtWidgets.QWidget)
 
 
 class bSkinSaverUI(QtWidgets.QDialog):
-    def __init__(self, parent=getMayaWindow()):
+    def __init__(self, parent=None):
+        if parent is None:
+            parent = getMayaWindow()
         super(bSkinSaverUI, self).__init__(
             parent, QtCore.Qt.WindowStaysOnTopHint)
 
@@ -146,10 +152,10 @@ class bSkinSaverUI(QtWidgets.QDialog):
             self.verticesFileLine.setText(fileResult[0])
 
     def loadObjects(self):
-        bLoadSkinValues(False, str(self.objectsFileLine.text()))
+        bLoadSkinValues(False, str(self.objectsFileLine.text()), refresh=True)
 
     def loadObjectsSelection(self):
-        bLoadSkinValues(True, str(self.objectsFileLine.text()))
+        bLoadSkinValues(True, str(self.objectsFileLine.text()), refresh=True)
 
     def saveObjects(self):
         bSaveSkinValues(str(self.objectsFileLine.text()))
@@ -166,16 +172,336 @@ class bSkinSaverUI(QtWidgets.QDialog):
 bSkinPath = OpenMaya.MDagPath()
 
 
-def bFindSkinCluster(objectName):
+class InfluenceIndex(object):
+
+    def __init__(self):
+        u"""Index of the joints in the scene, by name.
+
+        Every joint can be found by its full path, its short name (with
+        namespace) and its short name without namespace. A short name used by
+        several joints, such as ``spine1`` with ``A:spine1`` and ``B:spine1``
+        in the scene, is ambiguous and finds no joint; full paths are always
+        unique.
+
+        The index is built once and reused; see `getInfluenceIndex`.
+        """
+
+        self._paths = {}
+        self._ambiguous = set()
+
+        it = OpenMaya.MItDependencyNodes(OpenMaya.MFn.kJoint)
+        while not it.isDone():
+            dagPath = OpenMaya.MDagPath()
+            OpenMaya.MFnDagNode(it.item()).getPath(dagPath)
+
+            for name in _jointNames(str(dagPath.fullPathName())):
+                if name in self._paths:
+                    self._ambiguous.add(name)
+                else:
+                    self._paths[name] = dagPath
+
+            it.next()
+
+        for name in self._ambiguous:
+            del self._paths[name]
+
+    def __contains__(self, name):
+        return name in self._paths
+
+    def isAmbiguous(self, name):
+        u"""Checks whether a name is used by several joints.
+
+        Args:
+            name (str): Short name or short name without namespace.
+
+        Returns:
+            bool: True if the name matches more than one joint.
+        """
+
+        return name in self._ambiguous
+
+    def find(self, name):
+        u"""Finds the joint of the given name.
+
+        Args:
+            name (str): Full path, short name or short name without namespace.
+
+        Returns:
+            OpenMaya.MDagPath: DAG path of the joint, None if there is none or
+            if the name is ambiguous.
+        """
+
+        return self._paths.get(name)
+
+    def fullPathName(self, name):
+        u"""Gets the full path of the joint of the given name.
+
+        Args:
+            name (str): Full path, short name or short name without namespace.
+
+        Returns:
+            str: Full path of the joint, None if there is none or if the name
+            is ambiguous.
+        """
+
+        dagPath = self._paths.get(name)
+        if dagPath is None:
+            return None
+
+        return str(dagPath.fullPathName())
+
+
+def _jointNames(fullPath):
+    u"""Gets the names a joint can be found by.
+
+    Args:
+        fullPath (str): Full path of the joint.
+
+    Returns:
+        set[str]: The full path, the short name and the short name without
+        namespace.
+    """
+
+    shortName = fullPath.split('|')[-1]
+    return set((fullPath, shortName, shortName.split(':')[-1]))
+
+
+def _matchInfluences(joints, influencePaths):
+    u"""Maps joint names onto the influences of a skinCluster.
+
+    A name matches an influence by its full path, short name or short name
+    without namespace, and only if it matches a single influence of the
+    skinCluster, so a skinCluster bound to one character resolves the names
+    to its own joints even when other characters share them.
+
+    Args:
+        joints (list[str]): Names of the joints.
+        influencePaths (OpenMaya.MDagPathArray): Influences of the
+            skinCluster.
+
+    Returns:
+        list[int]: Index of the influence of each joint, None for the joints
+        that match no influence or several.
+    """
+
+    influences = {}
+    for i in range(influencePaths.length()):
+        for name in _jointNames(str(influencePaths[i].fullPathName())):
+            influences.setdefault(name, []).append(i)
+
+    indices = []
+    for joint in joints:
+        matches = influences.get(joint, [])
+        indices.append(matches[0] if len(matches) == 1 else None)
+
+    return indices
+
+
+_influenceIndex = None
+_influenceIndexCallbacks = []
+
+
+def invalidateInfluenceIndex(*args):
+    u"""Discards the index built by `getInfluenceIndex`.
+
+    Called automatically when joints are added, removed or renamed.
+    """
+
+    global _influenceIndex
+    _influenceIndex = None
+
+
+def _invalidateInfluenceIndexOnRename(node, *args):
+    if node.hasFn(OpenMaya.MFn.kJoint):
+        invalidateInfluenceIndex()
+
+
+def getInfluenceIndex():
+    u"""Gets the `InfluenceIndex` of the scene, building it if needed.
+
+    The index is kept until a joint is added, removed or renamed, so a whole
+    load session scans the scene joints only once.
+
+    Returns:
+        `InfluenceIndex`: Index of the joints in the scene.
+    """
+
+    global _influenceIndex
+
+    if not _influenceIndexCallbacks:
+        _influenceIndexCallbacks.append(OpenMaya.MDGMessage.addNodeAddedCallback(
+            invalidateInfluenceIndex, "joint"))
+        _influenceIndexCallbacks.append(OpenMaya.MDGMessage.addNodeRemovedCallback(
+            invalidateInfluenceIndex, "joint"))
+        _influenceIndexCallbacks.append(OpenMaya.MNodeMessage.addNameChangedCallback(
+            OpenMaya.MObject(), _invalidateInfluenceIndexOnRename))
+
+    if _influenceIndex is None:
+        _influenceIndex = InfluenceIndex()
+
+    return _influenceIndex
+
+
+def removeSceneCallbacks():
+    u"""Removes the scene callbacks registered by `getInfluenceIndex` and
+    `bFindSkinCluster`, and discards what they kept up to date.
+
+    Call it before reloading this module or when the tool is no longer
+    needed; the callbacks are registered again on the next use.
+    """
+
+    for callbacks in (_influenceIndexCallbacks, _skinClusterCacheCallbacks):
+        if callbacks:
+            callbackIds = OpenMaya.MCallbackIdArray()
+            for callbackId in callbacks:
+                callbackIds.append(callbackId)
+            OpenMaya.MMessage.removeCallbacks(callbackIds)
+            del callbacks[:]
+
+    invalidateInfluenceIndex()
+    invalidateSkinClusterCache()
+
+
+_skinClusterCache = {}
+_skinClusterCacheCallbacks = []
+
+
+def invalidateSkinClusterCache(*args):
+    u"""Discards the object to skinCluster lookups cached by `bFindSkinCluster`.
+
+    Called automatically when skinClusters are added or removed and when nodes
+    are renamed.
+    """
+
+    _skinClusterCache.clear()
+
+
+def _findSkinClusterInHistory(objectName):
+    u"""Finds the skinCluster deforming an object through its history.
+
+    Args:
+        objectName (str): Name of the shape or of its transform.
+
+    Returns:
+        tuple(OpenMaya.MObject, int): The skinCluster and the index of its
+        output connection to the object's shape, (False, -1) if the object
+        is not skinned, None if the name does not match exactly one object.
+    """
+
+    selectionList = OpenMaya.MSelectionList()
+    try:
+        selectionList.add(objectName)
+    except RuntimeError:
+        return None
+
+    dagPath = OpenMaya.MDagPath()
+    try:
+        selectionList.getDagPath(0, dagPath)
+    except RuntimeError:
+        return None
+
+    shapes = []
+    if dagPath.hasFn(OpenMaya.MFn.kTransform):
+        scriptUtil = OpenMaya.MScriptUtil()
+        shapeCountPtr = scriptUtil.asUintPtr()
+        dagPath.numberOfShapesDirectlyBelow(shapeCountPtr)
+        for i in range(OpenMaya.MScriptUtil.getUint(shapeCountPtr)):
+            shapePath = OpenMaya.MDagPath(dagPath)
+            shapePath.extendToShapeDirectlyBelow(i)
+            shapes.append(shapePath.node())
+    else:
+        shapes.append(dagPath.node())
+
+    for shape in shapes:
+        it = OpenMaya.MItDependencyGraph(
+            shape, OpenMaya.MFn.kSkinClusterFilter,
+            OpenMaya.MItDependencyGraph.kUpstream,
+            OpenMaya.MItDependencyGraph.kDepthFirst,
+            OpenMaya.MItDependencyGraph.kNodeLevel)
+        while not it.isDone():
+            skinCluster = it.currentItem()
+            try:
+                outputIndex = OpenMayaAnim.MFnSkinCluster(
+                    skinCluster).indexForOutputShape(shape)
+            except RuntimeError:
+                # upstream of the shape, but deforming another one
+                pass
+            else:
+                return skinCluster, outputIndex
+            it.next()
+
+    return False, -1
+
+
+def _scanSkinClusters(objectName):
+    u"""Finds the skinCluster of an object by looking at every skinCluster.
+
+    Used for names that do not match exactly one object.
+
+    Args:
+        objectName (str): Partial path name of the shape or of its transform.
+
+    Returns:
+        tuple(OpenMaya.MObject, int): The skinCluster and the index of its
+        output connection to the object's shape, (False, -1) if there is none.
+    """
+
+    skinPath = OpenMaya.MDagPath()
     it = OpenMaya.MItDependencyNodes(OpenMaya.MFn.kSkinClusterFilter)
     while not it.isDone():
         fnSkinCluster = OpenMayaAnim.MFnSkinCluster(it.item())
-        fnSkinCluster.getPathAtIndex(0, bSkinPath)
+        fnSkinCluster.getPathAtIndex(0, skinPath)
 
-        if OpenMaya.MFnDagNode(bSkinPath.node()).partialPathName() == objectName or OpenMaya.MFnDagNode(OpenMaya.MFnDagNode(bSkinPath.node()).parent(0)).partialPathName() == objectName:
-            return it.item()
+        if OpenMaya.MFnDagNode(skinPath.node()).partialPathName() == objectName or OpenMaya.MFnDagNode(OpenMaya.MFnDagNode(skinPath.node()).parent(0)).partialPathName() == objectName:
+            return it.item(), 0
         it.next()
-    return False
+    return False, -1
+
+
+def bFindSkinCluster(objectName):
+    u"""Finds the skinCluster deforming an object.
+
+    The skinCluster is looked up through the deformation history of the
+    object's shape, and the result is cached by name until skinClusters are
+    added or removed or nodes are renamed. The skinned shape is stored in the
+    module level ``bSkinPath``.
+
+    Args:
+        objectName (str): Name of the shape or of its transform.
+
+    Returns:
+        OpenMaya.MObject: The skinCluster, False if the object is not skinned.
+    """
+
+    if not _skinClusterCacheCallbacks:
+        _skinClusterCacheCallbacks.append(OpenMaya.MDGMessage.addNodeAddedCallback(
+            invalidateSkinClusterCache, "skinCluster"))
+        _skinClusterCacheCallbacks.append(OpenMaya.MDGMessage.addNodeRemovedCallback(
+            invalidateSkinClusterCache, "skinCluster"))
+        _skinClusterCacheCallbacks.append(OpenMaya.MNodeMessage.addNameChangedCallback(
+            OpenMaya.MObject(), invalidateSkinClusterCache))
+
+    cached = _skinClusterCache.get(objectName)
+    if cached is not None and (cached[0] is False or cached[0].isValid()):
+        skinClusterHandle, outputIndex = cached
+    else:
+        found = _findSkinClusterInHistory(objectName)
+        if found is None:
+            found = _scanSkinClusters(objectName)
+        skinCluster, outputIndex = found
+
+        skinClusterHandle = False
+        if skinCluster is not False:
+            skinClusterHandle = OpenMaya.MObjectHandle(skinCluster)
+        _skinClusterCache[objectName] = (skinClusterHandle, outputIndex)
+
+    if skinClusterHandle is False:
+        return False
+
+    skinCluster = skinClusterHandle.object()
+    OpenMayaAnim.MFnSkinCluster(skinCluster).getPathAtIndex(
+        outputIndex, bSkinPath)
+    return skinCluster
 
 
 def bLoadVertexSkinValues(inputFile, ignoreJointLocks):
@@ -221,8 +547,11 @@ def bLoadVertexSkinValues(inputFile, ignoreJointLocks):
     vtxComponents = OpenMaya.MObject()
     vtxComponents = fnVtxComp.create(OpenMaya.MFn.kMeshVertComponent)
 
+    vertIds = []
+    positions = []
     bindVertCount = 0
     didCheckSoftSelection = False
+    doSoftSelection = False
     while True:
         line = input.readline().strip()
         if not line:
@@ -230,16 +559,17 @@ def bLoadVertexSkinValues(inputFile, ignoreJointLocks):
 
         if filePosition == 0:
             vertexCount = int(line)
-            if OpenMaya.MItGeometry(node).count() != vertexCount:
-                print("vertex counts don't match!")
-                return
             filePosition = 1
 
-        elif filePosition == 1:
-            if not line.startswith("========"):
-                fileJoints.append(line)
-            else:
+        elif filePosition in (1, 3):
+            if line.startswith("========"):
                 filePosition = 2
+            elif line.startswith(skinWeightFile.POSITIONS_SEPARATOR):
+                filePosition = 3
+            elif filePosition == 3:
+                positions.extend([float(value) for value in line.split(' ')])
+            else:
+                fileJoints.append(line)
 
         elif filePosition == 2:
             splittedStrings = line.split(':')
@@ -256,8 +586,7 @@ def bLoadVertexSkinValues(inputFile, ignoreJointLocks):
                 didCheckSoftSelection = True
 
             # vertId
-            vertId = int(splittedStrings[0])
-            fnVtxComp.addElement(vertId)
+            vertIds.append(int(splittedStrings[0]))
 
             # softselection
             if doSoftSelection:
@@ -265,13 +594,43 @@ def bLoadVertexSkinValues(inputFile, ignoreJointLocks):
 
             # weights
             splittedWeights = splittedStrings[weightsIndex].split(' ')
-            fileWeightFloats.append(map(float, splittedWeights))
+            fileWeightFloats.append([float(value) for value in splittedWeights])
 
             # for k in range(len(fileJoints)):
             #    fileWeightFloats[bindVertCount].append(float(splittedWeights[k]))
 
             bindVertCount += 1
 
+    input.close()
+
+    # the vertex ids only hold for the vertex count they were saved with,
+    # otherwise the vertices are found again by closest point
+    #
+    sceneVertexCount = OpenMaya.MItGeometry(node).count()
+    if sceneVertexCount != vertexCount:
+        if not positions:
+            print("vertex counts don't match ({} in the file, {} in the scene) "
+                  "and the file has no rest positions - skipping.".format(
+                      vertexCount, sceneVertexCount))
+            return
+
+        matched, report = skinWeightFile.matchVertices(
+            positions, _restPositions(bSkinPath, skinCluster))
+        rows = [i for i in range(bindVertCount) if matched[i] >= 0]
+        print('{}: vertex counts don\'t match ({} in the file, {} in the '
+              'scene), matched {} of {} vertices by closest point, {} '
+              'exactly, max distance {:.3g}'.format(
+                  objectName, vertexCount, sceneVertexCount, len(rows),
+                  bindVertCount, report.exact, report.maxDistance))
+
+        vertIds = [matched[i] for i in rows]
+        fileWeightFloats = [fileWeightFloats[i] for i in rows]
+        if doSoftSelection:
+            softWeights = [softWeights[i] for i in rows]
+        bindVertCount = len(rows)
+
+    fnVtxComp.addElements(_toMIntArray(vertIds))
+
     #print 'fileWeightFloats: ', fileWeightFloats
 
     # getting mayaJoints
@@ -292,39 +651,25 @@ def bLoadVertexSkinValues(inputFile, ignoreJointLocks):
     fnSkinCluster.getWeights(bSkinPath, vtxComponents,
                              oldWeightDoubles, infCountPtr)
 
-    # making allJoints
-    #
-    allJoints = list(fileJoints)
-    for mayaJoint in mayaJoints:
-        if mayaJoint not in fileJoints:
-            allJoints.append(mayaJoint)
-
     # mapping joints and making sure we have all joints in the skinCluster
     #
-    allInfluencesInScene = True
-    missingInfluencesList = []
-    for i in range(len(fileJoints)):
-        influenceInScene = False
-        for k in range(len(mayaJoints)):
-            if mayaJoints[k] == fileJoints[i]:
-                influenceInScene = True
-
-        if not influenceInScene:
-            allInfluencesInScene = False
-            missingInfluencesList.append(fileJoints[i])
+    fileJointIndices = _matchInfluences(fileJoints, influenceArray)
+    missingInfluencesList = [fileJoint for fileJoint, k
+                             in zip(fileJoints, fileJointIndices) if k is None]
 
-    if not allInfluencesInScene:
+    if missingInfluencesList:
         print('There are influences missing:', missingInfluencesList)
         return
 
-    # getting allExistInMaya
+    # making allJoints and getting allExistInMaya
     #
-    allExistInMaya = [-1] * len(allJoints)
-    for i in range(len(allJoints)):
-        for k in range(len(mayaJoints)):
-            if allJoints[i] == mayaJoints[k]:
-                allExistInMaya[i] = k
-                break
+    allJoints = list(fileJoints)
+    allExistInMaya = list(fileJointIndices)
+    fileJointIndices = set(fileJointIndices)
+    for k in range(infCount):
+        if k not in fileJointIndices:
+            allJoints.append(mayaJoints[k])
+            allExistInMaya.append(k)
 
     #print 'allExistInMaya: ', allExistInMaya
 
@@ -333,7 +678,8 @@ def bLoadVertexSkinValues(inputFile, ignoreJointLocks):
     allLocks = [False] * len(allJoints)
     if not ignoreJointLocks:
         for i in range(len(allJoints)):
-            allLocks[i] = cmds.getAttr('%s.liw' % allJoints[i])
+            allLocks[i] = cmds.getAttr(
+                '%s.liw' % influenceArray[allExistInMaya[i]].fullPathName())
 
     weightDoubles = OpenMaya.MDoubleArray(0)
 
@@ -422,29 +768,60 @@ def bLoadVertexSkinValues(inputFile, ignoreJointLocks):
     print('done, it took', (time.time()-timeBefore), ' seconds')
 
 
+def _toMIntArray(values):
+    u"""Builds an MIntArray from a list of ints in a single call.
+
+    Args:
+        values (list[int]): Values to copy.
+
+    Returns:
+        OpenMaya.MIntArray: Array holding a copy of the values.
+    """
+
+    scriptUtil = OpenMaya.MScriptUtil()
+    scriptUtil.createFromList(values, len(values))
+    return OpenMaya.MIntArray(scriptUtil.asIntPtr(), len(values))
+
+
 def vertexToId(vertex):
     return int(vertex.split('[')[1].split(']')[0])
 
 
 def vertexToIdList(verts):
-    vertIds = [0] * len(verts)
-    for i, vert in enumerate(verts):
-        vertIds[i] = vertexToId(vert)
-    return vertIds
-
-
-def bSaveVertexSkinValues(inputFile, ignoreSoftSelection):
+    return [vertexToId(vert) for vert in verts]
+
+
+def bSaveVertexSkinValues(inputFile, ignoreSoftSelection,
+                          precision=skinWeightFile.DEFAULT_PRECISION,
+                          vertIds=None, softWeights=None):
+    u"""Saves the skin weights of the selected vertices.
+
+    Args:
+        inputFile (str): Path of the vertex weight file to write.
+        ignoreSoftSelection (bool): Save the selected vertices only, without
+            their soft selection weights.
+        precision (int, optional): Significant digits per weight. Defaults to
+            `rigTools.skinWeightFile.DEFAULT_PRECISION`.
+        vertIds (list[int], optional): Indices of the vertices of the
+            selected mesh to save instead of the selected vertices, as
+            returned by `getSoftSelection` or `getSelectedVertices`.
+            Defaults to None.
+        softWeights (list[float], optional): Soft selection weights of
+            ``vertIds``. Defaults to None, meaning 1.0 for every vertex.
+    """
 
     timeBefore = time.time()
 
     print('saving Vertex skinWeights.. ')
 
-    if not ignoreSoftSelection:
-        verts, softWeights = getSoftSelection()
-    else:
-        verts = cmds.ls(selection=True, flatten=True)
+    if vertIds is None:
+        if not ignoreSoftSelection:
+            vertIds, softWeights = getSoftSelection()
+        else:
+            vertIds = getSelectedVertices()
+    if softWeights is None:
+        softWeights = [1.0] * len(vertIds)
 
-    vertIds = vertexToIdList(verts)
     selection = OpenMaya.MSelectionList()
     OpenMaya.MGlobal.getActiveSelectionList(selection)
 
@@ -469,27 +846,17 @@ def bSaveVertexSkinValues(inputFile, ignoreSoftSelection):
     vtxComponents = fnVtxComp.create(OpenMaya.MFn.kMeshVertComponent)
 
     WeightArray = OpenMaya.MFloatArray()
-    meshIter = OpenMaya.MItMeshVertex(dagPath, component)
-    # while not meshIter.isDone():
-    for vertId in vertIds:
-        fnVtxComp.addElement(vertId)
-        # meshIter.next()
+    fnVtxComp.addElements(_toMIntArray(vertIds))
 
-    vertexCount = meshIter.count()
     scriptUtil = OpenMaya.MScriptUtil()
     infCountPtr = scriptUtil.asUintPtr()
     fnSkinCluster.getWeights(bSkinPath, vtxComponents,
                              WeightArray, infCountPtr)
     infCount = OpenMaya.MScriptUtil.getUint(infCountPtr)
 
-    weightCheckArray = []
-    for i in range(infCount):
-        weightCheckArray.append(False)
-
-    for i in range(vertexCount):
-        for k in range(infCount):
-            if not weightCheckArray[k] and WeightArray[((i * infCount) + k)]:
-                weightCheckArray[k] = True
+    # copy the weights out of Maya once and find the influences in use
+    weights = WeightArray[0:len(vertIds) * infCount]
+    weightCheckArray = skinWeightFile.usedInfluences(weights, infCount)
 
     # joints..
     influentsArray = OpenMaya.MDagPathArray()
@@ -498,42 +865,34 @@ def bSaveVertexSkinValues(inputFile, ignoreSoftSelection):
         if (weightCheckArray[i]):
             output.write(OpenMaya.MFnDagNode(influentsArray[i]).name() + '\n')
 
-    output.write('============\n')
+    # rest positions of the saved vertices, to find them again if the vertex
+    # count changes
+    restPositions = _restPositions(bSkinPath, skinCluster)
+    output.write(skinWeightFile.POSITIONS_SEPARATOR + '\n')
+    output.write(skinWeightFile.formatWeightRows(
+        [restPositions[vertId * 3 + i] for vertId in vertIds
+         for i in range(3)], 3, precision))
 
-    counter = 0
-    weightArrayString = []
-    for i in range(len(vertIds)):
-        vertId = vertIds[i]
-        softWeight = ''
-        if not ignoreSoftSelection:
-            softWeight = '%f:' % softWeights[i]
-
-        #weightArrayString = '%d:%s' % (vertId, softWeight)
+    output.write('============\n')
 
-        """
-        for k in range(infCount):
-            if weightCheckArray[k] == True:
-                weightArrayString += str(WeightArray[(counter * infCount) + k]) + ' '
-        """
-        weightsString = ' '.join(['0' if x == 0 else str(x) for n, x in enumerate(
-            WeightArray[i*infCount: (i+1)*infCount]) if weightCheckArray[n]])
-        weightArrayString = "%d:%s%s" % (vertId, softWeight, weightsString)
+    # vertex rows: "vertId:softWeight:weights" or "vertId:weights"
+    if not ignoreSoftSelection:
+        rowPrefixes = ['%d:%f:' % (vertId, softWeight)
+                       for vertId, softWeight in zip(vertIds, softWeights)]
+    else:
+        rowPrefixes = ['%d:' % vertId for vertId in vertIds]
 
-        output.write(weightArrayString + '\n')
-        counter += 1
-        meshIter.next()
+    usedColumns = [k for k in range(infCount) if weightCheckArray[k]]
+    output.write(skinWeightFile.formatWeightRows(
+        skinWeightFile.selectColumns(weights, infCount, usedColumns),
+        len(usedColumns), precision, rowPrefixes))
 
     output.close()
 
     print('done, it took', (time.time()-timeBefore), ' seconds')
 
 
-def bSaveSkinValues(inputFile):
-
-    timeBefore = time.time()
-
-    output = open(inputFile, 'w')
-
+def _selectedSkinWeights(positions=True):
     selection = OpenMaya.MSelectionList()
     OpenMaya.MGlobal.getActiveSelectionList(selection)
 
@@ -547,136 +906,316 @@ def bSaveSkinValues(inputFile):
             print('{} is not a Transform node (need to select transform node of polyMesh)'.format(
                 OpenMaya.MFnDagNode(node).name()))
         else:
-            objectName = OpenMaya.MFnDagNode(node).name()
-            newTransform = OpenMaya.MFnTransform(node)
-            for childIndex in range(newTransform.childCount()):
-                childObject = newTransform.child(childIndex)
-                if childObject.hasFn(OpenMaya.MFn.kMesh) or childObject.hasFn(OpenMaya.MFn.kNurbsSurface) or childObject.hasFn(OpenMaya.MFn.kCurve):
-                    skinCluster = bFindSkinCluster(
-                        OpenMaya.MFnDagNode(childObject).partialPathName())
-                    if skinCluster is not False:
-                        bSkinPath = OpenMaya.MDagPath()
-                        fnSkinCluster = OpenMayaAnim.MFnSkinCluster(
-                            skinCluster)
-                        fnSkinCluster.getPathAtIndex(0, bSkinPath)
-                        influenceArray = OpenMaya.MDagPathArray()
-                        fnSkinCluster.influenceObjects(influenceArray)
-                        influentsCount = influenceArray.length()
-                        output.write(objectName + '\n')
-
-                        for k in range(influentsCount):
-                            jointTokens = str(
-                                influenceArray[k].fullPathName()).split('|')
-                            jointTokens = jointTokens[len(
-                                jointTokens)-1].split(':')
-                            output.write(
-                                jointTokens[len(jointTokens)-1] + '\n')
-
-                        output.write('============\n')
-
-                        fnVtxComp = OpenMaya.MFnSingleIndexedComponent()
-                        vtxComponents = OpenMaya.MObject()
-                        vtxComponents = fnVtxComp.create(
-                            OpenMaya.MFn.kMeshVertComponent)
-
-                        vertexCount = OpenMaya.MFnMesh(bSkinPath).numVertices()
-                        for i in range(vertexCount):
-                            fnVtxComp.addElement(i)
-
-                        WeightArray = OpenMaya.MFloatArray()
-                        scriptUtil = OpenMaya.MScriptUtil()
-                        infCountPtr = scriptUtil.asUintPtr()
-                        fnSkinCluster.getWeights(
-                            bSkinPath, vtxComponents, WeightArray, infCountPtr)
-                        infCount = OpenMaya.MScriptUtil.getUint(infCountPtr)
-
-                        for i in range(vertexCount):
-                            #saveString = ' '.join(map(str,WeightArray[i*infCount : (i+1)*infCount]))
-                            saveString = ' '.join(['0' if x == 0 else str(
-                                x) for n, x in enumerate(WeightArray[i*infCount: (i+1)*infCount])])
-
-                            output.write(saveString + '\n')
-
-                        output.write('\n')
+            for skinWeights in bGetSkinWeights(node.fullPathName(),
+                                               positions):
+                yield skinWeights
 
         iterate.next()
 
+
+def bGetSkinWeights(objectName, positions=True):
+    u"""Gets the skin weights of the skinned shapes of a transform.
+
+    Args:
+        objectName (str): Name of the transform node.
+        positions (bool, optional): Also get the rest position of every
+            vertex, to transfer the weights if the vertex count changes.
+            Defaults to True.
+
+    Returns:
+        list[`rigTools.skinWeightFile.SkinWeights`]: The weights of every
+        skinned mesh, NURBS surface or curve under the transform, named after
+        the transform. Empty if none of them is skinned.
+    """
+
+    selection = OpenMaya.MSelectionList()
+    selection.add(objectName)
+    node = OpenMaya.MDagPath()
+    selection.getDagPath(0, node)
+
+    objects = []
+    objectName = OpenMaya.MFnDagNode(node).name()
+    newTransform = OpenMaya.MFnTransform(node)
+    for childIndex in range(newTransform.childCount()):
+        childObject = newTransform.child(childIndex)
+        if childObject.hasFn(OpenMaya.MFn.kMesh) or childObject.hasFn(OpenMaya.MFn.kNurbsSurface) or childObject.hasFn(OpenMaya.MFn.kCurve):
+            skinCluster = bFindSkinCluster(
+                OpenMaya.MFnDagNode(childObject).partialPathName())
+            if skinCluster is not False:
+                bSkinPath = OpenMaya.MDagPath()
+                fnSkinCluster = OpenMayaAnim.MFnSkinCluster(skinCluster)
+                fnSkinCluster.getPathAtIndex(0, bSkinPath)
+                influenceArray = OpenMaya.MDagPathArray()
+                fnSkinCluster.influenceObjects(influenceArray)
+                influentsCount = influenceArray.length()
+
+                influenceNames = []
+                for k in range(influentsCount):
+                    jointTokens = str(
+                        influenceArray[k].fullPathName()).split('|')
+                    jointTokens = jointTokens[len(jointTokens)-1].split(':')
+                    influenceNames.append(jointTokens[len(jointTokens)-1])
+
+                WeightArray = OpenMaya.MFloatArray()
+                scriptUtil = OpenMaya.MScriptUtil()
+                infCountPtr = scriptUtil.asUintPtr()
+                fnSkinCluster.getWeights(
+                    bSkinPath, _completeComponent(bSkinPath), WeightArray,
+                    infCountPtr)
+
+                restPositions = None
+                if positions:
+                    restPositions = _restPositions(bSkinPath, skinCluster)
+
+                # copy the weights out of Maya once
+                objects.append(skinWeightFile.SkinWeights(
+                    objectName, influenceNames,
+                    WeightArray[0:WeightArray.length()], restPositions))
+
+    return objects
+
+
+def bSaveSkinValues(inputFile, binary=None, valueSize=4, sparse=False,
+                    precision=skinWeightFile.DEFAULT_PRECISION, index=True,
+                    compression=None,
+                    level=skinWeightFile.DEFAULT_COMPRESSION_LEVEL,
+                    quantize=None, objects=None, pruneThreshold=0.0,
+                    maxInfluences=None, objectNames=None, positions=None):
+    u"""Saves the skin weights of the selected objects.
+
+    With ``objects`` or ``objectNames`` given, the selection is not used.
+
+    Args:
+        inputFile (str): Path of the weight file to write.
+        binary (bool, optional): Write the binary ``.swb`` layout instead of
+            the text ``.swt`` layout. Defaults to None, which picks the layout
+            from the extension of ``inputFile``.
+        valueSize (int, optional): Bytes per weight in the binary layout, 4
+            (float32) or 8 (float64). Defaults to 4.
+        sparse (bool, optional): Only store the non-zero weights of every
+            vertex (binary layout only). Defaults to False.
+        precision (int, optional): Significant digits per weight in the text
+            layout. Defaults to `rigTools.skinWeightFile.DEFAULT_PRECISION`.
+        index (bool, optional): Also write the index file with the offset and
+            checksum of every object. Not written for compressed files.
+            Defaults to True.
+        compression (str, optional): Save a compressed (``.swz``) file,
+            `rigTools.skinWeightFile.ZLIB` or `rigTools.skinWeightFile.LZMA`.
+            Defaults to None, which compresses with zlib if ``inputFile`` has
+            the ``.swz`` extension.
+        level (int, optional): Compression level, 0 to 9. Defaults to
+            `rigTools.skinWeightFile.DEFAULT_COMPRESSION_LEVEL`.
+        quantize (int, optional): Store the weights as 8 or 16 bit fixed point
+            instead of floats (binary layout only), see
+            `rigTools.skinWeightFile.quantizeWeights`. The error of every
+            object is printed. Defaults to None.
+        objects (list[`rigTools.skinWeightFile.SkinWeights`], optional):
+            Weights to save instead of the weights of the selected objects,
+            as returned by `bGetSkinWeights`. Defaults to None.
+        pruneThreshold (float, optional): Remove the weights below it before
+            saving, see `rigTools.skinWeightFile.pruneWeights`. Defaults to
+            0.0.
+        maxInfluences (int, optional): Keep only this many influences per
+            vertex. Defaults to None.
+        objectNames (list[str], optional): Names of the transforms to save
+            instead of the selected objects. Defaults to None.
+        positions (bool, optional): Also save the rest position of every
+            vertex, so the weights can be transferred to a mesh whose vertex
+            count changed. Defaults to None, meaning only in the binary
+            layout, so text files keep the layout the original bSkinSaver
+            reads.
+
+    Raises:
+        ValueError: If ``quantize`` is not 8 or 16, or is used with the text
+            layout.
+    """
+
+    timeBefore = time.time()
+
+    if binary is None:
+        binary = inputFile.lower().endswith(skinWeightFile.BINARY_EXTENSION)
+
+    if positions is None:
+        positions = binary
+
+    if quantize:
+        if quantize not in skinWeightFile.QUANTIZED_VALUE_SIZES:
+            raise ValueError("quantize must be 8 or 16, not {}".format(
+                quantize))
+        if not binary:
+            raise ValueError("quantized weights need the binary layout")
+        valueSize = skinWeightFile.QUANTIZED_VALUE_SIZES[quantize]
+
+    if compression is None and \
+            inputFile.lower().endswith(skinWeightFile.COMPRESSED_EXTENSION):
+        compression = skinWeightFile.ZLIB
+
+    if compression:
+        output = skinWeightFile.CompressedWriter(inputFile, compression, level)
+        index = False
+    elif binary:
+        output = open(inputFile, 'wb')
+    else:
+        output = open(inputFile, 'w', 1 << 20)
+
+    if binary:
+        output.write(skinWeightFile.BINARY_MAGIC)
+
+    if objects is None:
+        if objectNames is not None:
+            objects = (skinWeights for objectName in objectNames
+                       for skinWeights in bGetSkinWeights(objectName,
+                                                          positions))
+        else:
+            objects = _selectedSkinWeights(positions)
+
+    for skinWeights in objects:
+        if not positions and skinWeights.positions is not None:
+            skinWeights = skinWeightFile.SkinWeights(
+                skinWeights.name, skinWeights.influences, skinWeights.weights)
+
+        if pruneThreshold > 0 or maxInfluences is not None:
+            skinWeights, report = skinWeightFile.pruneSkinWeights(
+                skinWeights, pruneThreshold, maxInfluences)
+            print('{}: pruned {} weights, max weight change {:.3g}'.format(
+                skinWeights.name, report.removed, report.maxChange))
+
+        if binary:
+            error = skinWeightFile.writeSwbObject(
+                output, skinWeights, valueSize, sparse)
+            if error is not None:
+                print('{} quantized to {} bits, max error {:.3g}, mean error {:.3g}'.format(
+                    skinWeights.name, quantize, error.maxError,
+                    error.meanError))
+        else:
+            skinWeightFile.writeSwtObject(output, skinWeights, precision)
+
     output.close()
+
+    if index:
+        skinWeightFile.writeIndex(inputFile)
+    elif os.path.exists(skinWeightFile.indexPath(inputFile)):
+        os.remove(skinWeightFile.indexPath(inputFile))
+
     print('done saving weights, it took ',
           (time.time()-timeBefore), ' seconds.')
 
 
-def bSkinObject(objectName, fileJoints, weights):
+def bSkinObject(objectName, fileJoints, weights,
+                blockSize=skinWeightFile.DEFAULT_BLOCK_SIZE,
+                pruneThreshold=0.0, maxInfluences=None, rowCount=None):
+    u"""Skins an object and sets its weights.
+
+    The object is found by name; the selection is neither used nor changed.
+    If the object has no skinCluster, or its skinCluster misses some of the
+    influences, a new skinCluster is bound to the influences directly.
+    Objects whose vertex count differs from the number of weight rows are
+    skipped.
+
+    Args:
+        objectName (str): Name of the object to skin.
+        fileJoints (list[str]): Influence names, in the order of the weight
+            columns.
+        weights (sequence[float], `rigTools.skinWeightFile.SparseWeights` or iterable[`rigTools.skinWeightFile.WeightBlock`]):
+            Weights of all vertices in row major order, ``len(fileJoints)``
+            values per vertex, or the blocks of a
+            `rigTools.skinWeightFile.SkinWeightStream`.
+        blockSize (int, optional): Number of vertices whose weights are set at
+            once, with one ``setWeights`` call on that range of vertices. The
+            weights handed to Maya are held for one block only, so memory
+            grows with the block size rather than the vertex count. The
+            weights set do not depend on it. None sets all vertices at once.
+            Defaults to `rigTools.skinWeightFile.DEFAULT_BLOCK_SIZE`.
+        pruneThreshold (float, optional): Remove the weights below it before
+            setting them, see `rigTools.skinWeightFile.pruneWeights`. Defaults
+            to 0.0.
+        maxInfluences (int, optional): Keep only this many influences per
+            vertex, and create new skinClusters with it as their maximum
+            influences. Defaults to None, meaning all the influences of the
+            file, and a maximum of 10 for new skinClusters.
+        rowCount (int, optional): Number of weight rows when ``weights`` are
+            blocks. Defaults to None, meaning the rows of the blocks are
+            counted as their weights are set, and the object is reported as
+            skipped if they do not match the vertex count.
+
+    Returns:
+        bool: True if the weights were set, False if the object was skipped.
+    """
 
     if not cmds.objExists(objectName):
         print(objectName, " doesn't exist - skipping. ")
-        return
+        return False
 
-    it = OpenMaya.MItDependencyNodes(OpenMaya.MFn.kJoint)
+    # the weights of the vertices only hold for the vertex count they were
+    # saved with
+    #
+    vertexCount = OpenMaya.MItGeometry(_shapePath(objectName)).count()
+    if isinstance(weights, skinWeightFile.SparseWeights):
+        rowCount = weights.vertexCount
+    elif hasattr(weights, '__getitem__'):
+        valueCount = weights.size if hasattr(weights, 'size') else len(weights)
+        rowCount = valueCount // max(len(fileJoints), 1)
+    if rowCount is not None and rowCount != vertexCount:
+        print('{}: {} weight rows for {} vertices and no rest positions to '
+              'transfer them - skipping.'.format(objectName, rowCount,
+                                                 vertexCount))
+        return False
+
+    # let's check if there's already a skinCluster, the joints are looked for among its influences first
+    #
+    skinCluster = bFindSkinCluster(objectName)
+    skinClusterIndices = [None] * len(fileJoints)
+    if type(skinCluster) != type(True):
+        fnSkinCluster = OpenMayaAnim.MFnSkinCluster(skinCluster)
+        influentsArray = OpenMaya.MDagPathArray()
+        infCount = fnSkinCluster.influenceObjects(influentsArray)
+        skinClusterIndices = _matchInfluences(fileJoints, influentsArray)
 
-    # quick check if all the joints are in scene
+    # quick check if the other joints are in scene
     #
+    influenceIndex = getInfluenceIndex()
     allInfluencesInScene = True
-    sceneJointTokens = []
-
-    for jointIndex in range(len(fileJoints)):
-        jointHere = False
-        it = OpenMaya.MItDependencyNodes(OpenMaya.MFn.kJoint)
-        while not it.isDone():
-            sceneJointTokens = str(OpenMaya.MFnDagNode(
-                it.item()).fullPathName()).split('|')
-            if str(fileJoints[jointIndex]) == str(sceneJointTokens[len(sceneJointTokens) - 1]):
-                jointHere = True
-
-            it.next()
 
-        if not jointHere:
+    for joint, k in zip(fileJoints, skinClusterIndices):
+        if k is not None:
+            continue
+        if influenceIndex.isAmbiguous(joint):
             allInfluencesInScene = False
-            print('missing influence: ', fileJoints[jointIndex])
+            print('ambiguous influence: ', joint)
+        elif joint not in influenceIndex:
+            allInfluencesInScene = False
+            print('missing influence: ', joint)
 
     if not allInfluencesInScene:
         print(objectName, " can't be skinned because of missing influences.")
-        return
+        return False
 
     # create some arrays
     #
-    allJointsHere = False
+    allJointsHere = type(skinCluster) != type(True) and None not in skinClusterIndices
     totalJointsCount = len(fileJoints)
-    fileJointsMapArray = range(len(fileJoints))
+    fileJointsMapArray = list(range(len(fileJoints)))
     objectEmptyJoints = []
 
-    # let's check if there's already a skinCluster, let's try to use that - if it contains all the needed joints
+    # let's use the skinCluster if it contains all the needed joints
     #
-    skinCluster = bFindSkinCluster(objectName)
+    jointPaths = [influenceIndex.fullPathName(joint) for joint in fileJoints]
     if type(skinCluster) != type(True):
-        fnSkinCluster = OpenMayaAnim.MFnSkinCluster(skinCluster)
-        influentsArray = OpenMaya.MDagPathArray()
-        infCount = fnSkinCluster.influenceObjects(influentsArray)
-
-        influenceStringArray = []
-        for i in range(infCount):
-            influenceStringArray.append(
-                OpenMaya.MFnDagNode(influentsArray[i]).name())
-
-        allJointsHere = True
-        for joint in fileJoints:
-            if joint not in influenceStringArray:
-                print('missing a joint (', joint, ', ..)')
-                allJointsHere = False
-                break
-
         if not allJointsHere:
-            maya.mel.eval("DetachSkin " + objectName)
+            print('missing a joint (', fileJoints[skinClusterIndices.index(None)], ', ..)')
+            jointPaths = [str(influentsArray[k].fullPathName()) if k is not None
+                          else jointPath
+                          for k, jointPath in zip(skinClusterIndices, jointPaths)]
+            cmds.skinCluster(fnSkinCluster.name(), edit=True, unbind=True)
         else:
-            objectFoundJointsInFile = [False] * len(influenceStringArray)
+            objectFoundJointsInFile = [False] * infCount
 
             for i in range(len(fileJoints)):
-                for k in range(len(influenceStringArray)):
-                    if fileJoints[i] == influenceStringArray[k]:
-                        fileJointsMapArray[i] = k
-                        objectFoundJointsInFile[k] = True
+                k = skinClusterIndices[i]
+                fileJointsMapArray[i] = k
+                objectFoundJointsInFile[k] = True
 
-            for i in range(len(influenceStringArray)):
+            for i in range(infCount):
                 if not objectFoundJointsInFile[i]:
                     objectEmptyJoints.append(i)
             totalJointsCount = len(fileJointsMapArray) + len(objectEmptyJoints)
@@ -684,17 +1223,9 @@ def bSkinObject(objectName, fileJoints, weights):
             #print 'jointMapArray: ', fileJointsMapArray
 
     if not allJointsHere:
-        cmd = "select "
-        for i in range(len(fileJoints)):
-            cmd += " " + fileJoints[i]
-
-        cmd += " " + objectName
-        maya.mel.eval(cmd)
-
-        maya.mel.eval("skinCluster -tsb -mi 10")
-        maya.mel.eval("select `listRelatives -p " + objectName + "`")
-        maya.mel.eval("refresh")
-        #maya.mel.eval("undoInfo -st 1")
+        cmds.skinCluster(jointPaths + [objectName],
+                         toSelectedBones=True,
+                         maximumInfluences=maxInfluences or 10)
 
         skinCluster = bFindSkinCluster(objectName)
 
@@ -706,65 +1237,6 @@ def bSkinObject(objectName, fileJoints, weights):
     fnSkinCluster.getPathAtIndex(
         fnSkinCluster.indexForOutputConnection(0), bSkinPath)
 
-    weightStrings = []
-    vertexIter = OpenMaya.MItGeometry(bSkinPath)
-
-    weightDoubles = OpenMaya.MDoubleArray()
-
-    singleIndexed = True
-    vtxComponents = OpenMaya.MObject()
-    fnVtxComp = OpenMaya.MFnSingleIndexedComponent()
-    fnVtxCompDouble = OpenMaya.MFnDoubleIndexedComponent()
-
-    if bSkinPath.node().apiType() == OpenMaya.MFn.kMesh:
-        vtxComponents = fnVtxComp.create(OpenMaya.MFn.kMeshVertComponent)
-    elif bSkinPath.node().apiType() == OpenMaya.MFn.kNurbsSurface:
-        singleIndexed = False
-        vtxComponents = fnVtxCompDouble.create(
-            OpenMaya.MFn.kSurfaceCVComponent)
-    elif bSkinPath.node().apiType() == OpenMaya.MFn.kNurbsCurve:
-        vtxComponents = fnVtxComp.create(OpenMaya.MFn.kCurveCVComponent)
-
-    # nurbs curves..
-    #
-    counterValue = 0
-    if not singleIndexed:
-        currentU = 0
-        currentV = 0
-
-        cvsU = OpenMaya.MFnNurbsSurface(bSkinPath.node()).numCVsInU()
-        cvsV = OpenMaya.MFnNurbsSurface(bSkinPath.node()).numCVsInV()
-        formU = OpenMaya.MFnNurbsSurface(bSkinPath.node()).formInU()
-        formV = OpenMaya.MFnNurbsSurface(bSkinPath.node()).formInV()
-
-        if formU == 3:
-            cvsU -= 3
-        if formV == 3:
-            cvsV -= 3
-
-    # go through all vertices and append to the weightDoubles array
-    #
-    vertexIter = OpenMaya.MItGeometry(bSkinPath)
-    while not vertexIter.isDone():
-        weightStrings = []
-        if singleIndexed:
-            fnVtxComp.addElement(counterValue)
-        else:
-            fnVtxCompDouble.addElement(currentU, currentV)
-            currentV += 1
-            if currentV >= cvsV:
-                currentV = 0
-                currentU += 1
-
-        weightStrings = weights[counterValue].split(' ')
-        for i in range(len(weightStrings)):
-            weightDoubles.append(float(weightStrings[i]))
-        for i in range(len(objectEmptyJoints)):
-            weightDoubles.append(0)
-
-        counterValue += 1
-        vertexIter.next()
-
     # createing the influence Array
     #
     mayafileJointsMapArray = OpenMaya.MIntArray()
@@ -773,19 +1245,124 @@ def bSkinObject(objectName, fileJoints, weights):
     for i in range(len(objectEmptyJoints)):
         mayafileJointsMapArray.append(objectEmptyJoints[i])
 
-    # set the weights
+    # set the weights block by block, adding zero weights for the influences
+    # of the skinCluster that are not in the file
     #
-    fnSkinCluster.setWeights(bSkinPath, vtxComponents,
-                             mayafileJointsMapArray, weightDoubles, 0)
+    # the rows of a stream of unknown length are counted as they are read,
+    # the first block past the vertices ends it
+    #
+    streamedRows = None
+    if rowCount is None and not isinstance(
+            weights, skinWeightFile.SparseWeights) and \
+            not hasattr(weights, '__getitem__'):
+        streamedRows = [0]
+        weights = _countRows(weights, streamedRows)
+
+    prune = pruneThreshold > 0 or maxInfluences is not None
+    prunedCount = 0
+    maxChange = 0.0
+    rowWidth = len(fileJoints) + len(objectEmptyJoints)
+    for block in skinWeightFile.iterBlocks(
+            weights, len(fileJoints), rowWidth, vertexCount, blockSize):
+        values = block.values
+        if prune:
+            values, report = skinWeightFile.pruneWeights(
+                values, rowWidth, pruneThreshold, maxInfluences)
+            values = skinWeightFile.toFloatList(values)
+            prunedCount += report.removed
+            maxChange = max(maxChange, report.maxChange)
+
+        if block.rowCount == vertexCount:
+            vtxComponents = _completeComponent(bSkinPath)
+        else:
+            vtxComponents = _rangeComponent(
+                bSkinPath, block.start, block.start + block.rowCount)
+
+        fnSkinCluster.setWeights(bSkinPath, vtxComponents,
+                                 mayafileJointsMapArray,
+                                 _toMDoubleArray(values), 0)
+
+    if prune:
+        print('{}: pruned {} weights, max weight change {:.3g}'.format(
+            objectName, prunedCount, maxChange))
     #Maya.mel.eval("skinPercent -normalize true " + fnSkinCluster.name() + " " + objectName)
 
+    if streamedRows is not None and streamedRows[0] != vertexCount:
+        print('{}: {} weight rows for {} vertices, the weights were only set '
+              'on the first vertices.'.format(objectName, streamedRows[0],
+                                              vertexCount))
+        return False
+
+    return True
+
+
+def _countRows(blocks, rowCount):
+    u"""Counts the weight rows of blocks as they are read.
+
+    Args:
+        blocks (iterable[`rigTools.skinWeightFile.WeightBlock`]): Blocks of a
+            stream.
+        rowCount (list[int]): Holds the number of rows read so far.
 
-def bLoadSkinValues(loadOnSelection, inputFile):
+    Yields:
+        `rigTools.skinWeightFile.WeightBlock`: The blocks.
+    """
+
+    for block in blocks:
+        rowCount[0] = max(rowCount[0], block.start + block.rowCount)
+        yield block
+
+
+def _toMDoubleArray(values):
+    u"""Builds an MDoubleArray from a list of floats in a single call.
+
+    Args:
+        values (list[float]): Values to copy.
+
+    Returns:
+        OpenMaya.MDoubleArray: Array holding a copy of the values.
+    """
+
+    scriptUtil = OpenMaya.MScriptUtil()
+    scriptUtil.createFromList(values, len(values))
+    return OpenMaya.MDoubleArray(scriptUtil.asDoublePtr(), len(values))
+
+
+def bLoadSkinValues(loadOnSelection, inputFile,
+                    blockSize=skinWeightFile.DEFAULT_BLOCK_SIZE,
+                    objectNames=None, workers=0, pruneThreshold=0.0,
+                    maxInfluences=None, refresh=False):
+    u"""Loads skin weights from a text (``.swt``), binary (``.swb``) or
+    compressed (``.swz``) file.
+
+    The weights are read and applied ``blockSize`` vertices at a time, so the
+    memory used does not grow with the vertex count of the objects. If the
+    file has an index, the objects that are not loaded are not read at all.
+
+    Unless ``loadOnSelection`` or ``refresh`` is set, the selection is neither
+    read nor changed and the viewport is not redrawn, so batch builds can
+    load weights headless.
+
+    Args:
+        loadOnSelection (bool): Load the first object of the file onto the
+            selected polygon object instead of the objects named in the file.
+        inputFile (str): Path of the weight file.
+        blockSize (int, optional): Number of vertices read and applied at once.
+            Defaults to `rigTools.skinWeightFile.DEFAULT_BLOCK_SIZE`.
+        objectNames (list[str], optional): Only load the objects of these
+            names. Defaults to None, meaning all objects of the file.
+        workers (int, optional): Number of threads decompressing the chunks of
+            a compressed file. Defaults to 0.
+        pruneThreshold (float, optional): Remove the weights below it, see
+            `bSkinObject`. Defaults to 0.0.
+        maxInfluences (int, optional): Keep only this many influences per
+            vertex, see `bSkinObject`. Defaults to None.
+        refresh (bool, optional): Select and redraw every object as it is
+            loaded, to show the progress. Defaults to False.
+    """
 
     timeBefore = time.time()
 
-    joints = []
-    weights = []
     PolygonObject = ""
 
     if loadOnSelection == True:
@@ -806,74 +1383,490 @@ def bLoadSkinValues(loadOnSelection, inputFile):
         print("You need to select a polygon object")
         return
 
-    input = open(inputFile, 'r')
-
-    FilePosition = 0
-    while True:
-        line = input.readline()
-        if not line:
-            break
+    for skinWeights in skinWeightFile.iterWeightFile(inputFile, blockSize,
+                                                     objectNames, workers):
+        if not loadOnSelection:
+            PolygonObject = skinWeights.name
 
-        line = line.strip()
+        _skinFileObject(PolygonObject, skinWeights, blockSize,
+                        pruneThreshold, maxInfluences, refresh)
 
-        if FilePosition is not 0:
-            if not line.startswith("============"):
-                if FilePosition is 1:
-                    joints.append(line)
-                elif FilePosition is 2:
-                    if len(line) > 0:
-                        weights.append(line)
-                    else:
-                        bSkinObject(PolygonObject, joints, weights)
-                        PolygonObject = ""
-                        joints = []
-                        weights = []
-                        FilePosition = 0
-                        if loadOnSelection == True:
-                            break
-
-            else:  # it's ========
-                FilePosition = 2
-
-        else:  # FilePosition is 0
-            if not loadOnSelection:
-                PolygonObject = line
-            FilePosition = 1
-
-            if cmds.objExists(PolygonObject):
-                maya.mel.eval("select " + PolygonObject)
-                maya.mel.eval("refresh")
+        if loadOnSelection == True:
+            break
 
     print('done loading weights, it took ',
           (time.time()-timeBefore), ' seconds.')
 
 
+def _skinFileObject(objectName, skinWeights, blockSize, pruneThreshold=0.0,
+                    maxInfluences=None, refresh=False):
+    u"""Skins an object with the weights of one object of a weight file.
+
+    If the object has a different vertex count than the file and the file
+    has the rest positions of the vertices, the weights are transferred to
+    the object by closest point (see
+    `rigTools.skinWeightFile.transferWeights`).
+
+    Args:
+        objectName (str): Name of the object to skin.
+        skinWeights (`rigTools.skinWeightFile.SkinWeights` or `rigTools.skinWeightFile.SkinWeightStream`):
+            The weights to set.
+        blockSize (int): Number of vertices whose weights are set at once.
+        pruneThreshold (float, optional): See `bSkinObject`. Defaults to 0.0.
+        maxInfluences (int, optional): See `bSkinObject`. Defaults to None.
+        refresh (bool, optional): Select and redraw the object first.
+            Defaults to False.
+
+    Returns:
+        bool: True if the weights were set, False if the object was skipped.
+    """
+
+    # the rows of a stream that are not read are skipped by the file reader
+    if not cmds.objExists(objectName):
+        print(objectName, " doesn't exist - skipping. ")
+        return False
+
+    if refresh:
+        cmds.select(objectName)
+        cmds.refresh()
+
+    if getattr(skinWeights, "positions", None) is not None:
+        skinWeights = _transferToObject(objectName, skinWeights)
+
+    if isinstance(skinWeights, skinWeightFile.SkinWeightStream):
+        return bSkinObject(objectName, skinWeights.influences,
+                           skinWeights.blocks, pruneThreshold=pruneThreshold,
+                           maxInfluences=maxInfluences,
+                           rowCount=skinWeights.vertexCount)
+
+    return bSkinObject(objectName, skinWeights.influences, skinWeights.weights,
+                       blockSize, pruneThreshold, maxInfluences)
+
+
+def _transferToObject(objectName, skinWeights):
+    u"""Transfers weights to an object whose vertex count differs.
+
+    Args:
+        objectName (str): Name of the object to skin.
+        skinWeights (`rigTools.skinWeightFile.SkinWeights` or `rigTools.skinWeightFile.SkinWeightStream`):
+            Weights with rest positions. The rows of a stream are only read
+            if they have to be transferred.
+
+    Returns:
+        `rigTools.skinWeightFile.SkinWeights`: The weights of the vertices of
+        the object, or ``skinWeights`` itself if the vertex counts match.
+    """
+
+    shapePath = _shapePath(objectName)
+    skinCluster = bFindSkinCluster(str(shapePath.fullPathName()))
+    if skinCluster is False:
+        skinCluster = None
+    targetPositions = _restPositions(shapePath, skinCluster)
+    if len(targetPositions) == len(skinWeights.positions):
+        return skinWeights
+
+    if isinstance(skinWeights, skinWeightFile.SkinWeightStream):
+        skinWeights = skinWeightFile.collectStream(skinWeights)
+
+    timeBefore = time.time()
+    weights, report = skinWeightFile.transferWeights(
+        skinWeights.positions, skinWeights.weights,
+        skinWeights.influenceCount, targetPositions)
+    print('{}: vertex counts don\'t match ({} in the file, {} in the scene), '
+          'transferred the weights by closest point in {:.2f} seconds, '
+          '{} vertices matched exactly, max distance {:.3g}'.format(
+              objectName, len(skinWeights.positions) // 3,
+              len(targetPositions) // 3, time.time() - timeBefore,
+              report.exact, report.maxDistance))
+
+    return skinWeightFile.SkinWeights(skinWeights.name,
+                                      skinWeights.influences, weights)
+
+
+def _shapePath(objectName):
+    u"""Gets the shape of an object.
+
+    Args:
+        objectName (str): Name of the shape or of its transform.
+
+    Returns:
+        OpenMaya.MDagPath: DAG path of the first shape that is not an
+        intermediate object, or of the object itself if it has no shape.
+    """
+
+    shapes = cmds.listRelatives(objectName, shapes=True, noIntermediate=True,
+                                fullPath=True) or cmds.ls(objectName,
+                                                          long=True)
+    selection = OpenMaya.MSelectionList()
+    selection.add(shapes[0])
+    shapePath = OpenMaya.MDagPath()
+    selection.getDagPath(0, shapePath)
+
+    return shapePath
+
+
+def _restPositions(shapePath, skinCluster=None):
+    u"""Gets the positions of the vertices or CVs of a shape before skinning.
+
+    Args:
+        shapePath (OpenMaya.MDagPath): Mesh, NURBS curve or NURBS surface.
+        skinCluster (OpenMaya.MObject, optional): The skinCluster deforming
+            the shape, whose input shape holds the rest positions. Defaults
+            to None, meaning the shape is not skinned.
+
+    Returns:
+        list[float]: x, y and z of every vertex, in object space.
+    """
+
+    shape = shapePath.node()
+    if skinCluster is not None:
+        fnSkinCluster = OpenMayaAnim.MFnSkinCluster(skinCluster)
+        shape = fnSkinCluster.inputShapeAtIndex(
+            fnSkinCluster.indexForOutputShape(shape))
+
+    # a single query returns the vertices of a mesh as a flat list
+    #
+    if shape.hasFn(OpenMaya.MFn.kMesh) and shape.hasFn(OpenMaya.MFn.kDagNode):
+        return cmds.xform(OpenMaya.MFnDagNode(shape).fullPathName() +
+                          '.vtx[*]', query=True, translation=True,
+                          objectSpace=True)
+
+    points = OpenMaya.MPointArray()
+    OpenMaya.MItGeometry(shape).allPositions(points, OpenMaya.MSpace.kObject)
+
+    return [value for i in range(points.length())
+            for value in (points[i].x, points[i].y, points[i].z)]
+
+
+def bLoadSkinObjects(objects, blockSize=skinWeightFile.DEFAULT_BLOCK_SIZE,
+                     pruneThreshold=0.0, maxInfluences=None):
+    u"""Skins objects with weights that were already read from a file.
+
+    Args:
+        objects (list[`rigTools.skinWeightFile.SkinWeights`]): The objects of
+            a weight file, as returned by
+            `rigTools.skinWeightFile.readWeightFile`.
+        blockSize (int, optional): Number of vertices whose weights are set at
+            once. Defaults to `rigTools.skinWeightFile.DEFAULT_BLOCK_SIZE`.
+        pruneThreshold (float, optional): Remove the weights below it, see
+            `bSkinObject`. Defaults to 0.0.
+        maxInfluences (int, optional): Keep only this many influences per
+            vertex, see `bSkinObject`. Defaults to None.
+
+    Returns:
+        list[str]: Names of the objects that were skipped, see `bSkinObject`.
+    """
+
+    skipped = []
+    for skinWeights in objects:
+        if not _skinFileObject(skinWeights.name, skinWeights, blockSize,
+                               pruneThreshold, maxInfluences):
+            skipped.append(skinWeights.name)
+
+    return skipped
+
+
+def bLoadSharedSkinWeights(skinWeights, objectNames,
+                           blockSize=skinWeightFile.DEFAULT_BLOCK_SIZE,
+                           pruneThreshold=0.0, maxInfluences=None):
+    u"""Skins several objects with the same weights, decoded once.
+
+    Meant for meshes of the same topology (see `bTopologyFingerprint`), such
+    as the duplicated scales or teeth of a character.
+
+    Args:
+        skinWeights (`rigTools.skinWeightFile.SkinWeights`): The weights to
+            set, as read from a file.
+        objectNames (list[str]): Names of the objects to skin.
+        blockSize (int, optional): Number of vertices whose weights are set at
+            once. Defaults to `rigTools.skinWeightFile.DEFAULT_BLOCK_SIZE`.
+        pruneThreshold (float, optional): Remove the weights below it, see
+            `bSkinObject`. Defaults to 0.0.
+        maxInfluences (int, optional): Keep only this many influences per
+            vertex, see `bSkinObject`. Defaults to None.
+
+    Returns:
+        list[str]: Names of the objects that were skipped, see `bSkinObject`.
+    """
+
+    skipped = []
+    for objectName in objectNames:
+        if not _skinFileObject(objectName, skinWeights, blockSize,
+                               pruneThreshold, maxInfluences):
+            skipped.append(objectName)
+
+    return skipped
+
+
+def bTopologyFingerprint(objectName):
+    u"""Gets a fingerprint of the topology of a polygon object.
+
+    Args:
+        objectName (str): Name of the object.
+
+    Returns:
+        str: The fingerprint, see
+        `rigTools.skinWeightFile.topologyFingerprint`. None if the object
+        is not a polygon object.
+    """
+
+    shapes = cmds.listRelatives(objectName, shapes=True, noIntermediate=True,
+                                fullPath=True) or cmds.ls(objectName,
+                                                          long=True)
+    selection = OpenMaya.MSelectionList()
+    selection.add(shapes[0])
+    shapePath = OpenMaya.MDagPath()
+    selection.getDagPath(0, shapePath)
+    if not shapePath.hasFn(OpenMaya.MFn.kMesh):
+        return None
+
+    fnMesh = OpenMaya.MFnMesh(shapePath)
+    polygonCounts = OpenMaya.MIntArray()
+    polygonConnects = OpenMaya.MIntArray()
+    fnMesh.getVertices(polygonCounts, polygonConnects)
+
+    return skinWeightFile.topologyFingerprint(
+        fnMesh.numVertices(), polygonCounts[0:polygonCounts.length()],
+        polygonConnects[0:polygonConnects.length()])
+
+
+def _completeComponent(shapePath):
+    u"""Creates a component holding all the vertices or CVs of a shape.
+
+    Args:
+        shapePath (OpenMaya.MDagPath): Mesh, NURBS curve or NURBS surface.
+
+    Returns:
+        OpenMaya.MObject: The complete component.
+    """
+
+    if shapePath.node().apiType() == OpenMaya.MFn.kNurbsSurface:
+        fnComponent = OpenMaya.MFnDoubleIndexedComponent()
+        component = fnComponent.create(OpenMaya.MFn.kSurfaceCVComponent)
+        fnComponent.setCompleteData(*_surfaceCVCounts(shapePath))
+        return component
+
+    fnComponent = OpenMaya.MFnSingleIndexedComponent()
+    component = fnComponent.create(_singleIndexedType(shapePath))
+    fnComponent.setCompleteData(OpenMaya.MItGeometry(shapePath).count())
+    return component
+
+
+def _rangeComponent(shapePath, start, end):
+    u"""Creates a component holding a range of the vertices or CVs of a shape.
+
+    The indices are passed to Maya as arrays, in a single call.
+
+    Args:
+        shapePath (OpenMaya.MDagPath): Mesh, NURBS curve or NURBS surface.
+        start (int): Index of the first vertex or CV. Surface CVs are counted
+            in V first.
+        end (int): Index after the last vertex or CV.
+
+    Returns:
+        OpenMaya.MObject: The component.
+    """
+
+    if shapePath.node().apiType() == OpenMaya.MFn.kNurbsSurface:
+        uIndices, vIndices = _surfaceCVIndices(
+            start, end, _surfaceCVCounts(shapePath)[1])
+
+        fnComponent = OpenMaya.MFnDoubleIndexedComponent()
+        component = fnComponent.create(OpenMaya.MFn.kSurfaceCVComponent)
+        fnComponent.addElements(_toMIntArray(uIndices),
+                                _toMIntArray(vIndices))
+        return component
+
+    fnComponent = OpenMaya.MFnSingleIndexedComponent()
+    component = fnComponent.create(_singleIndexedType(shapePath))
+    fnComponent.addElements(_toMIntArray(list(range(start, end))))
+    return component
+
+
+def _singleIndexedType(shapePath):
+    u"""Gets the vertex or CV component type of a mesh or NURBS curve.
+
+    Args:
+        shapePath (OpenMaya.MDagPath): Mesh or NURBS curve.
+
+    Returns:
+        int: The ``OpenMaya.MFn`` component type.
+    """
+
+    if shapePath.node().apiType() == OpenMaya.MFn.kNurbsCurve:
+        return OpenMaya.MFn.kCurveCVComponent
+    return OpenMaya.MFn.kMeshVertComponent
+
+
+def _surfaceCVCounts(shapePath):
+    u"""Counts the distinct CVs of a NURBS surface in U and V.
+
+    Args:
+        shapePath (OpenMaya.MDagPath): NURBS surface.
+
+    Returns:
+        tuple: The CV counts in U and V, without the CVs a periodic surface
+        repeats.
+    """
+
+    fnSurface = OpenMaya.MFnNurbsSurface(shapePath.node())
+    cvsU = fnSurface.numCVsInU()
+    cvsV = fnSurface.numCVsInV()
+    if fnSurface.formInU() == 3:
+        cvsU -= 3
+    if fnSurface.formInV() == 3:
+        cvsV -= 3
+    return cvsU, cvsV
+
+
+def _surfaceCVIndices(start, end, cvsV):
+    u"""Gets the U and V indices of a range of surface CVs.
+
+    The indices are built one U row at a time.
+
+    Args:
+        start (int): Index of the first CV, counted in V first.
+        end (int): Index after the last CV.
+        cvsV (int): CV count in V.
+
+    Returns:
+        tuple: The U indices and the V indices, as lists of int.
+    """
+
+    uIndices = []
+    vIndices = []
+    for u in range(start // cvsV, (end + cvsV - 1) // cvsV):
+        first = max(start - u * cvsV, 0)
+        last = min(end - u * cvsV, cvsV)
+        uIndices.extend([u] * (last - first))
+        vIndices.extend(range(first, last))
+    return uIndices, vIndices
+
+
+def bRemoveUnusedInfluences(objectName):
+    u"""Removes the influences without weight on any vertex from a skinCluster.
+
+    The weights of all vertices are read at once and the unused influences
+    are found in one pass over them, then removed with a single
+    ``skinCluster`` edit. The skinCluster keeps at least one influence.
+
+    Args:
+        objectName (str): Name of the skinned object.
+
+    Returns:
+        tuple: The influence counts before and after, None if the object is
+        not skinned.
+    """
+
+    skinCluster = bFindSkinCluster(objectName)
+    if skinCluster is False:
+        return None
+
+    skinPath = OpenMaya.MDagPath(bSkinPath)
+    fnSkinCluster = OpenMayaAnim.MFnSkinCluster(skinCluster)
+    influenceArray = OpenMaya.MDagPathArray()
+    fnSkinCluster.influenceObjects(influenceArray)
+    influenceCount = influenceArray.length()
+
+    weightArray = OpenMaya.MDoubleArray()
+    scriptUtil = OpenMaya.MScriptUtil()
+    infCountPtr = scriptUtil.asUintPtr()
+    fnSkinCluster.getWeights(skinPath, _completeComponent(skinPath),
+                             weightArray, infCountPtr)
+
+    used = skinWeightFile.usedInfluences(
+        weightArray[0:weightArray.length()], influenceCount)
+    unused = [influenceArray[i].fullPathName()
+              for i in range(influenceCount) if not used[i]]
+    if len(unused) == influenceCount:
+        unused = unused[1:]
+
+    if unused:
+        cmds.skinCluster(fnSkinCluster.name(), edit=True,
+                         removeInfluence=unused)
+
+    print('{}: {} influences, {} after removing the unused ones'.format(
+        objectName, influenceCount, influenceCount - len(unused)))
+
+    return influenceCount, influenceCount - len(unused)
+
+
 def getSoftSelection():
-    # Grab the soft selection
+    u"""Gets the soft selected vertices of the first selected mesh.
+
+    The vertex indices are copied out of the rich selection in a single call.
+
+    Returns:
+        tuple: The vertex indices, as a list of int, and their soft selection
+        weights, as a list of float.
+    """
 
     selection = OpenMaya.MSelectionList()
     softSelection = OpenMaya.MRichSelection()
     OpenMaya.MGlobal.getRichSelection(softSelection)
     softSelection.getSelection(selection)
 
+    return _selectedVertices(selection, soft=True)
+
+
+def getSelectedVertices():
+    u"""Gets the selected vertices of the first selected mesh.
+
+    Returns:
+        list[int]: The vertex indices.
+    """
+
+    selection = OpenMaya.MSelectionList()
+    OpenMaya.MGlobal.getActiveSelectionList(selection)
+
+    return _selectedVertices(selection)[0]
+
+
+def _selectedVertices(selection, soft=False):
+    u"""Reads the vertex component of the first mesh of a selection.
+
+    Vertex weight files hold the vertices of one mesh, so the vertices of the
+    other meshes are left out with a warning.
+
+    Args:
+        selection (OpenMaya.MSelectionList): The selection.
+        soft (bool, optional): Read the soft selection weights too. Defaults
+            to False.
+
+    Returns:
+        tuple: The vertex indices and their soft selection weights, 1.0 for
+        every vertex unless ``soft`` is set.
+    """
+
     dagPath = OpenMaya.MDagPath()
     component = OpenMaya.MObject()
 
-    iter = OpenMaya.MItSelectionList(
+    iterate = OpenMaya.MItSelectionList(
         selection, OpenMaya.MFn.kMeshVertComponent)
-    elements, weights = [], []
-    while not iter.isDone():
-        iter.getDagPath(dagPath, component)
-        dagPath.pop()  # Grab the parent of the shape node
-        node = dagPath.fullPathName()
-        fnComp = OpenMaya.MFnSingleIndexedComponent(component)
-
-        def getWeight(i): return fnComp.weight(
-            i).influence() if fnComp.hasWeights() else 1.0
-
-        for i in range(fnComp.elementCount()):
-            elements.append('%s.vtx[%i]' % (node, fnComp.element(i)))
-            weights.append(getWeight(i))
-        iter.next()
-
-    return elements, weights
+    if iterate.isDone():
+        return [], []
+    iterate.getDagPath(dagPath, component)
+
+    otherMeshes = set()
+    otherPath = OpenMaya.MDagPath()
+    iterate.next()
+    while not iterate.isDone():
+        iterate.getDagPath(otherPath)
+        if otherPath.fullPathName() != dagPath.fullPathName():
+            otherMeshes.add(str(otherPath.partialPathName()))
+        iterate.next()
+    if otherMeshes:
+        print('only the vertices of {} are used, not the ones of {}'.format(
+            dagPath.partialPathName(), ', '.join(sorted(otherMeshes))))
+
+    fnComp = OpenMaya.MFnSingleIndexedComponent(component)
+    elements = OpenMaya.MIntArray()
+    fnComp.getElements(elements)
+    vertIds = elements[0:elements.length()]
+
+    if soft and fnComp.hasWeights():
+        weights = [fnComp.weight(i).influence() for i in range(len(vertIds))]
+    else:
+        weights = [1.0] * len(vertIds)
+
+    return vertIds, weights
@@ -0,0 +1,250 @@
+# -*- coding: utf-8 -*-
+u"""In-session cache of decoded skin weight files.
+
+Rebuilding a rig many times in one Maya session reads the same weight files
+over and over. `SkinWeightCache` keeps the objects decoded from text
+(``.swt``) and compressed (``.swz``) files in memory, keyed by the path,
+modification time and size of the file, so a file that did not change is
+neither read nor parsed again. The least recently used files are dropped once
+the decoded weights exceed the memory cap.
+
+Binary (``.swb``) files are memory-mapped and need no parsing, so they are
+read through without being cached; keeping their mapping open would also
+stop the file from being saved over on Windows.
+
+A file is only worth caching if its decoded weights fit under the memory cap.
+`SkinWeightCache.fits` tells, without decoding the file, so callers can load
+the files that do not fit block by block instead.
+
+`sessionCache` is the cache shared by the whole process. Like
+`rigTools.skinWeightFile`, this module does not import Maya.
+"""
+
+import array
+import collections
+import os
+import threading
+
+from . import skinWeightFile
+
+
+DEFAULT_MAX_BYTES = 512 << 20
+u"""int: Default memory cap of the decoded weights, in bytes."""
+
+CacheStats = collections.namedtuple(
+    "CacheStats", "hits misses evictions entries size maxBytes")
+u"""Statistics of a `SkinWeightCache`: the number of reads served from and
+missed by the cache (binary files read through count as misses), the number
+of files evicted, the number of files cached, the estimated size of their
+decoded weights and the memory cap, in bytes."""
+
+_CacheEntry = collections.namedtuple("_CacheEntry", "stamp objects size")
+
+_FLOAT_SIZE = 8
+
+_TEXT_EXPANSION = 4
+
+
+class SkinWeightCache(object):
+
+    def __init__(self, maxBytes=DEFAULT_MAX_BYTES):
+        u"""Least recently used cache of decoded weight files.
+
+        Files whose decoded weights are larger than ``maxBytes`` on their own
+        are read but not cached. The cache is safe to use from several
+        threads.
+
+        The objects returned are shared by every read of the same file and
+        must not be modified. NumPy weights are made read-only.
+
+        Args:
+            maxBytes (int, optional): Memory cap of the decoded weights, in
+                bytes. Defaults to `DEFAULT_MAX_BYTES`.
+        """
+
+        self._maxBytes = maxBytes
+        self._entries = collections.OrderedDict()
+        self._size = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._lock = threading.Lock()
+
+    @property
+    def maxBytes(self):
+        u"""int: Memory cap of the decoded weights, in bytes. Lowering it
+        evicts files right away."""
+
+        return self._maxBytes
+
+    @maxBytes.setter
+    def maxBytes(self, value):
+        with self._lock:
+            self._maxBytes = value
+            self._evict()
+
+    def fits(self, filePath):
+        u"""Checks, without decoding it, whether a file is cached or small
+        enough to be.
+
+        The decoded size is taken from the index of the file if it has one.
+        Otherwise a text file is assumed to decode to at most four times its
+        size, the size of ``"0 "`` decoded to a double. Compressed files
+        without an index are assumed not to fit. Binary files always fit, as
+        they are read through without being decoded.
+
+        Args:
+            filePath (str): Path of the ``.swt``, ``.swb`` or ``.swz`` file.
+
+        Returns:
+            bool: True if `read` would serve or keep the file.
+        """
+
+        with self._lock:
+            entry = self._entries.get(_key(filePath))
+            if entry is not None and entry.stamp == _stamp(filePath):
+                return True
+
+        if skinWeightFile.isBinaryFile(filePath):
+            return True
+
+        index = skinWeightFile.readIndex(filePath)
+        if index is not None:
+            size = sum(entry["vertexCount"] *
+                       (len(entry["influences"]) + 3) * _FLOAT_SIZE
+                       for entry in index["objects"])
+        elif skinWeightFile.isCompressedFile(filePath):
+            return False
+        else:
+            size = os.path.getsize(filePath) * _TEXT_EXPANSION
+
+        return size <= self._maxBytes
+
+    def read(self, filePath):
+        u"""Reads all objects of a weight file, from the cache if it holds the
+        file as it is on disk.
+
+        Args:
+            filePath (str): Path of the ``.swt``, ``.swb`` or ``.swz`` file.
+
+        Returns:
+            list[`rigTools.skinWeightFile.SkinWeights`]: The objects in file
+            order.
+        """
+
+        key = _key(filePath)
+        stamp = _stamp(filePath)
+
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None and entry.stamp == stamp:
+                self._entries[key] = entry
+                self._hits += 1
+                return entry.objects
+            if entry is not None:
+                self._size -= entry.size
+
+        with self._lock:
+            self._misses += 1
+
+        if skinWeightFile.isBinaryFile(filePath):
+            return skinWeightFile.readWeightFile(filePath)
+
+        objects = skinWeightFile.readWeightFile(filePath)
+        for skinWeights in objects:
+            _freeze(skinWeights)
+        size = sum(_objectSize(skinWeights) for skinWeights in objects)
+
+        with self._lock:
+            if size <= self._maxBytes:
+                previous = self._entries.pop(key, None)
+                if previous is not None:
+                    self._size -= previous.size
+                self._entries[key] = _CacheEntry(stamp, objects, size)
+                self._size += size
+                self._evict()
+
+        return objects
+
+    def _evict(self):
+        while self._size > self._maxBytes and self._entries:
+            entry = self._entries.popitem(last=False)[1]
+            self._size -= entry.size
+            self._evictions += 1
+
+    def invalidate(self, filePath=None):
+        u"""Drops a file, or every file, from the cache.
+
+        Args:
+            filePath (str, optional): Path of the file to drop. Defaults to
+                None, meaning every file.
+        """
+
+        with self._lock:
+            if filePath is None:
+                self._entries.clear()
+                self._size = 0
+                return
+
+            entry = self._entries.pop(_key(filePath), None)
+            if entry is not None:
+                self._size -= entry.size
+
+    def stats(self):
+        u"""Gets the statistics of the cache.
+
+        Returns:
+            `CacheStats`: The statistics since the cache was created or
+            `resetStats` was last called.
+        """
+
+        with self._lock:
+            return CacheStats(self._hits, self._misses, self._evictions,
+                              len(self._entries), self._size, self._maxBytes)
+
+    def resetStats(self):
+        u"""Sets the hit, miss and eviction counts back to zero."""
+
+        with self._lock:
+            self._hits = 0
+            self._misses = 0
+            self._evictions = 0
+
+
+def _key(filePath):
+    return os.path.normcase(os.path.abspath(filePath))
+
+
+def _stamp(filePath):
+    fileStat = os.stat(filePath)
+    return fileStat.st_mtime, fileStat.st_size
+
+
+def _freeze(skinWeights):
+    for values in (skinWeights.weights, skinWeights.positions):
+        if hasattr(values, "flags"):
+            values.flags.writeable = False
+
+
+def _arraySize(values):
+    if values is None:
+        return 0
+    if hasattr(values, "nbytes"):
+        return values.nbytes
+    if isinstance(values, array.array):
+        return len(values) * values.itemsize
+    return len(values) * _FLOAT_SIZE
+
+
+def _objectSize(skinWeights):
+    weights = skinWeights.weights
+    if isinstance(weights, skinWeightFile.SparseWeights):
+        size = (_arraySize(weights.rowOffsets) + _arraySize(weights.indices) +
+                _arraySize(weights.values))
+    else:
+        size = _arraySize(weights)
+    return size + _arraySize(skinWeights.positions)
+
+
+sessionCache = SkinWeightCache()
+u"""`SkinWeightCache`: The cache shared by the whole Maya session."""
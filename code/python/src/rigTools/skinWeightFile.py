@@ -0,0 +1,2279 @@
+# -*- coding: utf-8 -*-
+u"""Skin weight files.
+
+Reading, writing and converting the skin weight files used by
+`rigTools.bSkinSaver`. Nothing in this module imports Maya, so weight files can
+be inspected and converted with any Python interpreter.
+
+Two layouts are supported:
+
+* ``.swt`` - the text layout written by ``bSaveSkinValues``. Every object is
+  stored as its name, one influence name per line, a ``============``
+  separator, one line of space separated weights per vertex and an empty
+  line. The rest positions are optional: a ``------------`` line after the
+  influence names, followed by one ``x y z`` line per vertex, comes before
+  the ``============`` separator. ``bSaveSkinValues`` only writes them on
+  request, since the original bSkinSaver does not read them.
+* ``.swb`` - a binary layout holding the same information. The weights are
+  stored as little-endian float arrays, so they can be memory-mapped and
+  handed to Maya without parsing any text.
+
+Binary layout (all integers are little-endian)::
+
+    file header     4 bytes  magic "SWB1"
+    per object      uint64   payload size in bytes
+                    uint32   vertex count
+                    uint32   influence count
+                    uint16   encoding (0 = dense, 1 = sparse), plus 0x100
+                             if the rest positions are stored
+                    uint16   value size in bytes (4 = float32, 8 = float64,
+                             1 = 8 bit and 2 = 16 bit fixed point)
+                    uint16   name length + utf-8 object name
+                    uint16   name length + utf-8 influence name (per influence)
+                    zero padding up to the next 8 byte boundary
+                    payload
+
+Objects follow each other until the end of the file. With the positions flag
+the payload starts with the rest position of every vertex, vertex count x 3
+float32 values (x, y, z), zero padded to 8 bytes; the weights follow.
+
+Fixed point values are unsigned integers, the weight times 255 (8 bit) or
+65535 (16 bit). Every vertex is renormalized while quantizing, so the integers
+of a vertex always add up to exactly 255 or 65535 (see `quantizeWeights`).
+
+The dense payload holds vertex count x influence count values, row major. The
+sparse payload only keeps the non-zero weights, in compressed sparse row
+(CSR) form::
+
+    uint32   row offsets (vertex count + 1), zero padded to 8 bytes
+    uint32   influence index of every non-zero weight, zero padded to 8 bytes
+    values   every non-zero weight, row by row
+
+Either layout can be saved compressed (``.swz``). The file content is split
+into chunks that are compressed independently with zlib or lzma, so they can
+be decompressed as a stream or in parallel::
+
+    file header     4 bytes  magic "SWZ1"
+                    uint16   compression (0 = zlib, 1 = lzma)
+                    uint16   compression level
+                    uint32   uncompressed chunk size
+    per chunk       uint32   compressed size
+                    uint32   uncompressed size
+                    compressed data
+
+Text and binary weight files can have an index next to them
+(``<file>.idx``, JSON). It records the byte offset and length, influence names,
+vertex count and CRC-32 checksum of every object, so a single object can be
+read or verified without parsing the ones in front of it.
+"""
+
+import array
+import collections
+import hashlib
+import itertools
+import json
+import mmap
+import multiprocessing.pool
+import os
+import re
+import struct
+import sys
+import zlib
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+try:
+    import lzma
+except ImportError:
+    lzma = None
+
+from . import spatialIndex
+
+
+TEXT_EXTENSION = ".swt"
+u"""str: Extension of the text weight files."""
+
+BINARY_EXTENSION = ".swb"
+u"""str: Extension of the binary weight files."""
+
+SEPARATOR = "============"
+u"""str: Line separating the influence names from the weights in ``.swt`` files."""
+
+POSITIONS_SEPARATOR = "------------"
+u"""str: Line starting the rest positions after the influence names in
+``.swt`` files."""
+
+DEFAULT_BLOCK_SIZE = 4096
+u"""int: Number of vertices read and applied at once when streaming weights."""
+
+DEFAULT_PRECISION = 12
+u"""int: Significant digits of the weights in ``.swt`` files. 12 digits keep the
+values Python 2's ``str`` wrote."""
+
+INDEX_EXTENSION = ".idx"
+u"""str: Extension appended to a weight file's name for its index file."""
+
+INDEX_VERSION = 1
+u"""int: Version of the index file layout."""
+
+MANIFEST_VERSION = 1
+u"""int: Version of the manifest layout."""
+
+BINARY_MAGIC = b"SWB1"
+u"""bytes: First bytes of the binary weight files."""
+
+COMPRESSED_EXTENSION = ".swz"
+u"""str: Extension of the compressed weight files."""
+
+COMPRESSED_MAGIC = b"SWZ1"
+u"""bytes: First bytes of the compressed weight files."""
+
+ZLIB = "zlib"
+u"""str: Compression with ``zlib``, available everywhere."""
+
+LZMA = "lzma"
+u"""str: Compression with ``lzma``, smaller but slower. Needs the ``lzma``
+module, part of Python 3."""
+
+DEFAULT_COMPRESSION_LEVEL = 6
+u"""int: Compression level of compressed weight files, 0 (fastest) to 9
+(smallest)."""
+
+DEFAULT_CHUNK_SIZE = 1 << 20
+u"""int: Uncompressed bytes per chunk of compressed weight files."""
+
+DENSE = 0
+u"""int: Encoding of binary objects storing every weight of every vertex."""
+
+SPARSE = 1
+u"""int: Encoding of binary objects storing the non-zero weights only."""
+
+POSITIONS = 0x100
+u"""int: Encoding flag of binary objects that store rest positions."""
+
+QUANTIZED_VALUE_SIZES = {8: 1, 16: 2}
+u"""dict: Value size in bytes of the binary layout per fixed point bit depth."""
+
+DEFAULT_TRANSFER_NEIGHBOURS = 4
+u"""int: Number of source vertices blended by `transferWeights`."""
+
+DEFAULT_MIRROR_TOLERANCE = 0.001
+u"""float: Largest distance between a vertex and the mirror of its match in
+`mirrorWeights`."""
+
+_OBJECT_HEADER = struct.Struct("<QIIHH")
+_NAME_LENGTH = struct.Struct("<H")
+_ALIGNMENT = 8
+_CHECKSUM_CHUNK = 1 << 20
+
+_NEGATIVE_ZERO = re.compile(r"(?<![^ \n])-0(?![^ \n])")
+
+_ARRAY_TYPECODES = {1: "B", 2: "H", 4: "f", 8: "d"}
+_VALUE_DTYPES = {1: "<u1", 2: "<u2", 4: "<f4", 8: "<f8"}
+_FIXED_POINT_SCALES = {1: 255, 2: 65535}
+_INDEX_SIZE = 4
+
+_CODECS = [ZLIB, LZMA]
+_CONTAINER_HEADER = struct.Struct("<HHI")
+_CHUNK_HEADER = struct.Struct("<II")
+
+
+class SkinWeights(object):
+
+    def __init__(self, name, influences, weights, positions=None):
+        u"""Skin weights of one object.
+
+        Args:
+            name (str): Name of the skinned object.
+            influences (list[str]): Influence names, in the order of the weight
+                columns.
+            weights (sequence[float] or `SparseWeights`): Weights of all
+                vertices in row major order (``vertexCount`` x
+                ``len(influences)`` values). Either an ``array.array``, a
+                ``numpy.ndarray``, a plain list or `SparseWeights`.
+            positions (sequence[float], optional): Rest position of every
+                vertex, x, y and z one after the other. Used to transfer the
+                weights to a mesh with a different vertex count (see
+                `transferWeights`). Defaults to None.
+        """
+
+        self.name = name
+        self.influences = list(influences)
+        self.weights = weights
+        self.positions = positions
+
+    @property
+    def influenceCount(self):
+        u"""int: Number of influences (weight columns)."""
+
+        return len(self.influences)
+
+    @property
+    def vertexCount(self):
+        u"""int: Number of vertices (weight rows)."""
+
+        if not self.influences:
+            return 0
+
+        return len(self.weights) // len(self.influences)
+
+
+QuantizationError = collections.namedtuple("QuantizationError",
+                                           "maxError meanError")
+u"""Error of quantized weights: the largest and the mean per-vertex error. The
+error of a vertex is the largest absolute difference between one of its
+weights and the quantized weight."""
+
+PruneReport = collections.namedtuple("PruneReport", "removed maxChange")
+u"""Result of `pruneWeights`: the number of non-zero weights removed and the
+largest change of a weight of any vertex, renormalization included."""
+
+TransferReport = collections.namedtuple("TransferReport",
+                                        "exact maxDistance")
+u"""Result of `transferWeights`: the number of target vertices found at the
+position of a source vertex and the largest distance from a target vertex to
+its nearest source vertex."""
+
+MirrorReport = collections.namedtuple("MirrorReport", "mirrored unmatched")
+u"""Result of `mirrorWeights`: the number of vertices given mirrored weights
+and the indices of the vertices without a match on the other side."""
+
+WeightBlock = collections.namedtuple("WeightBlock", "start rowCount values")
+u"""Consecutive weight rows: the first vertex index, the number of rows and
+their weights in row major order."""
+
+
+class SkinWeightStream(object):
+
+    def __init__(self, name, influences, blocks, positions=None,
+                 vertexCount=None):
+        u"""One object of a weight file, whose weights are read block by block.
+
+        Args:
+            name (str): Name of the skinned object.
+            influences (list[str]): Influence names, in the order of the weight
+                columns.
+            blocks (iterator[`WeightBlock`]): The weight rows of the object.
+            positions (sequence[float], optional): Rest position of every
+                vertex, x, y and z one after the other. Defaults to None.
+            vertexCount (int, optional): Number of weight rows, if known
+                before the blocks are read. Defaults to None, which takes it
+                from ``positions`` if given.
+        """
+
+        self.name = name
+        self.influences = influences
+        self.blocks = blocks
+        self.positions = positions
+        if vertexCount is None and positions is not None:
+            vertexCount = len(positions) // 3
+        self.vertexCount = vertexCount
+
+    @property
+    def influenceCount(self):
+        u"""int: Number of influences (weight columns)."""
+
+        return len(self.influences)
+
+
+class SparseWeights(object):
+
+    def __init__(self, influenceCount, rowOffsets, indices, values):
+        u"""Weights of an object in compressed sparse row (CSR) form.
+
+        Only the non-zero weights are kept. The weights of vertex ``i`` are
+        ``values[rowOffsets[i]:rowOffsets[i + 1]]`` and belong to the influences
+        ``indices[rowOffsets[i]:rowOffsets[i + 1]]``.
+
+        Args:
+            influenceCount (int): Number of influences (columns).
+            rowOffsets (sequence[int]): ``vertexCount + 1`` offsets into
+                ``indices`` and ``values``.
+            indices (sequence[int]): Influence index of every non-zero weight.
+            values (sequence[float]): Every non-zero weight, row by row.
+        """
+
+        self.influenceCount = influenceCount
+        self.rowOffsets = rowOffsets
+        self.indices = indices
+        self.values = values
+
+    def __len__(self):
+        return self.vertexCount * self.influenceCount
+
+    @property
+    def vertexCount(self):
+        u"""int: Number of vertices (rows)."""
+
+        return len(self.rowOffsets) - 1
+
+    @classmethod
+    def fromDense(cls, weights, influenceCount):
+        u"""Builds sparse weights from dense, row major weights.
+
+        Args:
+            weights (sequence[float]): ``vertexCount`` x ``influenceCount``
+                weights in row major order.
+            influenceCount (int): Number of influences (columns).
+
+        Returns:
+            `SparseWeights`: The non-zero weights.
+        """
+
+        if numpy is not None:
+            dense = numpy.asarray(weights).reshape(-1, influenceCount)
+            rows, indices = numpy.nonzero(dense)
+            rowOffsets = numpy.zeros(dense.shape[0] + 1, dtype=numpy.uint32)
+            numpy.cumsum(numpy.bincount(rows, minlength=dense.shape[0]),
+                         out=rowOffsets[1:])
+            return cls(influenceCount, rowOffsets,
+                       indices.astype(numpy.uint32), dense[rows, indices])
+
+        rowOffsets = [0]
+        indices = []
+        values = []
+        for start in range(0, len(weights), influenceCount):
+            for k in range(influenceCount):
+                if weights[start + k] != 0:
+                    indices.append(k)
+                    values.append(weights[start + k])
+            rowOffsets.append(len(values))
+
+        return cls(influenceCount, rowOffsets, indices, values)
+
+    def toDense(self, rowWidth=None, start=0, stop=None):
+        u"""Expands the weights into a dense, row major list.
+
+        Args:
+            rowWidth (int, optional): Values per row of the result. Columns
+                past ``influenceCount`` are filled with zeros. Defaults to
+                None, meaning ``influenceCount``.
+            start (int, optional): First row to expand. Defaults to 0.
+            stop (int, optional): Row to stop before. Defaults to None,
+                meaning ``vertexCount``.
+
+        Returns:
+            list[float]: (``stop`` - ``start``) x ``rowWidth`` weights.
+        """
+
+        if rowWidth is None:
+            rowWidth = self.influenceCount
+        if stop is None:
+            stop = self.vertexCount
+
+        rowCount = stop - start
+        first = int(self.rowOffsets[start])
+        last = int(self.rowOffsets[stop])
+
+        if numpy is not None:
+            rowOffsets = numpy.asarray(self.rowOffsets[start:stop + 1],
+                                       dtype=numpy.int64)
+            rows = numpy.repeat(numpy.arange(rowCount), numpy.diff(rowOffsets))
+            dense = numpy.zeros((rowCount, rowWidth))
+            dense[rows, numpy.asarray(self.indices[first:last],
+                                      dtype=numpy.int64)] = \
+                self.values[first:last]
+            return dense.ravel().tolist()
+
+        dense = [0.0] * (rowCount * rowWidth)
+        indices = self.indices
+        values = self.values
+        for i in range(rowCount):
+            rowStart = i * rowWidth
+            for n in range(self.rowOffsets[start + i],
+                           self.rowOffsets[start + i + 1]):
+                dense[rowStart + indices[n]] = float(values[n])
+
+        return dense
+
+
+def expandWeights(weights, influenceCount, rowWidth=None, rowCount=None):
+    u"""Expands dense or sparse weights into a dense list of floats.
+
+    This is what is handed to ``MFnSkinCluster.setWeights``.
+
+    Args:
+        weights (sequence[float] or `SparseWeights`): Row major weights.
+        influenceCount (int): Number of weight columns of ``weights``.
+        rowWidth (int, optional): Values per row of the result. Columns past
+            ``influenceCount`` are filled with zeros. Defaults to None, meaning
+            ``influenceCount``.
+        rowCount (int, optional): Number of rows to expand. Defaults to None,
+            meaning all rows.
+
+    Returns:
+        list[float]: ``rowCount`` x ``rowWidth`` weights.
+    """
+
+    if rowWidth is None:
+        rowWidth = influenceCount
+
+    if isinstance(weights, SparseWeights):
+        dense = weights.toDense(rowWidth)
+        if rowCount is not None:
+            dense = dense[:rowCount * rowWidth]
+        return dense
+
+    weights = _flatten(weights)
+    if rowCount is None:
+        rowCount = len(weights) // influenceCount if influenceCount else 0
+
+    if numpy is not None and rowCount and influenceCount:
+        values = numpy.asarray(weights[0:rowCount * influenceCount],
+                               dtype=numpy.float64)
+        dense = numpy.zeros((rowCount, rowWidth))
+        dense[:, :influenceCount] = values.reshape(rowCount, influenceCount)
+        return dense.ravel().tolist()
+
+    values = toFloatList(weights[0:rowCount * influenceCount])
+    if rowWidth == influenceCount:
+        return values
+
+    padding = [0.0] * (rowWidth - influenceCount)
+    dense = []
+    for i in range(rowCount):
+        dense.extend(values[i * influenceCount: (i + 1) * influenceCount])
+        dense.extend(padding)
+
+    return dense
+
+
+def iterBlocks(weights, influenceCount, rowWidth=None, rowCount=None,
+               blockSize=None):
+    u"""Splits weights into blocks of rows, ready to be handed to Maya.
+
+    Args:
+        weights (sequence[float], `SparseWeights` or iterable[`WeightBlock`]):
+            Row major weights, or the blocks of a `SkinWeightStream`.
+        influenceCount (int): Number of weight columns of ``weights``.
+        rowWidth (int, optional): Values per row of the blocks. Columns past
+            ``influenceCount`` are filled with zeros. Defaults to None, meaning
+            ``influenceCount``.
+        rowCount (int, optional): Number of rows to use. Rows past it are
+            dropped. Defaults to None, meaning all rows.
+        blockSize (int, optional): Rows per block. Blocks of a stream longer
+            than it are split. Defaults to None, meaning a single block, or
+            the blocks of the stream as they come.
+
+    Yields:
+        `WeightBlock`: Blocks whose values are lists of Python floats.
+    """
+
+    sparse = isinstance(weights, SparseWeights)
+
+    if not sparse and not hasattr(weights, "__getitem__"):
+        for block in weights:
+            blockRows = block.rowCount
+            if rowCount is not None:
+                blockRows = min(blockRows, rowCount - block.start)
+            if blockRows <= 0:
+                break
+            step = blockSize or blockRows
+            for offset in range(0, blockRows, step):
+                rows = min(step, blockRows - offset)
+                values = block.values
+                if offset or rows < blockRows:
+                    values = _flatten(values)[
+                        offset * influenceCount:
+                        (offset + rows) * influenceCount]
+                yield WeightBlock(block.start + offset, rows, expandWeights(
+                    values, influenceCount, rowWidth, rows))
+        return
+
+    if sparse:
+        totalRows = weights.vertexCount
+    else:
+        weights = _flatten(weights)
+        totalRows = len(weights) // influenceCount if influenceCount else 0
+    if rowCount is not None:
+        totalRows = min(totalRows, rowCount)
+    if not blockSize:
+        blockSize = max(totalRows, 1)
+
+    for start in range(0, totalRows, blockSize):
+        stop = min(start + blockSize, totalRows)
+        if sparse:
+            values = weights.toDense(rowWidth, start, stop)
+        else:
+            values = expandWeights(
+                weights[start * influenceCount: stop * influenceCount],
+                influenceCount, rowWidth)
+        yield WeightBlock(start, stop - start, values)
+
+
+def isBinaryFile(filePath):
+    u"""Checks if the given file is a binary (``.swb``) weight file.
+
+    The check is done on the file contents, not on its extension.
+
+    Args:
+        filePath (str): Path of the weight file.
+
+    Returns:
+        bool: True if the file starts with the binary magic.
+    """
+
+    with open(filePath, "rb") as f:
+        return f.read(len(BINARY_MAGIC)) == BINARY_MAGIC
+
+
+def _flatten(values):
+    if numpy is not None and isinstance(values, numpy.ndarray):
+        return values.reshape(-1)
+    return values
+
+
+def toFloatList(values):
+    u"""Converts a weight sequence into a list of Python floats.
+
+    Maya's API only accepts Python floats, not NumPy scalars.
+
+    Args:
+        values (sequence[float]): ``array.array``, ``numpy.ndarray`` (of any
+            shape, read in row major order) or list.
+
+    Returns:
+        list[float]: The values as Python floats.
+    """
+
+    values = _flatten(values)
+    if hasattr(values, "tolist"):
+        return values.tolist()
+
+    return [float(v) for v in values]
+
+
+def decodeWeightRows(rows, influenceCount):
+    u"""Decodes the weight lines of a ``.swt`` file in one bulk operation.
+
+    With NumPy available the rows are joined and converted by
+    ``numpy.fromstring`` into a 2-D array without a Python loop. Without it,
+    the rows are split once and converted into a flat ``array.array``. Both
+    give the same values.
+
+    Args:
+        rows (list[str]): One line of space separated weights per vertex.
+        influenceCount (int): Number of weights per line.
+
+    Returns:
+        numpy.ndarray or array.array: ``len(rows)`` x ``influenceCount``
+        float64 array with NumPy, otherwise the same values in a flat
+        ``array.array``.
+
+    Raises:
+        ValueError: If the lines do not hold ``influenceCount`` numbers each.
+    """
+
+    text = " ".join(rows)
+    expected = len(rows) * influenceCount
+
+    if numpy is not None:
+        values = numpy.fromstring(text, dtype=numpy.float64, sep=" ")
+    else:
+        values = array.array("d", map(float, text.split()))
+
+    if len(values) != expected:
+        raise ValueError("expected %d weights in %d rows, found %d" %
+                         (expected, len(rows), len(values)))
+
+    if numpy is not None:
+        return values.reshape(len(rows), influenceCount)
+
+    return values
+
+
+def usedInfluences(weights, influenceCount):
+    u"""Finds the influences that have a weight on any vertex.
+
+    With NumPy this is a single any-non-zero reduction over the columns;
+    without it every column is checked with one strided slice.
+
+    Args:
+        weights (sequence[float]): Row major weights.
+        influenceCount (int): Number of weights per row.
+
+    Returns:
+        list[bool]: True for every column holding a non-zero weight.
+    """
+
+    weights = _flatten(weights)
+
+    if numpy is not None:
+        dense = numpy.asarray(weights).reshape(-1, influenceCount)
+        return (dense != 0).any(axis=0).tolist()
+
+    return [any(weights[k::influenceCount]) for k in range(influenceCount)]
+
+
+def selectColumns(weights, influenceCount, columns):
+    u"""Keeps some weight columns of every row.
+
+    Args:
+        weights (sequence[float]): Row major weights.
+        influenceCount (int): Number of weights per row.
+        columns (list[int]): Indices of the columns to keep, in output order.
+
+    Returns:
+        sequence[float]: Row major weights with ``len(columns)`` values per
+        row; a NumPy array when NumPy is available, a list otherwise.
+    """
+
+    weights = _flatten(weights)
+
+    if numpy is not None:
+        dense = numpy.asarray(weights).reshape(-1, influenceCount)
+        return dense[:, columns].ravel()
+
+    return list(itertools.chain.from_iterable(
+        zip(*[weights[k::influenceCount] for k in columns])))
+
+
+def quantizeWeights(weights, influenceCount, bits=8):
+    u"""Quantizes weights to fixed point.
+
+    Every vertex is first normalized, then its weights are scaled to integers
+    (0 to 255 for 8 bit, 0 to 65535 for 16 bit) and rounded with the largest
+    remainder method: all weights are rounded down and the units still
+    missing go to the weights with the largest remainders. The integers of a
+    vertex therefore add up to exactly the scale, so the dequantized weights
+    still sum to 1, and no weight is off by more than one step. Vertices
+    without weights stay at zero.
+
+    Args:
+        weights (sequence[float]): ``vertexCount`` x ``influenceCount``
+            weights in row major order.
+        influenceCount (int): Number of influences (columns).
+        bits (int, optional): 8 or 16. Defaults to 8.
+
+    Returns:
+        tuple: The quantized weights, in the same order, and their
+        `QuantizationError` against ``weights``.
+
+    Raises:
+        ValueError: If ``bits`` is not 8 or 16.
+    """
+
+    if bits not in QUANTIZED_VALUE_SIZES:
+        raise ValueError("bits must be 8 or 16, not %r" % (bits,))
+
+    valueSize = QUANTIZED_VALUE_SIZES[bits]
+    scale = _FIXED_POINT_SCALES[valueSize]
+
+    if not influenceCount or not len(weights):
+        return array.array(_ARRAY_TYPECODES[valueSize]), \
+            QuantizationError(0.0, 0.0)
+
+    if numpy is not None:
+        dense = numpy.asarray(weights, dtype=numpy.float64).reshape(
+            -1, influenceCount)
+        positive = numpy.maximum(dense, 0.0)
+        sums = positive.sum(axis=1)
+        weighted = sums > 0
+
+        scaled = numpy.zeros_like(dense)
+        scaled[weighted] = positive[weighted] * \
+            (scale / sums[weighted])[:, None]
+        quantized = numpy.floor(scaled)
+        missing = numpy.where(weighted, scale - quantized.sum(axis=1), 0)
+
+        # one unit to each of the largest remainders
+        order = numpy.argsort(quantized - scaled, axis=1, kind="mergesort")
+        ranks = numpy.empty_like(order)
+        ranks[numpy.arange(len(order))[:, None], order] = \
+            numpy.arange(influenceCount)
+        quantized += ranks < missing[:, None]
+
+        errors = numpy.abs(quantized / scale - dense).max(axis=1)
+        return quantized.astype(_VALUE_DTYPES[valueSize]).ravel(), \
+            QuantizationError(float(errors.max()), float(errors.mean()))
+
+    quantized = array.array(_ARRAY_TYPECODES[valueSize])
+    maxError = 0.0
+    errorSum = 0.0
+    for start in range(0, len(weights), influenceCount):
+        row = [float(value) for value in
+               weights[start:start + influenceCount]]
+        positive = [max(value, 0.0) for value in row]
+        total = sum(positive)
+
+        values = [0] * influenceCount
+        if total > 0:
+            factor = scale / total
+            scaled = [value * factor for value in positive]
+            values = [int(value) for value in scaled]
+            missing = scale - sum(values)
+            for k in sorted(range(influenceCount),
+                            key=lambda k: values[k] - scaled[k])[:missing]:
+                values[k] += 1
+        quantized.extend(values)
+
+        error = max([abs(value / float(scale) - weight)
+                     for value, weight in zip(values, row)])
+        maxError = max(maxError, error)
+        errorSum += error
+
+    return quantized, QuantizationError(
+        maxError, errorSum / (len(weights) // influenceCount))
+
+
+def pruneWeights(weights, influenceCount, threshold=0.0, maxInfluences=None,
+                 normalize=True):
+    u"""Removes small weights, caps the influences per vertex and renormalizes.
+
+    Weights below ``threshold`` are set to zero, then only the
+    ``maxInfluences`` largest weights of every vertex are kept, and the
+    remaining weights of every vertex are scaled to sum to 1. The largest
+    weight of a vertex is always kept, so no vertex loses all its weights.
+    With NumPy, all vertices are processed at once.
+
+    Args:
+        weights (sequence[float]): ``vertexCount`` x ``influenceCount``
+            weights in row major order.
+        influenceCount (int): Number of influences (columns).
+        threshold (float, optional): Weights below it are removed. Defaults
+            to 0.0.
+        maxInfluences (int, optional): Number of influences kept per vertex.
+            Defaults to None, meaning no limit.
+        normalize (bool, optional): Scale the weights of every vertex to sum
+            to 1. Defaults to True.
+
+    Returns:
+        tuple: The pruned weights, in the same order, and the `PruneReport`.
+    """
+
+    if isinstance(weights, SparseWeights):
+        weights = weights.toDense()
+
+    if not influenceCount or not len(weights):
+        return weights, PruneReport(0, 0.0)
+
+    if numpy is not None:
+        dense = numpy.asarray(weights, dtype=numpy.float64).reshape(
+            -1, influenceCount)
+        pruned = dense.copy()
+        rows = numpy.arange(len(dense))[:, None]
+
+        # order of the weights of every vertex, largest first
+        order = numpy.argsort(-dense, axis=1, kind="mergesort")
+
+        removed = pruned < threshold
+        removed[rows[:, 0], order[:, 0]] = False
+        pruned[removed] = 0.0
+        if maxInfluences is not None and maxInfluences < influenceCount:
+            pruned[rows, order[:, max(maxInfluences, 1):]] = 0.0
+
+        if normalize:
+            sums = pruned.sum(axis=1)
+            weighted = sums > 0
+            pruned[weighted] /= sums[weighted, None]
+
+        report = PruneReport(
+            int(numpy.count_nonzero(dense) - numpy.count_nonzero(pruned)),
+            float(numpy.abs(pruned - dense).max()))
+        return pruned.ravel(), report
+
+    pruned = array.array("d")
+    removedCount = 0
+    maxChange = 0.0
+    for start in range(0, len(weights), influenceCount):
+        row = [float(value) for value in
+               weights[start:start + influenceCount]]
+        order = sorted(range(influenceCount), key=lambda k: -row[k])
+
+        kept = [value if value >= threshold else 0.0 for value in row]
+        kept[order[0]] = row[order[0]]
+        if maxInfluences is not None:
+            for k in order[max(maxInfluences, 1):]:
+                kept[k] = 0.0
+
+        if normalize:
+            total = sum(kept)
+            if total > 0:
+                kept = [value / total for value in kept]
+
+        removedCount += sum([1 for value, keptValue in zip(row, kept)
+                             if value != 0 and keptValue == 0])
+        maxChange = max([maxChange] + [abs(keptValue - value) for
+                                       value, keptValue in zip(row, kept)])
+        pruned.extend(kept)
+
+    return pruned, PruneReport(removedCount, maxChange)
+
+
+def pruneSkinWeights(skinWeights, threshold=0.0, maxInfluences=None):
+    u"""Prunes the weights of an object, see `pruneWeights`.
+
+    Args:
+        skinWeights (`SkinWeights`): Object to prune.
+        threshold (float, optional): Weights below it are removed. Defaults
+            to 0.0.
+        maxInfluences (int, optional): Number of influences kept per vertex.
+            Defaults to None, meaning no limit.
+
+    Returns:
+        tuple: The object with the pruned weights and its rest positions, and
+        the `PruneReport`.
+    """
+
+    weights, report = pruneWeights(skinWeights.weights,
+                                   skinWeights.influenceCount, threshold,
+                                   maxInfluences)
+    return SkinWeights(skinWeights.name, skinWeights.influences, weights,
+                       skinWeights.positions), report
+
+
+def transferWeights(sourcePositions, weights, influenceCount, targetPositions,
+                    neighbours=DEFAULT_TRANSFER_NEIGHBOURS,
+                    blockSize=DEFAULT_BLOCK_SIZE):
+    u"""Transfers weights to other vertices by closest point.
+
+    The ``neighbours`` nearest source vertices of every target vertex are
+    found with a `rigTools.spatialIndex.SpatialGrid`, and their weights are
+    blended by inverse squared distance. A target vertex at the position of a
+    source vertex gets the weights of that vertex unchanged. With NumPy, the
+    target vertices are processed ``blockSize`` at a time.
+
+    Args:
+        sourcePositions (sequence[float]): x, y and z of every source vertex.
+        weights (sequence[float] or `SparseWeights`): Weights of the source
+            vertices in row major order.
+        influenceCount (int): Number of influences (columns).
+        targetPositions (sequence[float]): x, y and z of every target vertex.
+        neighbours (int, optional): Number of source vertices blended per
+            target vertex. Defaults to `DEFAULT_TRANSFER_NEIGHBOURS`.
+        blockSize (int, optional): Number of target vertices blended at once.
+            Defaults to `DEFAULT_BLOCK_SIZE`.
+
+    Returns:
+        tuple: The weights of the target vertices in row major order and the
+        `TransferReport`.
+    """
+
+    if isinstance(weights, SparseWeights):
+        weights = weights.toDense()
+
+    targetCount = len(targetPositions) // 3
+    if not len(sourcePositions) or not influenceCount:
+        return [0.0] * (targetCount * influenceCount), \
+            TransferReport(0, float("inf") if targetCount else 0.0)
+
+    grid = spatialIndex.SpatialGrid(sourcePositions)
+    indices, distances = grid.nearest(targetPositions, neighbours)
+
+    if numpy is not None:
+        source = numpy.asarray(weights, dtype=numpy.float64).reshape(
+            -1, influenceCount)
+        found = indices >= 0
+        exact = distances[:, 0] == 0
+
+        # inverse squared distance, the exact matches only keep their match
+        blend = numpy.zeros(distances.shape)
+        blend[found] = 1.0 / numpy.maximum(distances[found], 1e-12) ** 2
+        blend[exact] = 0.0
+        blend[exact, 0] = 1.0
+        blend /= blend.sum(axis=1)[:, None]
+
+        transferred = numpy.empty((targetCount, influenceCount))
+        for start in range(0, targetCount, max(blockSize, 1)):
+            end = min(start + blockSize, targetCount)
+            transferred[start:end] = numpy.einsum(
+                "ij,ijk->ik", blend[start:end],
+                source[numpy.maximum(indices[start:end], 0)])
+
+        report = TransferReport(int(exact.sum()),
+                                float(distances[:, 0].max()))
+        return transferred.ravel(), report
+
+    transferred = array.array("d")
+    exactCount = 0
+    maxDistance = 0.0
+    for rowIndices, rowDistances in zip(indices, distances):
+        maxDistance = max(maxDistance, rowDistances[0])
+        if rowDistances[0] == 0:
+            exactCount += 1
+            blend = [(rowIndices[0], 1.0)]
+        else:
+            blend = [(i, 1.0 / distance ** 2) for i, distance in
+                     zip(rowIndices, rowDistances) if i >= 0]
+        total = sum([factor for i, factor in blend])
+
+        row = [0.0] * influenceCount
+        for i, factor in blend:
+            start = i * influenceCount
+            for k in range(influenceCount):
+                row[k] += weights[start + k] * factor / total
+        transferred.extend(row)
+
+    return transferred, TransferReport(exactCount, maxDistance)
+
+
+def matchVertices(sourcePositions, targetPositions):
+    u"""Finds the closest target vertex of every source vertex.
+
+    Every target vertex is matched at most once, by the source vertex closest
+    to it, so weights moved to the matched vertices never overwrite each
+    other.
+
+    Args:
+        sourcePositions (sequence[float]): x, y and z of every source vertex.
+        targetPositions (sequence[float]): x, y and z of every target vertex.
+
+    Returns:
+        tuple: The index of the target vertex matched by every source vertex,
+        -1 if its closest target vertex went to a closer source vertex, and
+        the `TransferReport` of the matched vertices.
+    """
+
+    sourceCount = len(sourcePositions) // 3
+    matched = [-1] * sourceCount
+    if not sourceCount or not len(targetPositions):
+        return matched, TransferReport(0, 0.0)
+
+    grid = spatialIndex.SpatialGrid(targetPositions)
+    indices, distances = grid.nearest(sourcePositions)
+
+    owners = set()
+    exactCount = 0
+    maxDistance = 0.0
+    for i in sorted(range(sourceCount), key=lambda i: distances[i][0]):
+        target = int(indices[i][0])
+        if target < 0 or target in owners:
+            continue
+        owners.add(target)
+        matched[i] = target
+
+        distance = float(distances[i][0])
+        if distance == 0:
+            exactCount += 1
+        maxDistance = max(maxDistance, distance)
+
+    return matched, TransferReport(exactCount, maxDistance)
+
+
+def mirrorWeights(positions, weights, influences, mirrorName, axis=0,
+                  positive=True, tolerance=DEFAULT_MIRROR_TOLERANCE):
+    u"""Mirrors weights from one side of a symmetric object to the other.
+
+    Every vertex on the destination side is matched with the vertex at its
+    mirrored position on the source side, found with a
+    `rigTools.spatialIndex.SpatialGrid`, and gets the weights of that vertex
+    with every influence swapped for its mirrored influence. The vertices on
+    the source side and on the symmetry plane keep their weights, as do the
+    vertices without a match within ``tolerance``. With NumPy, all vertices
+    are mirrored at once.
+
+    Args:
+        positions (sequence[float]): x, y and z of every vertex.
+        weights (sequence[float] or `SparseWeights`): Weights in row major
+            order.
+        influences (list[str]): Influence names, in the order of the weight
+            columns.
+        mirrorName (callable): Gets the name of the mirrored influence of an
+            influence name, like `rigLib.utils.name.mirrorName`.
+        axis (int, optional): Axis normal to the symmetry plane, 0 for x, 1
+            for y and 2 for z. Defaults to 0.
+        positive (bool, optional): Mirror the positive side onto the negative
+            side, else the other way around. Defaults to True.
+        tolerance (float, optional): Largest distance to the mirrored
+            position of a match, and half the width of the symmetry plane.
+            Defaults to `DEFAULT_MIRROR_TOLERANCE`.
+
+    Returns:
+        tuple: The mirrored weights in row major order, the influence names
+        of their columns and the `MirrorReport`. The influences are
+        ``influences`` followed by the mirrored influences missing from it.
+    """
+
+    if isinstance(weights, SparseWeights):
+        weights = weights.toDense()
+
+    infCount = len(influences)
+    mirroredInfluences = list(influences)
+    for influence in influences:
+        if mirrorName(influence) not in mirroredInfluences:
+            mirroredInfluences.append(mirrorName(influence))
+    columns = [mirroredInfluences.index(mirrorName(influence))
+               for influence in influences]
+    columnCount = len(mirroredInfluences)
+
+    side = 1.0 if positive else -1.0
+
+    if numpy is not None:
+        points = numpy.asarray(positions, dtype=numpy.float64).reshape(-1, 3)
+        dense = numpy.asarray(weights, dtype=numpy.float64).reshape(
+            -1, infCount)
+        mirrored = numpy.zeros((len(points), columnCount))
+        mirrored[:, :infCount] = dense
+
+        coordinates = points[:, axis] * side
+        targets = numpy.nonzero(coordinates < -tolerance)[0]
+        sources = numpy.nonzero(coordinates >= -tolerance)[0]
+        if not len(targets) or not len(sources):
+            return mirrored.ravel(), mirroredInfluences, \
+                MirrorReport(0, targets.tolist())
+
+        reflected = points[targets]
+        reflected[:, axis] *= -1
+        grid = spatialIndex.SpatialGrid(points[sources])
+        indices = grid.nearest(reflected, 1, tolerance)[0][:, 0]
+
+        found = indices >= 0
+        rows = targets[found]
+        mirrored[rows] = 0.0
+        mirrored[rows[:, None], numpy.array(columns)[None, :]] = \
+            dense[sources[indices[found]]]
+
+        return mirrored.ravel(), mirroredInfluences, \
+            MirrorReport(len(rows), targets[~found].tolist())
+
+    points = [positions[i:i + 3] for i in range(0, len(positions), 3)]
+    targets = [i for i, point in enumerate(points)
+               if point[axis] * side < -tolerance]
+    sources = [i for i, point in enumerate(points)
+               if point[axis] * side >= -tolerance]
+
+    matches = {}
+    if targets and sources:
+        reflected = []
+        for i in targets:
+            point = list(points[i])
+            point[axis] = -point[axis]
+            reflected.extend(point)
+        grid = spatialIndex.SpatialGrid(
+            [value for i in sources for value in points[i]])
+        indices = grid.nearest(reflected, 1, tolerance)[0]
+        matches = dict([(i, sources[row[0]]) for i, row in
+                        zip(targets, indices) if row[0] >= 0])
+
+    mirrored = array.array("d")
+    for i in range(len(points)):
+        if i in matches:
+            start = matches[i] * infCount
+            row = [0.0] * columnCount
+            for k, column in enumerate(columns):
+                row[column] = weights[start + k]
+        else:
+            start = i * infCount
+            row = list(weights[start:start + infCount]) + \
+                [0.0] * (columnCount - infCount)
+        mirrored.extend(row)
+
+    return mirrored, mirroredInfluences, MirrorReport(
+        len(matches), [i for i in targets if i not in matches])
+
+
+def formatWeightRows(values, influenceCount, precision=DEFAULT_PRECISION,
+                     rowPrefixes=None):
+    u"""Formats weight rows as ``.swt`` lines in one bulk operation.
+
+    All rows are formatted by a single ``%`` operation on a format string built
+    for the whole block, instead of calling ``str`` on every weight. With the
+    default precision the values are the ones Python 2's ``str`` wrote;
+    zero weights are written as ``0``.
+
+    Args:
+        values (sequence[float]): Row major weights.
+        influenceCount (int): Number of weights per row.
+        precision (int, optional): Significant digits per weight. Defaults to
+            `DEFAULT_PRECISION`.
+        rowPrefixes (list[str], optional): Text written in front of the
+            weights of every row, like the vertex ids of vertex weight files.
+            Defaults to None.
+
+    Returns:
+        str: One line per row, each ending with a line break.
+    """
+
+    values = _flatten(values)
+    if hasattr(values, "tolist"):
+        values = values.tolist()
+
+    if influenceCount:
+        rowCount = len(values) // influenceCount
+    else:
+        rowCount = len(rowPrefixes or [])
+    if not rowCount:
+        return ""
+
+    rowFormat = " ".join(["%%.%dg" % precision] * influenceCount)
+    text = "\n".join([rowFormat] * rowCount) % tuple(values)
+
+    # negative zeros
+    if "-0" in text:
+        text = _NEGATIVE_ZERO.sub("0", text)
+
+    if rowPrefixes is not None:
+        text = "\n".join([prefix + row for prefix, row in
+                          zip(rowPrefixes, text.split("\n"))])
+
+    return text + "\n"
+
+
+def _strippedLines(f):
+    if str is bytes:
+        return (line.strip() for line in f)
+    return (line.decode("utf-8").strip() for line in f)
+
+
+def iterSwt(filePath, blockSize=DEFAULT_BLOCK_SIZE, offset=0):
+    u"""Reads a text weight file one object at a time.
+
+    Only one block of weight rows is held in memory at once. The blocks of an
+    object must be used before moving on to the next object; rows that were
+    not used are skipped without being parsed.
+
+    Args:
+        filePath (str): Path of the ``.swt`` file.
+        blockSize (int, optional): Number of weight rows per block. Defaults to
+            `DEFAULT_BLOCK_SIZE`.
+        offset (int, optional): Byte offset of the first object to read, as
+            recorded in the file's index. Defaults to 0.
+
+    Yields:
+        `SkinWeightStream`: The objects in file order.
+    """
+
+    with open(filePath, "rb") as f:
+        f.seek(offset)
+        for stream in _iterSwtObjects(_strippedLines(f), blockSize):
+            yield stream
+
+
+def _iterSwtObjects(lines, blockSize):
+    for line in lines:
+        if not line:
+            continue
+
+        name = line
+        influences = []
+        positionRows = None
+        for line in lines:
+            if line.startswith(SEPARATOR):
+                break
+            if line.startswith(POSITIONS_SEPARATOR):
+                positionRows = []
+            elif positionRows is not None:
+                positionRows.append(line)
+            else:
+                influences.append(line)
+
+        positions = None
+        if positionRows is not None:
+            positions = _flatten(decodeWeightRows(positionRows, 3))
+
+        state = {"finished": False}
+
+        def readBlocks():
+            start = 0
+            rows = []
+            for row in lines:
+                if not row:
+                    break
+                rows.append(row)
+                if len(rows) == blockSize:
+                    yield WeightBlock(start, len(rows), decodeWeightRows(
+                        rows, len(influences)))
+                    start += len(rows)
+                    rows = []
+
+            state["finished"] = True
+            if rows:
+                yield WeightBlock(start, len(rows), decodeWeightRows(
+                    rows, len(influences)))
+
+        blocks = readBlocks()
+        yield SkinWeightStream(name, influences, blocks, positions)
+
+        # skip the rows that were not used
+        blocks.close()
+        if not state["finished"]:
+            for line in lines:
+                if not line:
+                    break
+
+
+def readSwt(filePath):
+    u"""Reads all objects of a text weight file.
+
+    Args:
+        filePath (str): Path of the ``.swt`` file.
+
+    Returns:
+        list[`SkinWeights`]: The objects in file order.
+    """
+
+    return _collectStreams(iterSwt(filePath))
+
+
+def _collectStreams(streams):
+    return [collectStream(stream) for stream in streams]
+
+
+def collectStream(stream):
+    u"""Reads all the weight rows of a stream.
+
+    Args:
+        stream (`SkinWeightStream`): Object whose blocks were not used yet.
+
+    Returns:
+        `SkinWeights`: The object with all its weights.
+    """
+
+    blocks = [_flatten(block.values) for block in stream.blocks]
+    if numpy is not None:
+        weights = numpy.concatenate(blocks) if blocks else numpy.zeros(0)
+    else:
+        weights = array.array("d")
+        for values in blocks:
+            weights.extend(values)
+
+    return SkinWeights(stream.name, stream.influences, weights,
+                       stream.positions)
+
+
+def writeSwtObject(output, skinWeights, precision=DEFAULT_PRECISION):
+    u"""Writes one object to an open text weight file.
+
+    The weights are formatted and written in blocks of `DEFAULT_BLOCK_SIZE`
+    rows. The rest positions are written too if the object has them.
+
+    Args:
+        output (file): File opened for text writing.
+        skinWeights (`SkinWeights`): Object to write.
+        precision (int, optional): Significant digits per weight. Defaults to
+            `DEFAULT_PRECISION`.
+    """
+
+    output.write(skinWeights.name + "\n")
+    for influence in skinWeights.influences:
+        output.write(influence + "\n")
+    if skinWeights.positions is not None:
+        output.write(POSITIONS_SEPARATOR + "\n")
+        for block in iterBlocks(skinWeights.positions, 3,
+                                blockSize=DEFAULT_BLOCK_SIZE):
+            output.write(formatWeightRows(block.values, 3, precision))
+    output.write(SEPARATOR + "\n")
+
+    infCount = skinWeights.influenceCount
+    for block in iterBlocks(skinWeights.weights, infCount,
+                            blockSize=DEFAULT_BLOCK_SIZE):
+        output.write(formatWeightRows(block.values, infCount, precision))
+
+    output.write("\n")
+
+
+def writeSwt(filePath, objects, precision=DEFAULT_PRECISION):
+    u"""Writes objects to a text weight file.
+
+    Args:
+        filePath (str): Path of the ``.swt`` file.
+        objects (list[`SkinWeights`]): Objects to write.
+        precision (int, optional): Significant digits per weight. Defaults to
+            `DEFAULT_PRECISION`.
+    """
+
+    with open(filePath, "w") as output:
+        for skinWeights in objects:
+            writeSwtObject(output, skinWeights, precision)
+
+
+def _encodeName(name):
+    if not isinstance(name, bytes):
+        name = name.encode("utf-8")
+    return _NAME_LENGTH.pack(len(name)) + name
+
+
+def _decodeName(buf, offset):
+    length, = _NAME_LENGTH.unpack_from(buf, offset)
+    offset += _NAME_LENGTH.size
+    name = buf[offset:offset + length]
+    if not isinstance(name, str):
+        name = name.decode("utf-8")
+    return name, offset + length
+
+
+def _padding(offset):
+    return (-offset) % _ALIGNMENT
+
+
+def _arrayToBytes(values):
+    if hasattr(values, "tobytes"):
+        return values.tobytes()
+    return values.tostring()
+
+
+def _arrayFromBytes(values, data):
+    if hasattr(values, "frombytes"):
+        values.frombytes(data)
+    else:
+        values.fromstring(data)
+
+
+def packValues(values, valueSize):
+    u"""Packs values into little-endian bytes, as stored in ``.swb`` files.
+
+    Args:
+        values (sequence[float]): Values to pack. Fixed point values must
+            already be quantized (see `quantizeWeights`).
+        valueSize (int): 4 for float32, 8 for float64, 1 or 2 for 8 or 16
+            bit fixed point.
+
+    Returns:
+        bytes: The packed values.
+    """
+
+    if numpy is not None:
+        return _arrayToBytes(numpy.ascontiguousarray(
+            values, dtype=_VALUE_DTYPES[valueSize]))
+
+    packed = array.array(_ARRAY_TYPECODES[valueSize], values)
+    if sys.byteorder == "big":
+        packed.byteswap()
+    return _arrayToBytes(packed)
+
+
+def _packIndices(values):
+    if numpy is not None:
+        return _arrayToBytes(numpy.ascontiguousarray(values, dtype="<u4"))
+
+    packed = array.array("I", values)
+    if sys.byteorder == "big":
+        packed.byteswap()
+    return _arrayToBytes(packed)
+
+
+def _unpackIndices(buf, offset, count):
+    if numpy is not None:
+        return numpy.frombuffer(buf, dtype="<u4", count=count, offset=offset)
+
+    values = array.array("I")
+    _arrayFromBytes(values, buf[offset:offset + count * _INDEX_SIZE])
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values
+
+
+def unpackValues(buf, offset, count, valueSize):
+    u"""Unpacks values packed by `packValues`.
+
+    Args:
+        buf (bytes or mmap.mmap): Buffer holding the values.
+        offset (int): Byte offset of the first value.
+        count (int): Number of values.
+        valueSize (int): Bytes per value, see `packValues`. Fixed point
+            values are dequantized.
+
+    Returns:
+        numpy.ndarray or array.array: The values. With NumPy, float values
+        are a view of ``buf``.
+    """
+
+    scale = _FIXED_POINT_SCALES.get(valueSize)
+
+    if numpy is not None:
+        values = numpy.frombuffer(buf, dtype=_VALUE_DTYPES[valueSize],
+                                  count=count, offset=offset)
+        if scale:
+            values = values / float(scale)
+        return values
+
+    values = array.array(_ARRAY_TYPECODES[valueSize])
+    _arrayFromBytes(values, buf[offset:offset + count * valueSize])
+    if sys.byteorder == "big":
+        values.byteswap()
+    if scale:
+        values = array.array("d", [value / float(scale) for value in values])
+    return values
+
+
+def _sparsePayload(sparseWeights, valueSize):
+    rowOffsets = _packIndices(sparseWeights.rowOffsets)
+    indices = _packIndices(sparseWeights.indices)
+    return b"".join([rowOffsets, b"\0" * _padding(len(rowOffsets)),
+                     indices, b"\0" * _padding(len(indices)),
+                     packValues(sparseWeights.values, valueSize)])
+
+
+def _readSparsePayload(buf, offset, vertexCount, infCount, valueSize):
+    rowOffsets = _unpackIndices(buf, offset, vertexCount + 1)
+    nonZeroCount = int(rowOffsets[-1])
+    offset += (vertexCount + 1) * _INDEX_SIZE
+    offset += _padding(offset)
+    indices = _unpackIndices(buf, offset, nonZeroCount)
+    offset += nonZeroCount * _INDEX_SIZE
+    offset += _padding(offset)
+    values = unpackValues(buf, offset, nonZeroCount, valueSize)
+    return SparseWeights(infCount, rowOffsets, indices, values)
+
+
+def writeSwbObject(output, skinWeights, valueSize=4, sparse=False):
+    u"""Writes one object to an open binary weight file.
+
+    The file must already contain the binary magic (see `writeSwb`). The rest
+    positions of the object are stored too, if it has any.
+
+    Args:
+        output (file): File opened for binary writing.
+        skinWeights (`SkinWeights`): Object to write.
+        valueSize (int, optional): 4 to store float32, 8 to store float64
+            values, 1 or 2 to store them quantized to 8 or 16 bit fixed point
+            (see `quantizeWeights`). Defaults to 4.
+        sparse (bool, optional): Only store the non-zero weights (CSR).
+            Defaults to False.
+
+    Returns:
+        `QuantizationError`: The error of the quantized weights, None if
+        the weights were stored as floats.
+    """
+
+    if valueSize not in _ARRAY_TYPECODES:
+        raise ValueError("valueSize must be 1, 2, 4 or 8, not %r" %
+                         (valueSize,))
+
+    vertexCount = skinWeights.vertexCount
+    infCount = skinWeights.influenceCount
+    weights = skinWeights.weights
+
+    error = None
+    if valueSize in _FIXED_POINT_SCALES:
+        if isinstance(weights, SparseWeights):
+            weights = weights.toDense()
+        weights, error = quantizeWeights(weights, infCount,
+                                         valueSize * 8)
+
+    if sparse:
+        if not isinstance(weights, SparseWeights):
+            weights = SparseWeights.fromDense(weights, infCount)
+        encoding = SPARSE
+        payload = _sparsePayload(weights, valueSize)
+    else:
+        if isinstance(weights, SparseWeights):
+            weights = weights.toDense()
+        encoding = DENSE
+        payload = packValues(weights, valueSize)
+
+    if skinWeights.positions is not None:
+        if len(skinWeights.positions) != vertexCount * 3:
+            raise ValueError("%s: %d position values for %d vertices" % (
+                skinWeights.name, len(skinWeights.positions), vertexCount))
+        positions = packValues(skinWeights.positions, 4)
+        encoding |= POSITIONS
+        payload = b"".join([positions, b"\0" * _padding(len(positions)),
+                            payload])
+
+    header = _OBJECT_HEADER.pack(len(payload), vertexCount, infCount,
+                                 encoding, valueSize)
+    header += _encodeName(skinWeights.name)
+    for influence in skinWeights.influences:
+        header += _encodeName(influence)
+
+    offset = output.tell() + len(header)
+    output.write(header + b"\0" * _padding(offset))
+    output.write(payload)
+
+    return error
+
+
+def writeSwb(filePath, objects, valueSize=4, sparse=False):
+    u"""Writes objects to a binary weight file.
+
+    Args:
+        filePath (str): Path of the ``.swb`` file.
+        objects (list[`SkinWeights`]): Objects to write.
+        valueSize (int, optional): 4 to store float32, 8 to store float64
+            values, 1 or 2 to store them quantized to 8 or 16 bit fixed
+            point. Defaults to 4.
+        sparse (bool, optional): Only store the non-zero weights (CSR).
+            Defaults to False.
+    """
+
+    with open(filePath, "wb") as output:
+        output.write(BINARY_MAGIC)
+        for skinWeights in objects:
+            writeSwbObject(output, skinWeights, valueSize, sparse)
+
+
+def readSwb(filePath):
+    u"""Reads all objects of a binary weight file.
+
+    The file is memory-mapped. With NumPy available the weights of every object
+    are read-only views into the mapping and no data is copied until it is
+    handed to Maya; without NumPy they are copied into ``array.array`` objects.
+    Objects saved sparse are returned with `SparseWeights`.
+
+    Args:
+        filePath (str): Path of the ``.swb`` file.
+
+    Returns:
+        list[`SkinWeights`]: The objects in file order.
+
+    Raises:
+        IOError: If the file is not a binary weight file.
+    """
+
+    return _readSwbObjects(_mapSwb(filePath), filePath)
+
+
+def _readSwbObjects(buf, filePath):
+    objects = []
+    offset = len(BINARY_MAGIC)
+    while offset < len(buf):
+        skinWeights, offset = _readSwbObject(buf, offset, filePath)
+        objects.append(skinWeights)
+
+    return objects
+
+
+def _mapSwb(filePath):
+    with open(filePath, "rb") as f:
+        if os.fstat(f.fileno()).st_size <= len(BINARY_MAGIC):
+            buf = f.read()
+        else:
+            buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    if buf[:len(BINARY_MAGIC)] != BINARY_MAGIC:
+        raise IOError("%s is not a binary skin weight file" % filePath)
+
+    return buf
+
+
+def _readSwbHeader(buf, offset):
+    payloadSize, vertexCount, infCount, encoding, valueSize = \
+        _OBJECT_HEADER.unpack_from(buf, offset)
+    offset += _OBJECT_HEADER.size
+
+    name, offset = _decodeName(buf, offset)
+    influences = []
+    for i in range(infCount):
+        influence, offset = _decodeName(buf, offset)
+        influences.append(influence)
+    offset += _padding(offset)
+
+    return (name, influences, vertexCount, encoding, valueSize, offset,
+            offset + payloadSize)
+
+
+def _readSwbObject(buf, offset, filePath):
+    name, influences, vertexCount, encoding, valueSize, offset, end = \
+        _readSwbHeader(buf, offset)
+    infCount = len(influences)
+
+    positions = None
+    if encoding & POSITIONS:
+        positions = unpackValues(buf, offset, vertexCount * 3, 4)
+        offset += vertexCount * 3 * 4
+        offset += _padding(offset)
+        encoding &= ~POSITIONS
+
+    if encoding == DENSE:
+        weights = unpackValues(buf, offset, vertexCount * infCount, valueSize)
+    elif encoding == SPARSE:
+        weights = _readSparsePayload(buf, offset, vertexCount, infCount,
+                                     valueSize)
+    else:
+        raise IOError("%s: unknown weight encoding %d" % (filePath, encoding))
+
+    return SkinWeights(name, influences, weights, positions), end
+
+
+class CompressedWriter(object):
+
+    def __init__(self, filePath, compression=ZLIB,
+                 level=DEFAULT_COMPRESSION_LEVEL, chunkSize=DEFAULT_CHUNK_SIZE):
+        u"""File-like object writing a compressed weight file.
+
+        Whatever is written, in the text or the binary layout, is split into
+        chunks of ``chunkSize`` bytes that are compressed independently.
+
+        Args:
+            filePath (str): Path of the ``.swz`` file.
+            compression (str, optional): `ZLIB` or `LZMA`. Defaults to `ZLIB`.
+            level (int, optional): Compression level, 0 to 9. Defaults to
+                `DEFAULT_COMPRESSION_LEVEL`.
+            chunkSize (int, optional): Uncompressed bytes per chunk. Defaults
+                to `DEFAULT_CHUNK_SIZE`.
+
+        Raises:
+            ValueError: If the compression is unknown or not available.
+        """
+
+        _checkCompression(compression)
+        if not 0 <= level <= 9:
+            raise ValueError("level must be between 0 and 9, not %r" % (level,))
+        if chunkSize <= 0:
+            raise ValueError("chunkSize must be positive, not %r" %
+                             (chunkSize,))
+
+        self.compression = compression
+        self.level = level
+        self.chunkSize = chunkSize
+
+        self._file = open(filePath, "wb")
+        self._file.write(COMPRESSED_MAGIC)
+        self._file.write(_CONTAINER_HEADER.pack(
+            _CODECS.index(compression), level, chunkSize))
+        self._pending = bytearray()
+        self._flushed = 0
+
+    def write(self, data):
+        u"""Writes data, text or bytes, to the file.
+
+        Args:
+            data (str or bytes): Data to write. Text is encoded as UTF-8.
+        """
+
+        if not isinstance(data, bytes):
+            data = data.encode("utf-8")
+        self._pending.extend(data)
+
+        while len(self._pending) >= self.chunkSize:
+            self._writeChunk(bytes(self._pending[:self.chunkSize]))
+            del self._pending[:self.chunkSize]
+
+    def tell(self):
+        u"""Gets the uncompressed position in the file.
+
+        Returns:
+            int: Number of bytes written so far, before compression.
+        """
+
+        return self._flushed + len(self._pending)
+
+    def close(self):
+        u"""Compresses the data still pending and closes the file."""
+
+        if self._file.closed:
+            return
+
+        if self._pending:
+            self._writeChunk(bytes(self._pending))
+            del self._pending[:]
+        self._file.close()
+
+    def _writeChunk(self, data):
+        compressed = _compress(data, self.compression, self.level)
+        self._file.write(_CHUNK_HEADER.pack(len(compressed), len(data)))
+        self._file.write(compressed)
+        self._flushed += len(data)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def _checkCompression(compression):
+    if compression not in _CODECS:
+        raise ValueError("compression must be one of %s, not %r" %
+                         (", ".join(_CODECS), compression))
+    if compression == LZMA and lzma is None:
+        raise ValueError("lzma compression is not available in this Python")
+
+
+def _compress(data, compression, level):
+    if compression == LZMA:
+        return lzma.compress(data, preset=level)
+    return zlib.compress(data, level)
+
+
+def _decompressChunk(chunk):
+    compression, data, size = chunk
+    if compression == LZMA:
+        _checkCompression(compression)
+        data = lzma.decompress(data)
+    else:
+        data = zlib.decompress(data)
+
+    if len(data) != size:
+        raise IOError("corrupt chunk: %d bytes instead of %d" %
+                      (len(data), size))
+
+    return data
+
+
+def isCompressedFile(filePath):
+    u"""Checks whether a weight file is a compressed container.
+
+    Args:
+        filePath (str): Path of the weight file.
+
+    Returns:
+        bool: True if the file starts with the compressed magic.
+    """
+
+    with open(filePath, "rb") as f:
+        return f.read(len(COMPRESSED_MAGIC)) == COMPRESSED_MAGIC
+
+
+def _iterCompressedChunks(f, filePath):
+    if f.read(len(COMPRESSED_MAGIC)) != COMPRESSED_MAGIC:
+        raise IOError("%s is not a compressed skin weight file" % filePath)
+
+    codec, level, chunkSize = _CONTAINER_HEADER.unpack(
+        f.read(_CONTAINER_HEADER.size))
+    if codec >= len(_CODECS):
+        raise IOError("%s: unknown compression %d" % (filePath, codec))
+    compression = _CODECS[codec]
+
+    while True:
+        header = f.read(_CHUNK_HEADER.size)
+        if not header:
+            break
+        if len(header) < _CHUNK_HEADER.size:
+            raise IOError("%s is truncated" % filePath)
+
+        compressedSize, size = _CHUNK_HEADER.unpack(header)
+        data = f.read(compressedSize)
+        if len(data) < compressedSize:
+            raise IOError("%s is truncated" % filePath)
+
+        yield compression, data, size
+
+
+def iterChunks(filePath, workers=0):
+    u"""Reads and decompresses the chunks of a compressed weight file.
+
+    The chunks are independent of each other, so with ``workers`` set they are
+    decompressed by a pool of threads (zlib and lzma release the GIL) while
+    the chunks already decompressed are used.
+
+    Args:
+        filePath (str): Path of the ``.swz`` file.
+        workers (int, optional): Number of threads decompressing chunks. 0
+            decompresses them one after the other. Defaults to 0.
+
+    Yields:
+        bytes: The uncompressed chunks in file order.
+
+    Raises:
+        IOError: If the file is not a compressed weight file or is corrupt.
+    """
+
+    with open(filePath, "rb") as f:
+        chunks = _iterCompressedChunks(f, filePath)
+
+        if not workers:
+            for chunk in chunks:
+                yield _decompressChunk(chunk)
+            return
+
+        pool = multiprocessing.pool.ThreadPool(workers)
+        try:
+            for data in pool.imap(_decompressChunk, chunks):
+                yield data
+        finally:
+            pool.terminate()
+            pool.join()
+
+
+def _iterLines(chunks):
+    remainder = b""
+    for data in chunks:
+        lines = (remainder + data).split(b"\n")
+        remainder = lines.pop()
+        for line in lines:
+            yield line + b"\n"
+
+    if remainder:
+        yield remainder
+
+
+def iterSwz(filePath, blockSize=DEFAULT_BLOCK_SIZE, workers=0):
+    u"""Reads a compressed weight file one object at a time.
+
+    Text content is streamed chunk by chunk like `iterSwt`. Binary content is
+    decompressed as a whole and read like `readSwb`.
+
+    Args:
+        filePath (str): Path of the ``.swz`` file.
+        blockSize (int, optional): Number of weight rows per block of text
+            content. Defaults to `DEFAULT_BLOCK_SIZE`.
+        workers (int, optional): Number of threads decompressing chunks.
+            Defaults to 0.
+
+    Yields:
+        `SkinWeightStream` or `SkinWeights`: The objects in file order.
+    """
+
+    chunks = iterChunks(filePath, workers)
+    try:
+        first = next(chunks)
+    except StopIteration:
+        return
+
+    chunks = itertools.chain([first], chunks)
+    if first.startswith(BINARY_MAGIC):
+        for skinWeights in _readSwbObjects(b"".join(chunks), filePath):
+            yield skinWeights
+        return
+
+    for stream in _iterSwtObjects(_strippedLines(_iterLines(chunks)),
+                                  blockSize):
+        yield stream
+
+
+def readSwz(filePath, workers=0):
+    u"""Reads all objects of a compressed weight file.
+
+    Args:
+        filePath (str): Path of the ``.swz`` file.
+        workers (int, optional): Number of threads decompressing chunks.
+            Defaults to 0.
+
+    Returns:
+        list[`SkinWeights`]: The objects in file order.
+    """
+
+    objects = []
+    for skinWeights in iterSwz(filePath, workers=workers):
+        if isinstance(skinWeights, SkinWeightStream):
+            skinWeights = _collectStreams([skinWeights])[0]
+        objects.append(skinWeights)
+
+    return objects
+
+
+def compressWeightFile(inputFile, outputFile, compression=ZLIB,
+                       level=DEFAULT_COMPRESSION_LEVEL,
+                       chunkSize=DEFAULT_CHUNK_SIZE):
+    u"""Compresses a text or binary weight file into a compressed weight file.
+
+    The content is copied as is, so decompressing the chunks gives back the
+    original file.
+
+    Args:
+        inputFile (str): Path of the source ``.swt`` or ``.swb`` file.
+        outputFile (str): Path of the ``.swz`` file to write.
+        compression (str, optional): `ZLIB` or `LZMA`. Defaults to `ZLIB`.
+        level (int, optional): Compression level, 0 to 9. Defaults to
+            `DEFAULT_COMPRESSION_LEVEL`.
+        chunkSize (int, optional): Uncompressed bytes per chunk. Defaults to
+            `DEFAULT_CHUNK_SIZE`.
+    """
+
+    with open(inputFile, "rb") as f:
+        with CompressedWriter(outputFile, compression, level,
+                              chunkSize) as output:
+            while True:
+                data = f.read(chunkSize)
+                if not data:
+                    break
+                output.write(data)
+
+
+def readWeightFile(filePath):
+    u"""Reads all objects of a weight file of any supported layout.
+
+    Args:
+        filePath (str): Path of the ``.swt``, ``.swb`` or ``.swz`` file.
+
+    Returns:
+        list[`SkinWeights`]: The objects in file order.
+    """
+
+    if isCompressedFile(filePath):
+        return readSwz(filePath)
+
+    if isBinaryFile(filePath):
+        return readSwb(filePath)
+
+    return readSwt(filePath)
+
+
+def indexPath(filePath):
+    u"""Gets the path of the index file of a weight file.
+
+    Args:
+        filePath (str): Path of the weight file.
+
+    Returns:
+        str: Path of its index file.
+    """
+
+    return filePath + INDEX_EXTENSION
+
+
+def _newIndexEntry(name, offset, influences, vertexCount):
+    return {"name": name, "offset": offset, "length": 0,
+            "influences": influences, "vertexCount": vertexCount, "crc32": 0}
+
+
+def _scanSwt(f):
+    entries = []
+    entry = None
+    crc = 0
+    filePosition = 0
+    offset = 0
+
+    for line in f:
+        stripped = line.strip()
+
+        if filePosition == 0:
+            if stripped:
+                if str is not bytes:
+                    stripped = stripped.decode("utf-8")
+                entry = _newIndexEntry(stripped, offset, [], 0)
+                crc = zlib.crc32(line)
+                filePosition = 1
+
+        else:
+            crc = zlib.crc32(line, crc)
+
+            if filePosition in (1, 3):
+                if stripped.startswith(SEPARATOR.encode("ascii")):
+                    filePosition = 2
+                elif stripped.startswith(POSITIONS_SEPARATOR.encode("ascii")):
+                    filePosition = 3
+                elif filePosition == 1:
+                    if str is not bytes:
+                        stripped = stripped.decode("utf-8")
+                    entry["influences"].append(stripped)
+
+            elif stripped:
+                entry["vertexCount"] += 1
+
+            else:
+                entry["length"] = offset + len(line) - entry["offset"]
+                entry["crc32"] = crc & 0xffffffff
+                entries.append(entry)
+                filePosition = 0
+
+        offset += len(line)
+
+    if filePosition == 2:
+        entry["length"] = offset - entry["offset"]
+        entry["crc32"] = crc & 0xffffffff
+        entries.append(entry)
+
+    return entries
+
+
+def _scanSwb(filePath):
+    buf = _mapSwb(filePath)
+
+    entries = []
+    offset = len(BINARY_MAGIC)
+    while offset < len(buf):
+        name, influences, vertexCount, encoding, valueSize, dataOffset, end = \
+            _readSwbHeader(buf, offset)
+        entry = _newIndexEntry(name, offset, influences, vertexCount)
+        entry["length"] = end - offset
+        entry["crc32"] = _crc32(buf, offset, end)
+        entries.append(entry)
+        offset = end
+
+    return entries
+
+
+def _crc32(buf, start, end):
+    crc = 0
+    for chunkStart in range(start, end, _CHECKSUM_CHUNK):
+        crc = zlib.crc32(buf[chunkStart:min(chunkStart + _CHECKSUM_CHUNK, end)],
+                         crc)
+    return crc & 0xffffffff
+
+
+def buildIndex(filePath):
+    u"""Builds the index of a weight file.
+
+    The file is scanned once; the weights are not decoded. Every object gets
+    an entry with its name, byte offset and length, influence names, vertex
+    count and the CRC-32 checksum of its bytes.
+
+    Args:
+        filePath (str): Path of the ``.swt`` or ``.swb`` file.
+
+    Returns:
+        dict: The index, as written by `writeIndex`.
+
+    Raises:
+        IOError: If the file is a compressed weight file, which has no index.
+    """
+
+    if isCompressedFile(filePath):
+        raise IOError("%s is compressed and cannot be indexed" % filePath)
+
+    if isBinaryFile(filePath):
+        entries = _scanSwb(filePath)
+    else:
+        with open(filePath, "rb") as f:
+            entries = _scanSwt(f)
+
+    return {"version": INDEX_VERSION,
+            "size": os.path.getsize(filePath),
+            "mtime": os.path.getmtime(filePath),
+            "objects": entries}
+
+
+def writeIndex(filePath):
+    u"""Builds the index of a weight file and saves it next to the file.
+
+    Args:
+        filePath (str): Path of the ``.swt`` or ``.swb`` file.
+
+    Returns:
+        dict: The index that was written.
+    """
+
+    index = buildIndex(filePath)
+    with open(indexPath(filePath), "w") as output:
+        json.dump(index, output, indent=1)
+
+    return index
+
+
+def readIndex(filePath):
+    u"""Reads the index of a weight file.
+
+    Args:
+        filePath (str): Path of the ``.swt`` or ``.swb`` file.
+
+    Returns:
+        dict: The index, None if there is none or if the weight file changed
+        since the index was written.
+    """
+
+    try:
+        with open(indexPath(filePath), "r") as f:
+            index = json.load(f)
+    except (IOError, OSError, ValueError):
+        return None
+
+    if index.get("version") != INDEX_VERSION or \
+            index.get("size") != os.path.getsize(filePath) or \
+            index.get("mtime") != os.path.getmtime(filePath):
+        return None
+
+    return index
+
+
+def verifyObject(filePath, entry):
+    u"""Checks the bytes of one object against the checksum of its index entry.
+
+    The weights are not decoded.
+
+    Args:
+        filePath (str): Path of the ``.swt`` or ``.swb`` file.
+        entry (dict): Index entry of the object.
+
+    Returns:
+        bool: True if the checksum matches.
+    """
+
+    crc = 0
+    with open(filePath, "rb") as f:
+        f.seek(entry["offset"])
+        remaining = entry["length"]
+        while remaining > 0:
+            chunk = f.read(min(remaining, _CHECKSUM_CHUNK))
+            if not chunk:
+                return False
+            crc = zlib.crc32(chunk, crc)
+            remaining -= len(chunk)
+
+    return crc & 0xffffffff == entry["crc32"]
+
+
+def verifyWeightFile(filePath):
+    u"""Checks every object of a weight file against its index.
+
+    Args:
+        filePath (str): Path of the ``.swt`` or ``.swb`` file.
+
+    Returns:
+        list[str]: Names of the objects whose checksum does not match, None if
+        the file has no valid index.
+    """
+
+    index = readIndex(filePath)
+    if index is None:
+        return None
+
+    return [entry["name"] for entry in index["objects"]
+            if not verifyObject(filePath, entry)]
+
+
+def fingerprint(objects, names=True, positions=True):
+    u"""Gets a fingerprint of the weights of objects.
+
+    The fingerprint covers the object names, the influence names, the
+    weights as float32, the precision Maya keeps them in, and the rest
+    positions if the objects have them. It changes whenever any of them
+    changes, whatever layout the weights are saved in.
+
+    Args:
+        objects (list[`SkinWeights`]): Objects to fingerprint.
+        names (bool, optional): Include the object names. Without them,
+            objects holding the same weights get the same fingerprint.
+            Defaults to True.
+        positions (bool, optional): Include the rest positions. Without
+            them, objects holding the same weights at different positions
+            get the same fingerprint. Defaults to True.
+
+    Returns:
+        str: SHA-1 hex digest.
+    """
+
+    digest = hashlib.sha1()
+    for skinWeights in objects:
+        if names:
+            digest.update(_encodeName(skinWeights.name))
+        digest.update(_NAME_LENGTH.pack(skinWeights.influenceCount))
+        for influence in skinWeights.influences:
+            digest.update(_encodeName(influence))
+
+        weights = skinWeights.weights
+        if isinstance(weights, SparseWeights):
+            weights = weights.toDense()
+        digest.update(packValues(weights, 4))
+        if positions and skinWeights.positions is not None:
+            digest.update(packValues(skinWeights.positions, 4))
+
+    return digest.hexdigest()
+
+
+def topologyFingerprint(vertexCount, polygonCounts, polygonConnects):
+    u"""Gets a fingerprint of the topology of a mesh.
+
+    Meshes with the same fingerprint have the same vertex order, so the same
+    weights fit all of them.
+
+    Args:
+        vertexCount (int): Number of vertices.
+        polygonCounts (sequence[int]): Vertex count of every polygon.
+        polygonConnects (sequence[int]): Vertex indices of every polygon, one
+            polygon after the other.
+
+    Returns:
+        str: SHA-1 hex digest.
+    """
+
+    digest = hashlib.sha1()
+    digest.update(_packIndices([vertexCount, len(polygonCounts)]))
+    digest.update(_packIndices(polygonCounts))
+    digest.update(_packIndices(polygonConnects))
+
+    return digest.hexdigest()
+
+
+def readManifest(filePath):
+    u"""Reads a manifest of saved weight files.
+
+    Args:
+        filePath (str): Path of the manifest (JSON).
+
+    Returns:
+        dict: The manifest. Its ``objects`` map object names to the entries
+        written by the caller. Empty if the file does not exist or is not a
+        manifest of this version.
+    """
+
+    try:
+        with open(filePath, "r") as f:
+            manifest = json.load(f)
+    except (IOError, OSError, ValueError):
+        manifest = {}
+
+    if manifest.get("version") != MANIFEST_VERSION:
+        manifest = {"version": MANIFEST_VERSION, "objects": {}}
+
+    return manifest
+
+
+def writeManifest(filePath, manifest):
+    u"""Writes a manifest of saved weight files.
+
+    Args:
+        filePath (str): Path of the manifest (JSON).
+        manifest (dict): Manifest, as returned by `readManifest`.
+    """
+
+    with open(filePath, "w") as output:
+        json.dump(manifest, output, indent=1, sort_keys=True)
+
+
+def iterWeightFile(filePath, blockSize=DEFAULT_BLOCK_SIZE, objectNames=None,
+                   workers=0):
+    u"""Reads the objects of a weight file of any supported layout.
+
+    Text files are streamed (see `iterSwt`), binary files are memory-mapped
+    and compressed files are decompressed chunk by chunk (see `iterSwz`).
+    When a text or binary file has a valid index, only the requested objects
+    are read: the reader seeks straight to each of them.
+
+    Args:
+        filePath (str): Path of the ``.swt``, ``.swb`` or ``.swz`` file.
+        blockSize (int, optional): Number of weight rows per block of text
+            files. Defaults to `DEFAULT_BLOCK_SIZE`.
+        objectNames (list[str], optional): Names of the objects to read.
+            Defaults to None, meaning all objects.
+        workers (int, optional): Number of threads decompressing the chunks of
+            compressed files. Defaults to 0.
+
+    Yields:
+        `SkinWeightStream` or `SkinWeights`: The objects in file order.
+    """
+
+    compressed = isCompressedFile(filePath)
+    binary = not compressed and isBinaryFile(filePath)
+    index = None if compressed else readIndex(filePath)
+
+    if index is None:
+        if compressed:
+            objects = iterSwz(filePath, blockSize, workers)
+        elif binary:
+            objects = readSwb(filePath)
+        else:
+            objects = iterSwt(filePath, blockSize)
+
+        for skinWeights in objects:
+            if objectNames is None or skinWeights.name in objectNames:
+                yield skinWeights
+        return
+
+    buf = _mapSwb(filePath) if binary else None
+    for entry in index["objects"]:
+        if objectNames is not None and entry["name"] not in objectNames:
+            continue
+
+        if binary:
+            yield _readSwbObject(buf, entry["offset"], filePath)[0]
+        else:
+            for stream in iterSwt(filePath, blockSize, entry["offset"]):
+                if stream.vertexCount is None:
+                    stream.vertexCount = entry["vertexCount"]
+                yield stream
+                break
+
+
+def convertSwtToSwb(inputFile, outputFile, valueSize=4, sparse=False):
+    u"""Converts a text weight file into a binary weight file.
+
+    Args:
+        inputFile (str): Path of the source ``.swt`` file.
+        outputFile (str): Path of the ``.swb`` file to write.
+        valueSize (int, optional): 4 to store float32, 8 to store float64
+            values, 1 or 2 to store them quantized to 8 or 16 bit fixed
+            point. Defaults to 4, which is the precision Maya saves with.
+        sparse (bool, optional): Only store the non-zero weights (CSR).
+            Defaults to False.
+    """
+
+    writeSwb(outputFile, readSwt(inputFile), valueSize, sparse)
+
+
+def convertSwbToSwt(inputFile, outputFile, precision=DEFAULT_PRECISION):
+    u"""Converts a binary weight file into a text weight file.
+
+    Args:
+        inputFile (str): Path of the source ``.swb`` file.
+        outputFile (str): Path of the ``.swt`` file to write.
+        precision (int, optional): Significant digits per weight. Defaults to
+            `DEFAULT_PRECISION`.
+    """
+
+    writeSwt(outputFile, readSwb(inputFile), precision)
@@ -0,0 +1,349 @@
+# -*- coding: utf-8 -*-
+u"""Versioned skin weight store.
+
+Keeps every saved version of the skin weights of a character without storing
+the same data twice. The weights of every object are split into chunks of
+`DEFAULT_CHUNK_ROWS` vertices, and each chunk is stored once, compressed,
+under the SHA-1 hash of its content. A save is recorded as a small snapshot
+listing the chunks of every object, so the regions that did not change
+between two versions cost nothing.
+
+Store layout::
+
+    <root>/chunks/<2 first hash digits>/<hash>    zlib compressed chunk
+    <root>/snapshots/<snapshot id>.json           one snapshot per save
+
+A chunk holds the weights, or the rest positions, of consecutive vertices as
+little-endian float32, row major. Snapshots that are no longer needed are
+removed by `SkinWeightStore.prune`, along with the chunks only they used.
+Like `rigTools.skinWeightFile`, this module does not import Maya.
+"""
+
+import collections
+import hashlib
+import json
+import os
+import time
+import zlib
+
+from . import skinWeightFile
+
+
+DEFAULT_CHUNK_ROWS = 1024
+u"""int: Number of vertices per chunk."""
+
+SNAPSHOT_VERSION = 2
+u"""int: Version of the snapshot layout. Version 1 snapshots, without rest
+positions, are still read."""
+
+_VALUE_SIZE = 4
+
+CommitReport = collections.namedtuple("CommitReport",
+                                      "snapshot chunks newChunks")
+u"""Result of `SkinWeightStore.commit`: the snapshot, the number of chunks
+it lists and the number of them that were not stored yet."""
+
+
+class SkinWeightStore(object):
+
+    def __init__(self, rootDir, chunkRows=DEFAULT_CHUNK_ROWS):
+        u"""Content-addressed store of skin weight snapshots.
+
+        Args:
+            rootDir (str): Folder of the store. Created on the first commit.
+            chunkRows (int, optional): Number of vertices per chunk. Defaults
+                to `DEFAULT_CHUNK_ROWS`.
+        """
+
+        self.rootDir = rootDir
+        self.chunkRows = chunkRows
+
+    @property
+    def chunksDir(self):
+        u"""str: Folder of the chunks."""
+
+        return os.path.join(self.rootDir, "chunks")
+
+    @property
+    def snapshotsDir(self):
+        u"""str: Folder of the snapshots."""
+
+        return os.path.join(self.rootDir, "snapshots")
+
+    def _chunkPath(self, chunkHash):
+        return os.path.join(self.chunksDir, chunkHash[:2], chunkHash)
+
+    def _writeChunk(self, data):
+        chunkHash = hashlib.sha1(data).hexdigest()
+        chunkPath = self._chunkPath(chunkHash)
+        if os.path.exists(chunkPath):
+            return chunkHash, False
+
+        chunkDir = os.path.dirname(chunkPath)
+        if not os.path.isdir(chunkDir):
+            os.makedirs(chunkDir)
+
+        # write next to the chunk first, so a chunk is never half written
+        tempPath = "{}.{}.tmp".format(chunkPath, os.getpid())
+        with open(tempPath, "wb") as output:
+            output.write(zlib.compress(data))
+        try:
+            os.rename(tempPath, chunkPath)
+        except OSError:
+            os.remove(tempPath)
+            if not os.path.exists(chunkPath):
+                raise
+
+        return chunkHash, True
+
+    def _writeChunks(self, values, columnCount):
+        data = skinWeightFile.packValues(values, _VALUE_SIZE)
+        chunkSize = max(self.chunkRows * columnCount * _VALUE_SIZE, 1)
+
+        chunks = []
+        newChunkCount = 0
+        for start in range(0, len(data), chunkSize):
+            chunkHash, new = self._writeChunk(data[start:start + chunkSize])
+            chunks.append(chunkHash)
+            newChunkCount += new
+
+        return chunks, newChunkCount
+
+    def _readChunks(self, snapshotId, name, chunks, count):
+        data = b"".join([self._readChunk(chunkHash) for chunkHash in chunks])
+        if len(data) != count * _VALUE_SIZE:
+            raise IOError("snapshot {}: {} has {} bytes of data "
+                          "instead of {}".format(snapshotId, name, len(data),
+                                                 count * _VALUE_SIZE))
+
+        return skinWeightFile.unpackValues(data, 0, count, _VALUE_SIZE)
+
+    def _readChunk(self, chunkHash):
+        with open(self._chunkPath(chunkHash), "rb") as f:
+            data = zlib.decompress(f.read())
+
+        if hashlib.sha1(data).hexdigest() != chunkHash:
+            raise IOError("chunk {} is corrupt".format(chunkHash))
+
+        return data
+
+    def commit(self, objects, tag=None):
+        u"""Stores a snapshot of the weights and rest positions of objects.
+
+        Args:
+            objects (list[`rigTools.skinWeightFile.SkinWeights`]): Objects to
+                store.
+            tag (str, optional): Name to find the snapshot by. Defaults to
+                None.
+
+        Returns:
+            `CommitReport`: The snapshot, whose ``id`` is unique and sorts by
+            time, and the number of its chunks that are new.
+        """
+
+        snapshotObjects = []
+        chunkCount = 0
+        newChunkCount = 0
+        for skinWeights in objects:
+            weights = skinWeights.weights
+            if isinstance(weights, skinWeightFile.SparseWeights):
+                weights = weights.toDense()
+
+            chunks, newChunks = self._writeChunks(
+                weights, skinWeights.influenceCount)
+            chunkCount += len(chunks)
+            newChunkCount += newChunks
+
+            positionChunks = None
+            if skinWeights.positions is not None:
+                positionChunks, newChunks = self._writeChunks(
+                    skinWeights.positions, 3)
+                chunkCount += len(positionChunks)
+                newChunkCount += newChunks
+
+            snapshotObjects.append({"name": skinWeights.name,
+                                    "influences": skinWeights.influences,
+                                    "vertexCount": skinWeights.vertexCount,
+                                    "chunks": chunks,
+                                    "positionChunks": positionChunks})
+
+        snapshotTime = time.time()
+        snapshot = {"version": SNAPSHOT_VERSION,
+                    "id": self._newSnapshotId(snapshotTime),
+                    "tag": tag,
+                    "time": snapshotTime,
+                    "objects": snapshotObjects}
+
+        if not os.path.isdir(self.snapshotsDir):
+            os.makedirs(self.snapshotsDir)
+        with open(self._snapshotPath(snapshot["id"]), "w") as output:
+            json.dump(snapshot, output, indent=1)
+
+        return CommitReport(snapshot, chunkCount, newChunkCount)
+
+    def _snapshotPath(self, snapshotId):
+        return os.path.join(self.snapshotsDir, snapshotId + ".json")
+
+    def _newSnapshotId(self, snapshotTime):
+        snapshotId = time.strftime("%Y%m%dT%H%M%S",
+                                   time.localtime(snapshotTime))
+        snapshotId += "{:06d}".format(int(snapshotTime % 1 * 1000000))
+
+        uniqueId = snapshotId
+        suffix = 1
+        while os.path.exists(self._snapshotPath(uniqueId)):
+            uniqueId = "{}-{}".format(snapshotId, suffix)
+            suffix += 1
+
+        return uniqueId
+
+    def snapshots(self):
+        u"""Lists the snapshots of the store.
+
+        Returns:
+            list[dict]: The ``id``, ``tag`` and ``time`` of every snapshot,
+            oldest first.
+        """
+
+        if not os.path.isdir(self.snapshotsDir):
+            return []
+
+        snapshots = []
+        for fileName in os.listdir(self.snapshotsDir):
+            if not fileName.endswith(".json"):
+                continue
+            snapshot = self.readSnapshot(fileName[:-len(".json")])
+            snapshots.append({"id": snapshot["id"], "tag": snapshot["tag"],
+                              "time": snapshot["time"]})
+
+        return sorted(snapshots, key=lambda snapshot: (snapshot["time"],
+                                                       snapshot["id"]))
+
+    def readSnapshot(self, snapshotId):
+        u"""Reads a snapshot.
+
+        Args:
+            snapshotId (str): Id of the snapshot.
+
+        Returns:
+            dict: The snapshot, as returned by `commit`.
+        """
+
+        with open(self._snapshotPath(snapshotId), "r") as f:
+            return json.load(f)
+
+    def findSnapshot(self, version=None):
+        u"""Finds a snapshot by id, tag or time.
+
+        Args:
+            version (str or float or datetime.datetime, optional): Snapshot id
+                or tag, or a time (seconds since the epoch or datetime) to get
+                the last snapshot stored at or before it. A tag used more than
+                once finds the latest snapshot with it. Defaults to None,
+                meaning the latest snapshot.
+
+        Returns:
+            str: Id of the snapshot.
+
+        Raises:
+            ValueError: If no snapshot matches.
+        """
+
+        snapshots = self.snapshots()
+
+        if version is None:
+            matches = snapshots
+        elif hasattr(version, "timetuple"):
+            versionTime = time.mktime(version.timetuple()) + \
+                getattr(version, "microsecond", 0) / 1000000.0
+            matches = [snapshot for snapshot in snapshots
+                       if snapshot["time"] <= versionTime]
+        elif isinstance(version, (int, float)):
+            matches = [snapshot for snapshot in snapshots
+                       if snapshot["time"] <= version]
+        else:
+            matches = [snapshot for snapshot in snapshots
+                       if version in (snapshot["id"], snapshot["tag"])]
+
+        if not matches:
+            raise ValueError("no skin weight snapshot matches {!r}".format(
+                version))
+
+        return matches[-1]["id"]
+
+    def load(self, version=None, objectNames=None):
+        u"""Restores the weights of a snapshot.
+
+        Args:
+            version (str or float or datetime.datetime, optional): Snapshot to
+                restore, see `findSnapshot`. Defaults to None, meaning the
+                latest snapshot.
+            objectNames (list[str], optional): Only restore the objects of
+                these names. Defaults to None, meaning all objects.
+
+        Returns:
+            list[`rigTools.skinWeightFile.SkinWeights`]: The objects of the
+            snapshot.
+        """
+
+        snapshot = self.readSnapshot(self.findSnapshot(version))
+
+        objects = []
+        for entry in snapshot["objects"]:
+            if objectNames is not None and entry["name"] not in objectNames:
+                continue
+
+            weights = self._readChunks(
+                snapshot["id"], entry["name"], entry["chunks"],
+                entry["vertexCount"] * len(entry["influences"]))
+
+            positions = None
+            if entry.get("positionChunks") is not None:
+                positions = self._readChunks(
+                    snapshot["id"], entry["name"], entry["positionChunks"],
+                    entry["vertexCount"] * 3)
+
+            objects.append(skinWeightFile.SkinWeights(
+                entry["name"], entry["influences"], weights, positions))
+
+        return objects
+
+    def prune(self, keep):
+        u"""Removes all but the most recent snapshots, and the chunks no
+        remaining snapshot uses.
+
+        Args:
+            keep (int): Number of most recent snapshots to keep.
+
+        Returns:
+            tuple(int, int): The number of snapshots and of chunks removed.
+        """
+
+        snapshots = self.snapshots()
+        removed = snapshots[:max(len(snapshots) - keep, 0)]
+        if not removed:
+            return 0, 0
+
+        for snapshot in removed:
+            os.remove(self._snapshotPath(snapshot["id"]))
+
+        used = set()
+        for snapshot in snapshots[len(removed):]:
+            for entry in self.readSnapshot(snapshot["id"])["objects"]:
+                used.update(entry["chunks"])
+                used.update(entry.get("positionChunks") or [])
+
+        chunkCount = 0
+        if not os.path.isdir(self.chunksDir):
+            return len(removed), chunkCount
+
+        for chunkDir in os.listdir(self.chunksDir):
+            chunkDir = os.path.join(self.chunksDir, chunkDir)
+            if not os.path.isdir(chunkDir):
+                continue
+            for chunkHash in os.listdir(chunkDir):
+                if chunkHash not in used and not chunkHash.endswith(".tmp"):
+                    os.remove(os.path.join(chunkDir, chunkHash))
+                    chunkCount += 1
+
+        return len(removed), chunkCount
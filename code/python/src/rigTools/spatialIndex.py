@@ -0,0 +1,371 @@
+# -*- coding: utf-8 -*-
+u"""Spatial index for point lookups.
+
+A uniform grid over a point cloud answering nearest neighbour queries, used
+to match vertices by position when transferring or mirroring skin weights.
+Nothing in this module imports Maya.
+
+With NumPy all queries are answered together: the grid cells around the
+queries are visited ring by ring, and every step handles all the queries that
+still need it in whole-array operations. Without NumPy the queries are
+answered one by one.
+"""
+
+import heapq
+import itertools
+import math
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+DEFAULT_POINTS_PER_CELL = 2
+u"""int: Average number of points per occupied cell the grid is sized for."""
+
+_MAX_RINGS = 8
+_BRUTE_FORCE_BLOCK = 1 << 20
+_CELL_TABLE_RATIO = 8
+
+
+def _toPoints(points):
+    if numpy is not None:
+        return numpy.asarray(points, dtype=numpy.float64).reshape(-1, 3)
+
+    points = [float(value) for value in points]
+    return list(zip(points[0::3], points[1::3], points[2::3]))
+
+
+def _shell(ring):
+    u"""Gets the cell offsets at a Chebyshev distance of ``ring``."""
+
+    return [offset for offset in
+            itertools.product(range(-ring, ring + 1), repeat=3)
+            if max([abs(value) for value in offset]) == ring]
+
+
+def _distance(a, b):
+    return math.sqrt((a[0] - b[0]) ** 2 + (a[1] - b[1]) ** 2 +
+                     (a[2] - b[2]) ** 2)
+
+
+class SpatialGrid(object):
+
+    def __init__(self, points, cellSize=None,
+                 pointsPerCell=DEFAULT_POINTS_PER_CELL):
+        u"""Uniform grid over points.
+
+        Args:
+            points (sequence[float]): x, y and z of every point, one after the
+                other.
+            cellSize (float, optional): Edge length of the cells. Defaults to
+                None, meaning a size giving about ``pointsPerCell`` points per
+                occupied cell.
+            pointsPerCell (int, optional): Average number of points per
+                occupied cell when ``cellSize`` is not given. Defaults to
+                `DEFAULT_POINTS_PER_CELL`.
+        """
+
+        self.points = _toPoints(points)
+
+        minimum = [0.0, 0.0, 0.0]
+        maximum = [0.0, 0.0, 0.0]
+        for axis in range(3):
+            if numpy is not None and len(self.points):
+                minimum[axis] = float(self.points[:, axis].min())
+                maximum[axis] = float(self.points[:, axis].max())
+            elif self.points:
+                minimum[axis] = min([point[axis] for point in self.points])
+                maximum[axis] = max([point[axis] for point in self.points])
+        self.minimum = tuple(minimum)
+
+        if cellSize:
+            self.cellSize = float(cellSize)
+            self._build()
+            return
+
+        # start from a cube of cells and adjust to the actual occupancy, as
+        # the points of a mesh lie on a surface rather than fill a volume
+        extent = max([high - low for low, high in zip(minimum, maximum)])
+        self.cellSize = (extent or 1.0) / \
+            max(len(self.points) ** (1.0 / 3.0), 1.0)
+        for i in range(3):
+            self._build()
+            occupancy = float(len(self.points)) / max(self.cellCount, 1)
+            if 0.5 * pointsPerCell <= occupancy <= 2.0 * pointsPerCell:
+                break
+            self.cellSize *= math.sqrt(pointsPerCell / occupancy)
+        else:
+            self._build()
+
+    @property
+    def cellCount(self):
+        u"""int: Number of occupied cells."""
+
+        if numpy is not None:
+            return len(self._cellKeys)
+        return len(self._cells)
+
+    def _cellOf(self, point):
+        return tuple([int(math.floor((value - low) / self.cellSize))
+                      for value, low in zip(point, self.minimum)])
+
+    def _build(self):
+        if numpy is None:
+            self._cells = {}
+            for i, point in enumerate(self.points):
+                self._cells.setdefault(self._cellOf(point), []).append(i)
+            self._dims = [max([cell[axis] for cell in self._cells] or [0]) + 1
+                          for axis in range(3)]
+            return
+
+        cells = numpy.floor((self.points - self.minimum) /
+                            self.cellSize).astype(numpy.int64)
+        self._dims = numpy.ones(3, dtype=numpy.int64)
+        if len(cells):
+            self._dims = cells.max(axis=0) + 1
+        keys = self._keys(cells)
+
+        self._order = numpy.argsort(keys, kind="mergesort")
+        self._cellKeys, self._cellStarts, self._cellCounts = numpy.unique(
+            keys[self._order], return_index=True, return_counts=True)
+
+        # look the cells up directly by key, unless the grid is mostly empty
+        self._cellTable = None
+        cellTotal = int(numpy.prod(self._dims))
+        if cellTotal <= _CELL_TABLE_RATIO * max(len(self.points), 1):
+            self._cellTable = numpy.zeros(cellTotal + 1, dtype=numpy.int64)
+            numpy.cumsum(numpy.bincount(keys, minlength=cellTotal),
+                         out=self._cellTable[1:])
+
+    def _keys(self, cells):
+        return (cells[:, 0] * self._dims[1] + cells[:, 1]) * self._dims[2] + \
+            cells[:, 2]
+
+    def nearest(self, queries, k=1, maxDistance=None):
+        u"""Finds the nearest points of every query point.
+
+        Args:
+            queries (sequence[float]): x, y and z of every query point, one
+                after the other.
+            k (int, optional): Number of points to find per query. Defaults to
+                1.
+            maxDistance (float, optional): Ignore points farther than this.
+                Defaults to None, meaning no limit.
+
+        Returns:
+            tuple: The indices and the distances of the points found, one row
+            of ``k`` per query, nearest first. Missing points have the index
+            -1 and an infinite distance. With NumPy both are arrays, else
+            lists of lists.
+        """
+
+        queries = _toPoints(queries)
+        if maxDistance is None:
+            maxDistance = float("inf")
+
+        if numpy is not None:
+            return self._nearestArrays(queries, k, maxDistance)
+
+        indices = []
+        distances = []
+        for query in queries:
+            found = self._nearestPoint(query, k, maxDistance)
+            indices.append([i for distance, i in found] +
+                           [-1] * (k - len(found)))
+            distances.append([distance for distance, i in found] +
+                             [float("inf")] * (k - len(found)))
+
+        return indices, distances
+
+    def _nearestPoint(self, query, k, maxDistance):
+        if not self.points:
+            return []
+
+        # a point in ring r is at least (r - 1) cells away, so the search can
+        # stop once the k nearest found are closer than that
+        cell = self._cellOf(query)
+        lastRing = max([max(abs(value), abs(value - size + 1))
+                        for value, size in zip(cell, self._dims)])
+
+        # max-heap of the k nearest, as (-distance, -index)
+        found = []
+        for ring in range(min(lastRing, _MAX_RINGS) + 1):
+            radius = (ring - 1) * self.cellSize
+            if (len(found) == k and -found[0][0] <= radius) or \
+                    radius > maxDistance:
+                break
+
+            for offset in _shell(ring):
+                other = (cell[0] + offset[0], cell[1] + offset[1],
+                         cell[2] + offset[2])
+                for i in self._cells.get(other, ()):
+                    _push(found, k, _distance(self.points[i], query), i,
+                          maxDistance)
+        else:
+            # far from the points or in a sparse region
+            radius = _MAX_RINGS * self.cellSize
+            if lastRing > _MAX_RINGS and radius <= maxDistance and \
+                    (len(found) < k or -found[0][0] > radius):
+                found = []
+                for i, point in enumerate(self.points):
+                    _push(found, k, _distance(point, query), i, maxDistance)
+
+        return sorted([(-distance, -i) for distance, i in found])
+
+    def _nearestArrays(self, queries, k, maxDistance):
+        count = len(queries)
+        bestIndices = numpy.full((count, k), -1, dtype=numpy.int64)
+        bestDistances = numpy.full((count, k), numpy.inf)
+        if not count or not len(self.points):
+            return bestIndices, bestDistances
+
+        scaled = (queries - self.minimum) / self.cellSize
+        cells = numpy.floor(scaled).astype(numpy.int64)
+
+        # visit the queries in cell order, so neighbouring queries read
+        # neighbouring points
+        order = numpy.argsort(self._keys(numpy.clip(cells, 0, self._dims - 1)),
+                              kind="mergesort")
+        queries = queries[order]
+        cells = cells[order]
+        fractions = scaled[order] - cells
+
+        # first ring that can hold a point, for queries outside the grid
+        outside = numpy.maximum(-cells, cells - (self._dims - 1))
+        firstRings = numpy.maximum(outside, 0).max(axis=1)
+
+        # a point in ring r is at least r - 1 cells plus the distance from
+        # the query to the nearest side of its cell away, so a query is done
+        # once its k nearest found are closer than that
+        margins = numpy.minimum(fractions, 1.0 - fractions).min(axis=1)
+        active = numpy.arange(count)
+        for ring in range(_MAX_RINGS + 1):
+            radius = (ring - 1 + margins[active]) * self.cellSize
+            done = (bestDistances[active, -1] <= radius) | \
+                (radius > maxDistance)
+            active = active[~done]
+            if not len(active):
+                break
+
+            searched = active[firstRings[active] <= ring]
+            for offset in _shell(ring):
+                if not len(searched):
+                    break
+                self._searchCell(queries, cells, fractions, searched, offset,
+                                 maxDistance, bestIndices, bestDistances)
+        else:
+            # far from the points or in a sparse region
+            radius = _MAX_RINGS * self.cellSize
+            active = active[(bestDistances[active, -1] > radius) &
+                            (radius <= maxDistance)]
+            if len(active):
+                self._bruteForce(queries, active, k, maxDistance,
+                                 bestIndices, bestDistances)
+
+        bestIndices[order] = bestIndices.copy()
+        bestDistances[order] = bestDistances.copy()
+        return bestIndices, bestDistances
+
+    def _searchCell(self, queries, cells, fractions, searched, offset,
+                    maxDistance, bestIndices, bestDistances):
+        otherCells = cells[searched] + offset
+        inside = ((otherCells >= 0) & (otherCells < self._dims)).all(axis=1)
+
+        # skip the queries whose k nearest are closer than the cell
+        gaps = numpy.zeros((len(searched), 3))
+        for axis, step in enumerate(offset):
+            if step > 0:
+                gaps[:, axis] = step - fractions[searched, axis]
+            elif step < 0:
+                gaps[:, axis] = fractions[searched, axis] - step - 1
+        bounds = numpy.sqrt((gaps ** 2).sum(axis=1)) * self.cellSize
+        inside &= (bounds < bestDistances[searched, -1]) & \
+            (bounds <= maxDistance)
+
+        searched = searched[inside]
+        if not len(searched):
+            return
+        keys = self._keys(otherCells[inside])
+
+        if self._cellTable is not None:
+            starts = self._cellTable[keys]
+            counts = self._cellTable[keys + 1] - starts
+            occupied = counts > 0
+            starts = starts[occupied]
+            counts = counts[occupied]
+        else:
+            positions = numpy.minimum(
+                numpy.searchsorted(self._cellKeys, keys),
+                len(self._cellKeys) - 1)
+            occupied = self._cellKeys[positions] == keys
+            starts = self._cellStarts[positions[occupied]]
+            counts = self._cellCounts[positions[occupied]]
+        searched = searched[occupied]
+        if not len(searched):
+            return
+
+        for slot in range(int(counts.max())):
+            inCell = counts > slot
+            queryIndices = searched[inCell]
+            pointIndices = self._order[starts[inCell] + slot]
+            distances = numpy.sqrt(((self.points[pointIndices] -
+                                     queries[queryIndices]) ** 2).sum(axis=1))
+            _insert(bestIndices, bestDistances, queryIndices, pointIndices,
+                    distances, maxDistance)
+
+    def _bruteForce(self, queries, active, k, maxDistance, bestIndices,
+                    bestDistances):
+        blockSize = max(_BRUTE_FORCE_BLOCK // len(self.points), 1)
+        for start in range(0, len(active), blockSize):
+            block = active[start:start + blockSize]
+            distances = numpy.sqrt(((queries[block][:, None, :] -
+                                     self.points[None, :, :]) ** 2).sum(
+                                         axis=2))
+            distances[distances > maxDistance] = numpy.inf
+
+            order = numpy.argsort(distances, axis=1, kind="mergesort")[:, :k]
+            nearest = distances[numpy.arange(len(block))[:, None], order]
+            order[numpy.isinf(nearest)] = -1
+
+            bestIndices[block, :order.shape[1]] = order
+            bestDistances[block, :order.shape[1]] = nearest
+
+
+def _push(found, k, distance, index, maxDistance):
+    if distance > maxDistance:
+        return
+    if len(found) < k:
+        heapq.heappush(found, (-distance, -index))
+    elif (-distance, -index) > found[0]:
+        heapq.heapreplace(found, (-distance, -index))
+
+
+def _insert(bestIndices, bestDistances, queryIndices, pointIndices,
+            distances, maxDistance):
+    u"""Inserts candidate points into the sorted k nearest of their queries."""
+
+    better = (distances < bestDistances[queryIndices, -1]) & \
+        (distances <= maxDistance)
+    queryIndices = queryIndices[better]
+    if not len(queryIndices):
+        return
+
+    rowIndices = bestIndices[queryIndices]
+    rowDistances = bestDistances[queryIndices]
+    rowIndices[:, -1] = pointIndices[better]
+    rowDistances[:, -1] = distances[better]
+
+    # move the new point to its place, nearest first
+    for column in range(rowDistances.shape[1] - 1, 0, -1):
+        swap = rowDistances[:, column] < rowDistances[:, column - 1]
+        if not swap.any():
+            break
+        rowDistances[swap, column - 1], rowDistances[swap, column] = \
+            rowDistances[swap, column], rowDistances[swap, column - 1]
+        rowIndices[swap, column - 1], rowIndices[swap, column] = \
+            rowIndices[swap, column], rowIndices[swap, column - 1]
+
+    bestIndices[queryIndices] = rowIndices
+    bestDistances[queryIndices] = rowDistances
@@ -0,0 +1,930 @@
+# -*- coding: utf-8 -*-
+u"""Stand-in for the Maya modules used by `rigTools.bSkinSaver`.
+
+Lets `rigTools.bSkinSaver`, and the skin weight functions of
+`komodoRig.komodo_deform`, be imported and run outside Maya, to benchmark and
+test the Python side of saving and loading skin weights. It is test code, not
+part of the tools. The stand-in holds a small scene of joints and skinned
+meshes in memory and implements the parts of ``maya.OpenMaya``,
+``maya.OpenMayaAnim`` and ``maya.cmds`` the skin weight tools call. Arrays
+are Python lists, so copying weights in and out of the stand-in costs about
+what building and reading the Maya arrays costs from Python; the work Maya
+itself does is not measured.
+
+Usage::
+
+    from tests.benchmark import mayaStandIn
+    scene = mayaStandIn.install()
+    scene.addJoint("l_arm1_jnt")
+    scene.addSkinnedMesh("body_geo", positions, ["l_arm1_jnt"], weights)
+    from rigTools import bSkinSaver
+
+"""
+
+import array
+import sys
+import types
+
+
+class _Node(object):
+
+    def __init__(self, name, nodeType, parent=None):
+        self.name = name
+        self.nodeType = nodeType
+        self.parent = parent
+        self.children = []
+        if parent is not None:
+            parent.children.append(self)
+
+    @property
+    def fullPath(self):
+        if self.nodeType not in _DAG_TYPES:
+            return self.name
+        if self.parent is None:
+            return "|" + self.name
+        return self.parent.fullPath + "|" + self.name
+
+
+class Scene(object):
+
+    def __init__(self):
+        u"""Joints and skinned meshes of the stand-in."""
+
+        self.nodes = {}
+        self.selection = []
+        self.softWeights = None
+        self.callbacks = {}
+        self.batch = False
+        self.setWeightsCalls = 0
+
+    def clear(self):
+        u"""Removes every node and clears the selection."""
+
+        for node in list(self.nodes.values()):
+            self._remove(node)
+        del self.selection[:]
+        self.softWeights = None
+        self.setWeightsCalls = 0
+
+    def _notify(self, event, node):
+        for callbackId in sorted(self.callbacks):
+            callbackEvent, callback, nodeType = self.callbacks[callbackId]
+            if callbackEvent == event and nodeType in (None, node.nodeType):
+                callback(MObject(node), None)
+
+    def _add(self, name, nodeType, parent=None):
+        if name in self.nodes:
+            raise RuntimeError("{} already exists".format(name))
+        node = _Node(name, nodeType, parent)
+        self.nodes[name] = node
+        self._notify("added", node)
+        return node
+
+    def _remove(self, node):
+        del self.nodes[node.name]
+        self._notify("removed", node)
+
+    def find(self, name):
+        u"""Finds a node by name or full path.
+
+        Args:
+            name (str): Short name or full path of the node.
+
+        Returns:
+            _Node: The node, None if there is none.
+        """
+
+        return self.nodes.get(name.split("|")[-1].split(".")[0])
+
+    def addJoint(self, name, parent=None):
+        u"""Adds a joint.
+
+        Args:
+            name (str): Name of the joint.
+            parent (str, optional): Name of the parent joint. Defaults to
+                None.
+        """
+
+        self._add(name, _JOINT, self.find(parent) if parent else None)
+
+    def addMesh(self, name, positions, polygons=None):
+        u"""Adds a mesh transform and its shape.
+
+        Args:
+            name (str): Name of the transform. The shape is ``<name>Shape``.
+            positions (sequence[float]): x, y and z of every vertex.
+            polygons (list[list[int]], optional): Vertex indices of every
+                polygon. Defaults to None, meaning no polygons.
+        """
+
+        transform = self._add(name, _TRANSFORM)
+        shape = self._add(name + "Shape", _MESH, transform)
+        shape.positions = [float(value) for value in positions]
+        shape.vertexCount = len(shape.positions) // 3
+        shape.polygonCounts = [len(polygon) for polygon in polygons or []]
+        shape.polygonConnects = [index for polygon in polygons or []
+                                 for index in polygon]
+        shape.skinCluster = None
+
+    def addSkinCluster(self, meshName, influences, weights=None):
+        u"""Skins a mesh.
+
+        Args:
+            meshName (str): Name of the mesh transform.
+            influences (list[str]): Names of the influence joints.
+            weights (sequence[float], optional): Weights of every vertex in
+                row major order. Defaults to None, meaning every vertex
+                fully weighted to the first influence.
+
+        Returns:
+            str: Name of the skinCluster.
+        """
+
+        shape = self.find(meshName)
+        if shape.nodeType == _TRANSFORM:
+            shape = shape.children[0]
+
+        index = 1
+        while "skinCluster{}".format(index) in self.nodes:
+            index += 1
+        skinCluster = self._add("skinCluster{}".format(index), _SKIN_CLUSTER)
+        skinCluster.shape = shape
+        skinCluster.influences = [self.find(influence)
+                                  for influence in influences]
+        if weights is None:
+            weights = [0.0] * (shape.vertexCount * len(influences))
+            weights[::len(influences)] = [1.0] * shape.vertexCount
+        skinCluster.weights = array.array("d", weights)
+        shape.skinCluster = skinCluster
+
+        return skinCluster.name
+
+    def addSkinnedMesh(self, name, positions, influences, weights=None):
+        u"""Adds a mesh, the joints it is missing and a skinCluster.
+
+        Args:
+            name (str): Name of the mesh transform.
+            positions (sequence[float]): x, y and z of every vertex.
+            influences (list[str]): Names of the influence joints.
+            weights (sequence[float], optional): Weights of every vertex in
+                row major order. Defaults to None.
+
+        Returns:
+            str: Name of the skinCluster.
+        """
+
+        for influence in influences:
+            if influence not in self.nodes:
+                self.addJoint(influence)
+        self.addMesh(name, positions)
+        return self.addSkinCluster(name, influences, weights)
+
+    def weights(self, meshName):
+        u"""Gets the weights of a skinned mesh.
+
+        Args:
+            meshName (str): Name of the mesh transform.
+
+        Returns:
+            tuple: The influence names and the weights of every vertex in row
+            major order.
+        """
+
+        skinCluster = self.find(meshName).children[0].skinCluster
+        return ([influence.name for influence in skinCluster.influences],
+                skinCluster.weights)
+
+    def select(self, names, vertices=None, softWeights=None):
+        u"""Replaces the selection.
+
+        Args:
+            names (list[str]): Names of the objects to select.
+            vertices (list[int], optional): Select these vertices of every
+                object instead. Defaults to None.
+            softWeights (list[float], optional): Soft selection weights of
+                ``vertices``. Defaults to None, meaning no soft selection.
+        """
+
+        del self.selection[:]
+        for name in names:
+            self.selection.append((self.find(name), None if vertices is None
+                                   else list(vertices)))
+        self.softWeights = list(softWeights) if softWeights else None
+
+
+_TRANSFORM = "transform"
+_MESH = "mesh"
+_JOINT = "joint"
+_SKIN_CLUSTER = "skinCluster"
+_COMPONENT = "component"
+_DAG_TYPES = (_TRANSFORM, _MESH, _JOINT)
+
+scene = Scene()
+u"""`Scene`: The scene of the stand-in."""
+
+
+class MFn(object):
+    kDagNode = 107
+    kTransform = 110
+    kJoint = 121
+    kMesh = 296
+    kNurbsCurve = 267
+    kCurve = 266
+    kNurbsSurface = 294
+    kSkinClusterFilter = 682
+    kMeshVertComponent = 550
+    kCurveCVComponent = 536
+    kSurfaceCVComponent = 541
+
+
+_API_TYPES = {_TRANSFORM: MFn.kTransform, _JOINT: MFn.kJoint,
+              _MESH: MFn.kMesh, _SKIN_CLUSTER: MFn.kSkinClusterFilter}
+
+_FUNCTION_SETS = {_TRANSFORM: (MFn.kTransform, MFn.kDagNode),
+                  _JOINT: (MFn.kJoint, MFn.kTransform, MFn.kDagNode),
+                  _MESH: (MFn.kMesh, MFn.kDagNode),
+                  _SKIN_CLUSTER: (MFn.kSkinClusterFilter,)}
+
+
+class MSpace(object):
+    kObject = 2
+    kWorld = 4
+
+
+class _Array(list):
+
+    def length(self):
+        return len(self)
+
+    def set(self, value, index):
+        self[index] = value
+
+    def clear(self):
+        del self[:]
+
+
+class MFloatArray(_Array):
+
+    def __init__(self, values=None, count=None):
+        if isinstance(values, int):
+            values = [0.0] * values
+        elif values is not None and count is not None:
+            values = values[:count]
+        super(MFloatArray, self).__init__(values or [])
+
+
+class MDoubleArray(MFloatArray):
+    pass
+
+
+class MIntArray(_Array):
+
+    def __init__(self, values=None, count=None):
+        if isinstance(values, int):
+            values = [0] * values
+        elif values is not None and count is not None:
+            values = values[:count]
+        super(MIntArray, self).__init__(values or [])
+
+
+class MDagPathArray(_Array):
+    pass
+
+
+class MCallbackIdArray(_Array):
+    pass
+
+
+class MPointArray(_Array):
+    pass
+
+
+class MPoint(object):
+
+    def __init__(self, x=0.0, y=0.0, z=0.0):
+        self.x = x
+        self.y = y
+        self.z = z
+
+
+class MObject(object):
+
+    def __init__(self, node=None):
+        self._node = node
+
+    def hasFn(self, fnType):
+        if self._node is None:
+            return False
+        if self._node.nodeType == _COMPONENT:
+            return fnType == self._node.componentType
+        return fnType in _FUNCTION_SETS[self._node.nodeType]
+
+    def apiType(self):
+        if self._node is None:
+            return 0
+        if self._node.nodeType == _COMPONENT:
+            return self._node.componentType
+        return _API_TYPES[self._node.nodeType]
+
+    def isNull(self):
+        return self._node is None
+
+
+class MObjectHandle(object):
+
+    def __init__(self, mObject):
+        self._object = mObject
+
+    def isValid(self):
+        node = self._object._node
+        return node is not None and scene.nodes.get(node.name) is node
+
+    def object(self):
+        return self._object
+
+
+class MDagPath(object):
+
+    def __init__(self, other=None):
+        self._node = other._node if other is not None else None
+
+    def fullPathName(self):
+        return self._node.fullPath
+
+    def partialPathName(self):
+        return self._node.name
+
+    def node(self):
+        return MObject(self._node)
+
+    def hasFn(self, fnType):
+        return self.node().hasFn(fnType)
+
+    def apiType(self):
+        return self.node().apiType()
+
+    def numberOfShapesDirectlyBelow(self, countPtr):
+        countPtr[0] = len([child for child in self._node.children
+                           if child.nodeType == _MESH])
+
+    def extendToShapeDirectlyBelow(self, index):
+        self._node = [child for child in self._node.children
+                      if child.nodeType == _MESH][index]
+
+    def pop(self):
+        self._node = self._node.parent
+
+
+class _Component(object):
+
+    nodeType = _COMPONENT
+
+    def __init__(self, componentType):
+        self.componentType = componentType
+        self.elements = []
+        self.weights = None
+        self.complete = None
+
+
+class MSelectionList(object):
+
+    def __init__(self):
+        self._items = []
+
+    def add(self, item, component=None):
+        if isinstance(item, MDagPath):
+            node = item._node
+        else:
+            node = scene.find(item)
+            if node is None:
+                raise RuntimeError("{} does not exist".format(item))
+        self._items.append((node, component))
+
+    def getDagPath(self, index, dagPath, component=None):
+        node, itemComponent = self._items[index]
+        dagPath._node = node
+        if component is not None and itemComponent is not None:
+            component._node = itemComponent._node
+
+    def length(self):
+        return len(self._items)
+
+
+class MItSelectionList(object):
+
+    def __init__(self, selection, filterType=None):
+        self._selection = selection
+        self._indices = [
+            index for index, (node, component) in enumerate(selection._items)
+            if filterType != MFn.kMeshVertComponent or component is not None]
+        self._index = 0
+
+    def isDone(self):
+        return self._index >= len(self._indices)
+
+    def getDagPath(self, dagPath, component=None):
+        self._selection.getDagPath(self._indices[self._index], dagPath,
+                                   component)
+
+    def next(self):
+        self._index += 1
+
+
+class MGlobal(object):
+
+    @staticmethod
+    def getActiveSelectionList(selection):
+        selection._items = []
+        for node, vertices in scene.selection:
+            component = None
+            if vertices is not None:
+                data = _Component(MFn.kMeshVertComponent)
+                data.elements = list(vertices)
+                component = MObject(data)
+            selection._items.append((node, component))
+
+    @staticmethod
+    def getRichSelection(richSelection):
+        MGlobal.getActiveSelectionList(richSelection._selection)
+        if scene.softWeights is not None:
+            node, component = richSelection._selection._items[0]
+            component._node.weights = list(scene.softWeights)
+
+    @staticmethod
+    def setActiveSelectionList(selection):
+        del scene.selection[:]
+        for node, component in selection._items:
+            vertices = None
+            if component is not None:
+                vertices = list(component._node.elements)
+            scene.selection.append((node, vertices))
+
+
+class MRichSelection(object):
+
+    def __init__(self):
+        self._selection = MSelectionList()
+
+    def getSelection(self, selection):
+        selection._items = list(self._selection._items)
+
+
+class MWeight(object):
+
+    def __init__(self, influence=1.0):
+        self._influence = influence
+
+    def influence(self):
+        return self._influence
+
+
+class MScriptUtil(object):
+
+    def __init__(self):
+        self._values = []
+
+    def asUintPtr(self):
+        return [0]
+
+    @staticmethod
+    def getUint(pointer):
+        return pointer[0]
+
+    def createFromList(self, values, count):
+        # like Maya, only lists of Python numbers are accepted
+        if not isinstance(values, list) or not all(
+                isinstance(value, (int, float)) for value in values[:count]):
+            raise TypeError("createFromList needs a list of Python numbers")
+        self._values = values[:count]
+
+    def asDoublePtr(self):
+        return self._values
+
+    def asIntPtr(self):
+        return self._values
+
+
+class _Messages(object):
+
+    @staticmethod
+    def _addCallback(event, callback, nodeType):
+        callbackId = max(scene.callbacks or [0]) + 1
+        scene.callbacks[callbackId] = (event, callback, nodeType)
+        return callbackId
+
+    @staticmethod
+    def addNodeAddedCallback(callback, nodeType=None, *args):
+        return _Messages._addCallback("added", callback, nodeType)
+
+    @staticmethod
+    def addNodeRemovedCallback(callback, nodeType=None, *args):
+        return _Messages._addCallback("removed", callback, nodeType)
+
+    @staticmethod
+    def addNameChangedCallback(mObject, callback, *args):
+        return _Messages._addCallback("renamed", callback, None)
+
+
+    @staticmethod
+    def removeCallbacks(callbackIds):
+        for callbackId in callbackIds:
+            del scene.callbacks[callbackId]
+
+
+MMessage = _Messages
+MDGMessage = _Messages
+MNodeMessage = _Messages
+
+
+def _nodeOf(item):
+    if isinstance(item, (MObject, MDagPath)):
+        return item._node
+    return scene.find(item)
+
+
+def _shapeOf(item):
+    node = _nodeOf(item)
+    if node.nodeType == _TRANSFORM:
+        return node.children[0]
+    return node
+
+
+class MFnDagNode(object):
+
+    def __init__(self, item):
+        self._node = _nodeOf(item)
+
+    def name(self):
+        return self._node.name
+
+    def partialPathName(self):
+        return self._node.name
+
+    def fullPathName(self):
+        return self._node.fullPath
+
+    def parent(self, index):
+        return MObject(self._node.parent)
+
+    def getPath(self, dagPath):
+        dagPath._node = self._node
+
+
+class MFnTransform(MFnDagNode):
+
+    def childCount(self):
+        return len(self._node.children)
+
+    def child(self, index):
+        return MObject(self._node.children[index])
+
+
+class MFnMesh(MFnDagNode):
+
+    def __init__(self, item):
+        self._node = _shapeOf(item)
+
+    def numVertices(self):
+        return self._node.vertexCount
+
+    def getVertices(self, polygonCounts, polygonConnects):
+        polygonCounts[:] = self._node.polygonCounts
+        polygonConnects[:] = self._node.polygonConnects
+
+
+class MItGeometry(object):
+
+    def __init__(self, item, component=None):
+        self._node = _shapeOf(item)
+
+    def count(self):
+        return self._node.vertexCount
+
+    def allPositions(self, points, space=MSpace.kObject):
+        positions = self._node.positions
+        points[:] = [MPoint(*positions[i:i + 3])
+                     for i in range(0, len(positions), 3)]
+
+
+class MItMeshVertex(object):
+
+    def __init__(self, dagPath, component=None):
+        self._dagPath = dagPath
+
+
+class MFnSingleIndexedComponent(object):
+
+    def __init__(self, component=None):
+        self._data = component._node if component is not None else None
+
+    def create(self, componentType):
+        self._data = _Component(componentType)
+        return MObject(self._data)
+
+    def addElement(self, index):
+        self._data.elements.append(index)
+
+    def addElements(self, indices):
+        self._data.elements.extend(indices)
+
+    def setCompleteData(self, count):
+        self._data.complete = count
+
+    def elementCount(self):
+        if self._data.complete is not None:
+            return self._data.complete
+        return len(self._data.elements)
+
+    def element(self, index):
+        if self._data.complete is not None:
+            return index
+        return self._data.elements[index]
+
+    def getElements(self, elements):
+        elements[:] = [self.element(i) for i in range(self.elementCount())]
+
+    def hasWeights(self):
+        return self._data.weights is not None
+
+    def weight(self, index):
+        return MWeight(self._data.weights[index])
+
+
+class MFnDoubleIndexedComponent(MFnSingleIndexedComponent):
+    pass
+
+
+class MItDependencyGraph(object):
+    kUpstream = 1
+    kDepthFirst = 0
+    kNodeLevel = 0
+
+    def __init__(self, root, filterType=None, direction=None, traversal=None,
+                 level=None):
+        self._items = []
+        shape = _nodeOf(root)
+        if shape.nodeType == _MESH and shape.skinCluster is not None:
+            self._items.append(shape.skinCluster)
+
+    def isDone(self):
+        return not self._items
+
+    def currentItem(self):
+        return MObject(self._items[0])
+
+    def next(self):
+        self._items.pop(0)
+
+
+class MItDependencyNodes(object):
+
+    def __init__(self, filterType):
+        nodeType = {MFn.kJoint: _JOINT,
+                    MFn.kSkinClusterFilter: _SKIN_CLUSTER}[filterType]
+        self._items = sorted([node for node in scene.nodes.values()
+                              if node.nodeType == nodeType],
+                             key=lambda node: node.name)
+
+    def isDone(self):
+        return not self._items
+
+    def item(self):
+        return MObject(self._items[0])
+
+    def next(self):
+        self._items.pop(0)
+
+
+class MFnSkinCluster(object):
+
+    def __init__(self, skinCluster):
+        self._node = skinCluster._node
+
+    def name(self):
+        return self._node.name
+
+    def influenceObjects(self, dagPaths):
+        del dagPaths[:]
+        for influence in self._node.influences:
+            dagPath = MDagPath()
+            dagPath._node = influence
+            dagPaths.append(dagPath)
+        return len(dagPaths)
+
+    def getPathAtIndex(self, index, dagPath):
+        dagPath._node = self._node.shape
+
+    def indexForOutputShape(self, shape):
+        if _nodeOf(shape) is not self._node.shape:
+            raise RuntimeError("not an output shape")
+        return 0
+
+    def indexForOutputConnection(self, index):
+        return index
+
+    def inputShapeAtIndex(self, index):
+        return MObject(self._node.shape)
+
+    def _rows(self, component):
+        data = component._node
+        if data.complete is not None:
+            return range(data.complete)
+        return data.elements
+
+    def getWeights(self, dagPath, component, weights, infCountPtr):
+        infCount = len(self._node.influences)
+        values = self._node.weights
+        rows = self._rows(component)
+        if component._node.complete is not None:
+            weights[:] = values
+        else:
+            weights[:] = [value for row in rows for value in
+                          values[row * infCount:(row + 1) * infCount]]
+        infCountPtr[0] = infCount
+
+    def setWeights(self, dagPath, component, influenceIndices, values,
+                   normalize=True, oldValues=None):
+        scene.setWeightsCalls += 1
+        infCount = len(self._node.influences)
+        weights = self._node.weights
+        columnCount = len(influenceIndices)
+        for i, row in enumerate(self._rows(component)):
+            rowStart = row * infCount
+            valueStart = i * columnCount
+            for k, column in enumerate(influenceIndices):
+                weights[rowStart + column] = values[valueStart + k]
+
+
+class _Commands(object):
+
+    @staticmethod
+    def about(**kwargs):
+        if kwargs.get("batch"):
+            return scene.batch
+        raise RuntimeError("{!r} is not supported by the stand-in".format(
+            kwargs))
+
+    @staticmethod
+    def objExists(name):
+        return scene.find(name) is not None
+
+    @staticmethod
+    def ls(*names, **kwargs):
+        if kwargs.get("selection") or kwargs.get("sl"):
+            found = []
+            for node, vertices in scene.selection:
+                if vertices is None or not kwargs.get("flatten"):
+                    found.append(node.fullPath if kwargs.get("long")
+                                 else node.name)
+                else:
+                    found.extend(["{}.vtx[{}]".format(node.name, vertex)
+                                  for vertex in vertices])
+            return found
+
+        nodes = [scene.find(name) for name in names]
+        return [node.fullPath if kwargs.get("long") else node.name
+                for node in nodes if node is not None]
+
+    @staticmethod
+    def listRelatives(name, **kwargs):
+        node = scene.find(name)
+        if kwargs.get("parent") or kwargs.get("p"):
+            relatives = [node.parent] if node.parent else []
+        else:
+            relatives = node.children
+            if kwargs.get("shapes"):
+                relatives = [child for child in relatives
+                             if child.nodeType == _MESH]
+        if not relatives:
+            return None
+        return [relative.fullPath if kwargs.get("fullPath")
+                else relative.name for relative in relatives]
+
+    @staticmethod
+    def getAttr(attribute):
+        return False
+
+    @staticmethod
+    def select(*names, **kwargs):
+        if kwargs.get("clear"):
+            names = []
+        scene.select([name for item in names for name in
+                      (item if isinstance(item, (list, tuple)) else [item])])
+
+    @staticmethod
+    def refresh(*args, **kwargs):
+        pass
+
+    @staticmethod
+    def xform(item, **kwargs):
+        if not (kwargs.get("query") and kwargs.get("translation") and
+                kwargs.get("objectSpace") and item.endswith(".vtx[*]")):
+            raise RuntimeError("{!r} is not supported by the stand-in".format(
+                kwargs))
+        return list(_shapeOf(item).positions)
+
+    @staticmethod
+    def skinCluster(*args, **kwargs):
+        if kwargs.get("toSelectedBones"):
+            names = args[0]
+            return [scene.addSkinCluster(names[-1], names[:-1])]
+
+        skinCluster = scene.find(args[0])
+        if kwargs.get("unbind"):
+            skinCluster.shape.skinCluster = None
+            scene._remove(skinCluster)
+            return
+
+        removed = [scene.find(influence)
+                   for influence in kwargs.get("removeInfluence", [])]
+        kept = [k for k, influence in enumerate(skinCluster.influences)
+                if influence not in removed]
+
+        infCount = len(skinCluster.influences)
+        weights = skinCluster.weights
+        skinCluster.weights = array.array("d", [
+            weights[start + k] for start in range(0, len(weights), infCount)
+            for k in kept])
+        skinCluster.influences = [skinCluster.influences[k] for k in kept]
+
+
+    @staticmethod
+    def mel(command):
+        raise RuntimeError("{!r} is not supported by the stand-in".format(
+            command))
+
+
+class _QtClass(object):
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+
+def _module(name, **attributes):
+    module = types.ModuleType(name)
+    module.__dict__.update(attributes)
+    module.__standIn__ = True
+    return module
+
+
+def isInstalled():
+    u"""Checks whether the stand-in replaces the Maya modules.
+
+    Returns:
+        bool: True if ``maya`` is the stand-in.
+    """
+
+    return getattr(sys.modules.get("maya"), "__standIn__", False)
+
+
+def install():
+    u"""Replaces the Maya and Qt modules with the stand-in.
+
+    Must be called before `rigTools.bSkinSaver` is first imported. Calling
+    it again clears the scene.
+
+    Returns:
+        `Scene`: The scene of the stand-in.
+
+    Raises:
+        RuntimeError: If the real Maya modules are already imported.
+    """
+
+    if "maya" in sys.modules and not isInstalled():
+        raise RuntimeError("the Maya modules are already imported")
+
+    scene.clear()
+    if isInstalled():
+        return scene
+
+    openMaya = _module("maya.OpenMaya")
+    for name, value in list(globals().items()):
+        if name.startswith("M") and isinstance(value, type):
+            setattr(openMaya, name, value)
+
+    modules = {
+        "maya.OpenMaya": openMaya,
+        "maya.OpenMayaAnim": _module("maya.OpenMayaAnim",
+                                     MFnSkinCluster=MFnSkinCluster),
+        "maya.OpenMayaUI": _module("maya.OpenMayaUI", MQtUtil=_module(
+            "MQtUtil", mainWindow=lambda: None)),
+        "maya.mel": _module("maya.mel", eval=_Commands.mel),
+        "maya.cmds": _module("maya.cmds", **dict(
+            [(name, getattr(_Commands, name)) for name in
+             ["about", "objExists", "ls", "listRelatives", "getAttr", "select",
+              "refresh", "skinCluster", "xform"]])),
+        "PySide2.QtCore": _module("PySide2.QtCore", Qt=_QtClass),
+        "PySide2.QtWidgets": _module("PySide2.QtWidgets", QDialog=_QtClass,
+                                     QWidget=_QtClass),
+        "shiboken2": _module("shiboken2",
+                             wrapInstance=lambda pointer, cls: None)}
+    modules["maya"] = _module("maya")
+    modules["PySide2"] = _module("PySide2")
+
+    for name, module in modules.items():
+        if "." in name:
+            packageName, moduleName = name.rsplit(".", 1)
+            setattr(modules[packageName], moduleName, module)
+    sys.modules.update(modules)
+
+    return scene
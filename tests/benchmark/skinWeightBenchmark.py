@@ -0,0 +1,741 @@
+# -*- coding: utf-8 -*-
+u"""Skin weight I/O benchmarks.
+
+Times every stage of saving and loading skin weights on synthetic meshes,
+over a grid of vertex and influence counts, and compares the timings to the
+baseline committed next to this module, ``baseline.json``, so regressions
+show up in CI. It runs with any Python interpreter, without Maya:
+
+* the parse, format and compression stages of `rigTools.skinWeightFile` are
+  timed as they are;
+* the Maya-facing stages, ``bSaveSkinValues``, ``bLoadSkinValues``,
+  ``bSaveVertexSkinValues`` and ``bLoadVertexSkinValues``, are timed against
+  `tests.benchmark.mayaStandIn`, so they measure the Python side of the tools
+  only. They are skipped if the real Maya modules are loaded.
+
+Every stage is timed relative to a reference, plain Python work that does
+not use the tools, timed right before every run of the stage, so the
+comparison depends neither on the speed of the machine nor on its load. The
+baseline holds the results of every environment, Python version and NumPy or
+not, separately, as the relative cost of the stages differs between them; a
+run is compared to the results of its own environment only.
+
+It also compares the file size and decode time of the compression settings
+on a weight file saved by `rigTools.bSkinSaver`.
+
+Usage, from the root of the repository::
+
+    python -m tests.benchmark.skinWeightBenchmark --output results.json
+    python -m tests.benchmark.skinWeightBenchmark --baseline
+    python -m tests.benchmark.skinWeightBenchmark --baseline --update-baseline
+    python -m tests.benchmark.skinWeightBenchmark --compression body.swb
+
+The exit status is 1 if a stage is slower than its baseline, relative to the
+reference, by more than the tolerance. ``--update-baseline`` replaces the
+results of the current environment only.
+"""
+
+import argparse
+import array
+import json
+import math
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import timeit
+
+# Adds the source folder to sys.path, if it not already there, so the
+# benchmarks can see the modules:
+tests_dir = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+root_dir = os.path.dirname(tests_dir)
+src_dir = os.path.join(root_dir, "code", "python", "src")
+
+for path in sys.path:
+    if path == src_dir:
+        break
+else:
+    sys.path.append(src_dir)
+
+from rigTools import skinWeightFile
+
+from . import mayaStandIn
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.realpath(__file__)),
+                                "baseline.json")
+u"""str: Path of the committed baseline."""
+
+DEFAULT_VERTEX_COUNTS = [1000, 10000, 100000, 500000, 2000000]
+u"""list[int]: Vertex counts of the synthetic meshes."""
+
+DEFAULT_INFLUENCE_COUNTS = [8, 32, 128, 500]
+u"""list[int]: Influence counts of the synthetic meshes."""
+
+DEFAULT_MAX_VALUES = 10 ** 7
+u"""int: Largest vertex count x influence count benchmarked. Larger meshes of
+the grid are skipped, as their dense weights do not fit in memory as Python
+lists."""
+
+DEFAULT_TOLERANCE = 0.25
+u"""float: Slowdown relative to the baseline reported as a regression."""
+
+DEFAULT_MIN_SECONDS = 0.01
+u"""float: Timings below it in the baseline are too noisy to compare."""
+
+REFERENCE_VALUES = 100000
+u"""int: Number of values formatted and summed by the reference work the
+stages are timed relative to."""
+
+RESULTS_VERSION = 2
+
+BASELINE_VERSION = 2
+
+_NON_ZERO = 4
+
+
+def syntheticSkinWeights(vertexCount, influenceCount, nonZero=_NON_ZERO,
+                         seed=0):
+    u"""Generates the skin weights of a synthetic mesh.
+
+    The vertices lie on a wavy sheet. Every vertex is weighted to
+    ``nonZero`` consecutive influences picked from its position, so
+    neighbouring vertices share influences like on a skinned character, and
+    its weights add up to 1.
+
+    Args:
+        vertexCount (int): Number of vertices.
+        influenceCount (int): Number of influences.
+        nonZero (int, optional): Number of influences per vertex. Defaults to
+            4.
+        seed (int, optional): Seed of the random weights. Defaults to 0.
+
+    Returns:
+        `rigTools.skinWeightFile.SkinWeights`: Weights and rest positions of
+        the mesh, named ``benchmark_geo``.
+    """
+
+    influences = ["benchmark{}_jnt".format(k) for k in range(influenceCount)]
+    nonZero = min(nonZero, influenceCount)
+    side = max(int(vertexCount ** 0.5), 1)
+
+    if numpy is not None:
+        rows = numpy.arange(vertexCount)
+        u = (rows % side) / float(side)
+        v = (rows // side) / float(side)
+        positions = numpy.column_stack([u, v, 0.1 * numpy.sin(6.0 * u)])
+
+        first = (u * (influenceCount - nonZero + 1)).astype(numpy.int64)
+        values = numpy.random.RandomState(seed).rand(vertexCount, nonZero)
+        values /= values.sum(axis=1)[:, None]
+        weights = numpy.zeros((vertexCount, influenceCount))
+        weights[rows[:, None], first[:, None] + numpy.arange(nonZero)] = \
+            values
+
+        return skinWeightFile.SkinWeights("benchmark_geo", influences,
+                                          weights.ravel(), positions.ravel())
+
+    randomValues = random.Random(seed)
+    positions = array.array("d")
+    weights = array.array("d", [0.0]) * (vertexCount * influenceCount)
+    for i in range(vertexCount):
+        u = (i % side) / float(side)
+        v = (i // side) / float(side)
+        positions.extend([u, v, 0.1 * math.sin(6.0 * u)])
+
+        values = [randomValues.random() for k in range(nonZero)]
+        total = sum(values)
+        start = i * influenceCount + int(u * (influenceCount - nonZero + 1))
+        for k, value in enumerate(values):
+            weights[start + k] = value / total
+
+    return skinWeightFile.SkinWeights("benchmark_geo", influences, weights,
+                                      positions)
+
+
+class _Context(object):
+
+    def __init__(self, skinWeights, workDir):
+        self.skinWeights = skinWeights
+        self.workDir = workDir
+        self.bSkinSaver = None
+        self.scene = None
+
+    def path(self, fileName):
+        return os.path.join(self.workDir, fileName)
+
+
+def _formatText(context):
+    skinWeightFile.writeSwt(context.path("format.swt"),
+                            [context.skinWeights])
+
+
+def _parseText(context):
+    skinWeightFile.readSwt(context.path("weights.swt"))
+
+
+def _writeBinary(context):
+    skinWeightFile.writeSwb(context.path("write.swb"), [context.skinWeights])
+
+
+def _readBinary(context):
+    skinWeightFile.readSwb(context.path("weights.swb"))
+
+
+def _writeCompressed(context):
+    skinWeightFile.compressWeightFile(context.path("weights.swb"),
+                                      context.path("write.swz"))
+
+
+def _readCompressed(context):
+    for skinWeights in skinWeightFile.iterWeightFile(
+            context.path("weights.swz")):
+        if isinstance(skinWeights, skinWeightFile.SkinWeightStream):
+            for block in skinWeights.blocks:
+                pass
+
+
+def _formatVertexText(context):
+    skinWeights = context.skinWeights
+    skinWeightFile.formatWeightRows(
+        skinWeights.weights, skinWeights.influenceCount,
+        rowPrefixes=["%d:" % i for i in range(skinWeights.vertexCount)])
+
+
+def _saveSkinValues(context):
+    context.scene.select([context.skinWeights.name])
+    context.bSkinSaver.bSaveSkinValues(context.path("save.swt"))
+
+
+def _saveSkinValuesBinary(context):
+    context.scene.select([context.skinWeights.name])
+    context.bSkinSaver.bSaveSkinValues(context.path("save.swb"))
+
+
+def _loadSkinValues(context):
+    context.bSkinSaver.bLoadSkinValues(False, context.path("weights.swt"))
+
+
+def _loadSkinValuesBinary(context):
+    context.bSkinSaver.bLoadSkinValues(False, context.path("weights.swb"))
+
+
+def _saveVertexSkinValues(context):
+    context.scene.select([context.skinWeights.name],
+                         range(context.skinWeights.vertexCount))
+    context.bSkinSaver.bSaveVertexSkinValues(context.path("save.vtx"), True)
+
+
+def _loadVertexSkinValues(context):
+    context.scene.select([context.skinWeights.name])
+    context.bSkinSaver.bLoadVertexSkinValues(context.path("weights.vtx"),
+                                             True)
+
+
+STAGES = [
+    ("formatText", False, _formatText),
+    ("parseText", False, _parseText),
+    ("writeBinary", False, _writeBinary),
+    ("readBinary", False, _readBinary),
+    ("writeCompressed", False, _writeCompressed),
+    ("readCompressed", False, _readCompressed),
+    ("formatVertexText", False, _formatVertexText),
+    ("bSaveSkinValues", True, _saveSkinValues),
+    ("bSaveSkinValuesBinary", True, _saveSkinValuesBinary),
+    ("bLoadSkinValues", True, _loadSkinValues),
+    ("bLoadSkinValuesBinary", True, _loadSkinValuesBinary),
+    ("bSaveVertexSkinValues", True, _saveVertexSkinValues),
+    ("bLoadVertexSkinValues", True, _loadVertexSkinValues)]
+u"""list[tuple]: Stages of the suite, as ``(name, needs Maya, function)``."""
+
+
+def _writeFiles(context):
+    skinWeights = context.skinWeights
+    skinWeightFile.writeSwt(context.path("weights.swt"), [skinWeights])
+    skinWeightFile.writeSwb(context.path("weights.swb"), [skinWeights])
+    skinWeightFile.compressWeightFile(context.path("weights.swb"),
+                                      context.path("weights.swz"))
+
+    with open(context.path("weights.vtx"), "w") as output:
+        output.write("%d\n" % skinWeights.vertexCount)
+        for influence in skinWeights.influences:
+            output.write(influence + "\n")
+        output.write(skinWeightFile.SEPARATOR + "\n")
+        output.write(skinWeightFile.formatWeightRows(
+            skinWeights.weights, skinWeights.influenceCount,
+            rowPrefixes=["%d:" % i for i in range(skinWeights.vertexCount)]))
+
+
+def _setUpScene(context):
+    try:
+        context.scene = mayaStandIn.install()
+    except RuntimeError:
+        return False
+
+    from rigTools import bSkinSaver
+    context.bSkinSaver = bSkinSaver
+
+    skinWeights = context.skinWeights
+    context.scene.addSkinnedMesh(skinWeights.name,
+                                 skinWeightFile.toFloatList(
+                                     skinWeights.positions),
+                                 skinWeights.influences,
+                                 skinWeightFile.toFloatList(
+                                     skinWeights.weights))
+    return True
+
+
+class _NullOutput(object):
+
+    def write(self, text):
+        pass
+
+    def flush(self):
+        pass
+
+
+def _reference(values):
+    " ".join([repr(value) for value in values])
+    sum(values)
+
+
+def _time(function, context, repeat, quiet):
+    times = []
+    referenceTimes = []
+    referenceValues = [float(i) / REFERENCE_VALUES
+                       for i in range(REFERENCE_VALUES)]
+    stdout = sys.stdout
+    try:
+        if quiet:
+            sys.stdout = _NullOutput()
+        for i in range(repeat):
+            timeBefore = timeit.default_timer()
+            _reference(referenceValues)
+            referenceTimes.append(timeit.default_timer() - timeBefore)
+
+            timeBefore = timeit.default_timer()
+            function(context)
+            times.append(timeit.default_timer() - timeBefore)
+    finally:
+        sys.stdout = stdout
+
+    return min(times), min(referenceTimes)
+
+
+def runSuite(vertexCounts=None, influenceCounts=None, stages=None, repeat=3,
+             maxValues=DEFAULT_MAX_VALUES, verbose=True):
+    u"""Times the stages of the suite on every synthetic mesh of the grid.
+
+    Args:
+        vertexCounts (list[int], optional): Vertex counts of the grid.
+            Defaults to `DEFAULT_VERTEX_COUNTS`.
+        influenceCounts (list[int], optional): Influence counts of the grid.
+            Defaults to `DEFAULT_INFLUENCE_COUNTS`.
+        stages (list[str], optional): Names of the stages to time. Defaults
+            to None, meaning all the `STAGES`.
+        repeat (int, optional): Number of runs per stage; the fastest is
+            kept. Defaults to 3.
+        maxValues (int, optional): Skip the meshes with more weights than
+            this. Defaults to `DEFAULT_MAX_VALUES`.
+        verbose (bool, optional): Print every timing as it is measured.
+            Defaults to True.
+
+    Returns:
+        dict: The ``results``, one ``{"stage", "vertexCount",
+        "influenceCount", "seconds", "reference"}`` dict per timing, the
+        ``reference`` being the seconds the reference work took next to the
+        stage, the ``skipped`` ``[vertexCount, influenceCount]`` pairs, the
+        interpreter it ran on and its `environment`.
+    """
+
+    if vertexCounts is None:
+        vertexCounts = DEFAULT_VERTEX_COUNTS
+    if influenceCounts is None:
+        influenceCounts = DEFAULT_INFLUENCE_COUNTS
+
+    selected = [stage for stage in STAGES
+                if stages is None or stage[0] in stages]
+    report = {"version": RESULTS_VERSION,
+              "environment": environment(),
+              "python": platform.python_version(),
+              "numpy": numpy is not None,
+              "results": [],
+              "skipped": []}
+
+    for vertexCount in vertexCounts:
+        for influenceCount in influenceCounts:
+            if vertexCount * influenceCount > maxValues:
+                report["skipped"].append([vertexCount, influenceCount])
+                continue
+
+            workDir = tempfile.mkdtemp(prefix="skinWeightBenchmark")
+            try:
+                context = _Context(syntheticSkinWeights(vertexCount,
+                                                        influenceCount),
+                                   workDir)
+                _writeFiles(context)
+                hasScene = any([needsMaya for name, needsMaya, function in
+                                selected]) and _setUpScene(context)
+
+                for name, needsMaya, function in selected:
+                    if needsMaya and not hasScene:
+                        continue
+                    seconds, reference = _time(function, context, repeat,
+                                               needsMaya)
+                    report["results"].append({
+                        "stage": name,
+                        "vertexCount": vertexCount,
+                        "influenceCount": influenceCount,
+                        "seconds": seconds,
+                        "reference": reference})
+                    if verbose:
+                        print("{:<24}{:>10}{:>6}{:>12.4f}".format(
+                            name, vertexCount, influenceCount, seconds))
+            finally:
+                shutil.rmtree(workDir, ignore_errors=True)
+
+    return report
+
+
+def environment():
+    u"""Names the environment the benchmarks run in.
+
+    Returns:
+        str: The Python version, major and minor, and whether NumPy is
+        used, like ``"python3.11-numpy"``.
+    """
+
+    name = "python{}.{}".format(*sys.version_info[:2])
+    if numpy is not None:
+        name += "-numpy"
+
+    return name
+
+
+def readResults(filePath):
+    u"""Reads results saved by `writeResults`.
+
+    Args:
+        filePath (str): Path of the JSON file.
+
+    Returns:
+        dict: The results, as returned by `runSuite`.
+    """
+
+    with open(filePath, "r") as f:
+        return json.load(f)
+
+
+def writeResults(filePath, results):
+    u"""Saves results as JSON.
+
+    Args:
+        filePath (str): Path of the JSON file.
+        results (dict): Results of `runSuite`.
+    """
+
+    with open(filePath, "w") as output:
+        json.dump(results, output, indent=1, sort_keys=True)
+
+
+def readBaseline(filePath, name=None):
+    u"""Reads the results of one environment from a baseline file.
+
+    Args:
+        filePath (str): Path of the baseline, as saved by `updateBaseline`.
+        name (str, optional): Name of the environment. Defaults to None,
+            meaning the current `environment`.
+
+    Returns:
+        dict: The results of the environment, as returned by `runSuite`, or
+        None if the file or the environment is missing.
+    """
+
+    if not os.path.exists(filePath):
+        return None
+
+    baseline = readResults(filePath)
+    if baseline.get("version") != BASELINE_VERSION:
+        return None
+
+    return baseline["environments"].get(name or environment())
+
+
+def updateBaseline(filePath, results):
+    u"""Saves results as the baseline of their environment.
+
+    The results of the other environments already in the file are kept.
+
+    Args:
+        filePath (str): Path of the baseline.
+        results (dict): Results of `runSuite`.
+    """
+
+    baseline = {"version": BASELINE_VERSION, "environments": {}}
+    if os.path.exists(filePath):
+        baseline = readResults(filePath)
+        if baseline.get("version") != BASELINE_VERSION:
+            baseline = {"version": BASELINE_VERSION, "environments": {}}
+
+    baseline["environments"][results["environment"]] = results
+    writeResults(filePath, baseline)
+
+
+def compareResults(results, baseline, tolerance=DEFAULT_TOLERANCE,
+                   minSeconds=DEFAULT_MIN_SECONDS):
+    u"""Finds the stages that got slower than the baseline.
+
+    Every timing is divided by the time the reference work took next to it,
+    in the same run, before it is compared, so results measured on a faster,
+    slower or busier machine than the baseline compare all the same.
+
+    Args:
+        results (dict): Results of `runSuite`.
+        baseline (dict): Earlier results of `runSuite`, in the same
+            environment.
+        tolerance (float, optional): Slowdown allowed, 0.25 allows 25 %.
+            Defaults to `DEFAULT_TOLERANCE`.
+        minSeconds (float, optional): Ignore the stages that took less than
+            this in the baseline. Defaults to `DEFAULT_MIN_SECONDS`.
+
+    Returns:
+        list[dict]: The ``stage``, ``vertexCount``, ``influenceCount`` and
+        ``seconds`` of every regression, the timing relative to the reference
+        work in the ``baseline`` and in the results (``relative``), and
+        their ``ratio``.
+    """
+
+    def key(result):
+        return (result["stage"], result["vertexCount"],
+                result["influenceCount"])
+
+    baselineResults = dict([(key(result), result)
+                            for result in baseline["results"]])
+
+    regressions = []
+    for result in results["results"]:
+        before = baselineResults.get(key(result))
+        if before is None or before["seconds"] < minSeconds:
+            continue
+
+        relative = result["seconds"] / result["reference"]
+        relativeBefore = before["seconds"] / before["reference"]
+        if relative > relativeBefore * (1.0 + tolerance):
+            regression = dict(result)
+            regression["baseline"] = relativeBefore
+            regression["relative"] = relative
+            regression["ratio"] = relative / relativeBefore
+            regressions.append(regression)
+
+    return regressions
+
+
+def printRegressions(regressions):
+    u"""Prints the regressions found by `compareResults`.
+
+    Args:
+        regressions (list[dict]): Regressions of `compareResults`.
+    """
+
+    if not regressions:
+        print("no regressions")
+        return
+
+    print("{:<24}{:>10}{:>6}{:>12}{:>12}{:>8}".format(
+        "regression", "vertices", "infl", "baseline x", "relative x",
+        "ratio"))
+    for regression in regressions:
+        print("{:<24}{:>10}{:>6}{:>12.3f}{:>12.3f}{:>8.2f}".format(
+            regression["stage"], regression["vertexCount"],
+            regression["influenceCount"], regression["baseline"],
+            regression["relative"], regression["ratio"]))
+
+
+def compressionSettings():
+    u"""Gets the compression settings compared by default.
+
+    Returns:
+        list[tuple]: ``(compression, level)`` pairs. The first one, ``(None,
+        0)``, is the uncompressed file. lzma is only included if the
+        interpreter has it.
+    """
+
+    settings = [(None, 0)]
+    settings += [(skinWeightFile.ZLIB, level) for level in (1, 6, 9)]
+    if skinWeightFile.lzma is not None:
+        settings += [(skinWeightFile.LZMA, level) for level in (0, 6)]
+
+    return settings
+
+
+def _decodeTime(filePath, workers, repeat):
+    times = []
+    for i in range(repeat):
+        timeBefore = timeit.default_timer()
+        for skinWeights in skinWeightFile.iterWeightFile(filePath,
+                                                         workers=workers):
+            if isinstance(skinWeights, skinWeightFile.SkinWeightStream):
+                for block in skinWeights.blocks:
+                    pass
+        times.append(timeit.default_timer() - timeBefore)
+
+    return min(times)
+
+
+def benchmarkCompression(inputFile, settings=None, workers=0, repeat=3,
+                         chunkSize=skinWeightFile.DEFAULT_CHUNK_SIZE):
+    u"""Compares the bytes read and the decode time of compression settings.
+
+    The weight file is compressed with every setting into a temporary folder
+    and each result is read back ``repeat`` times; the fastest read is kept.
+    Reading decodes every weight, as loading the file would.
+
+    Args:
+        inputFile (str): Path of a ``.swt`` or ``.swb`` file.
+        settings (list[tuple], optional): ``(compression, level)`` pairs.
+            Defaults to `compressionSettings`.
+        workers (int, optional): Number of threads decompressing chunks.
+            Defaults to 0.
+        repeat (int, optional): Number of reads per setting. Defaults to 3.
+        chunkSize (int, optional): Uncompressed bytes per chunk. Defaults to
+            `rigTools.skinWeightFile.DEFAULT_CHUNK_SIZE`.
+
+    Returns:
+        list[dict]: One result per setting, with the ``compression``,
+        ``level``, ``bytesRead``, ``ratio`` (bytes read / uncompressed bytes)
+        and ``decodeTime`` (seconds).
+    """
+
+    if settings is None:
+        settings = compressionSettings()
+
+    rawSize = os.path.getsize(inputFile)
+    tempDir = tempfile.mkdtemp(prefix="skinWeightBenchmark")
+
+    results = []
+    try:
+        for compression, level in settings:
+            if compression:
+                filePath = os.path.join(
+                    tempDir, "%s%d%s" % (compression, level,
+                                         skinWeightFile.COMPRESSED_EXTENSION))
+                skinWeightFile.compressWeightFile(inputFile, filePath,
+                                                  compression, level,
+                                                  chunkSize)
+            else:
+                filePath = inputFile
+
+            bytesRead = os.path.getsize(filePath)
+            results.append({
+                "compression": compression,
+                "level": level,
+                "bytesRead": bytesRead,
+                "ratio": float(bytesRead) / rawSize if rawSize else 1.0,
+                "decodeTime": _decodeTime(filePath, workers, repeat)})
+    finally:
+        shutil.rmtree(tempDir, ignore_errors=True)
+
+    return results
+
+
+def printCompressionReport(results):
+    u"""Prints the results of `benchmarkCompression` as a table.
+
+    Args:
+        results (list[dict]): Results of `benchmarkCompression`.
+    """
+
+    print("{:<12}{:>14}{:>8}{:>12}".format("setting", "bytes read",
+                                           "ratio", "decode s"))
+    for result in results:
+        if result["compression"]:
+            setting = "{}-{}".format(result["compression"], result["level"])
+        else:
+            setting = "none"
+        print("{:<12}{:>14}{:>8.3f}{:>12.4f}".format(
+            setting, result["bytesRead"], result["ratio"],
+            result["decodeTime"]))
+
+
+def _intList(text):
+    return [int(value) for value in text.split(",")]
+
+
+def main(argv=None):
+    u"""Runs the benchmarks from the command line.
+
+    Args:
+        argv (list[str], optional): Command line arguments. Defaults to None,
+            meaning ``sys.argv[1:]``.
+
+    Returns:
+        int: 1 if a stage regressed against the baseline, else 0.
+    """
+
+    parser = argparse.ArgumentParser(
+        prog="skinWeightBenchmark",
+        description="Skin weight I/O benchmarks.")
+    parser.add_argument("--vertex-counts", type=_intList,
+                        default=DEFAULT_VERTEX_COUNTS)
+    parser.add_argument("--influence-counts", type=_intList,
+                        default=DEFAULT_INFLUENCE_COUNTS)
+    parser.add_argument("--stages", type=lambda text: text.split(","),
+                        help="comma separated stage names, default all")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--max-values", type=int, default=DEFAULT_MAX_VALUES)
+    parser.add_argument("--output", help="save the results to this file")
+    parser.add_argument("--baseline", nargs="?", const=DEFAULT_BASELINE,
+                        help="compare to the results saved in this file, "
+                        "default the committed baseline")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument("--update-baseline", action="store_true",
+                        help="save the results as the new baseline")
+    parser.add_argument("--compression", metavar="WEIGHT_FILE",
+                        help="compare the compression settings on this "
+                        "weight file instead of running the stages")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="threads decompressing chunks with "
+                        "--compression")
+    args = parser.parse_args(argv)
+
+    if args.compression:
+        printCompressionReport(benchmarkCompression(
+            args.compression, workers=args.workers, repeat=args.repeat))
+        return 0
+
+    if args.update_baseline and not args.baseline:
+        args.baseline = DEFAULT_BASELINE
+    baseline = None
+    if args.baseline and not args.update_baseline:
+        baseline = readBaseline(args.baseline)
+        if baseline is None:
+            parser.error("no {} baseline in {}, save one with "
+                         "--update-baseline".format(environment(),
+                                                    args.baseline))
+
+    results = runSuite(args.vertex_counts, args.influence_counts,
+                       args.stages, args.repeat, args.max_values)
+    if args.output:
+        writeResults(args.output, results)
+
+    regressions = []
+    if args.update_baseline:
+        updateBaseline(args.baseline, results)
+        print("saved the {} baseline in {}".format(results["environment"],
+                                                   args.baseline))
+    elif baseline is not None:
+        regressions = compareResults(results, baseline, args.tolerance)
+        printRegressions(regressions)
+
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,240 @@
+# -*- coding: utf-8 -*-
+u"""Tests of `rigTools.bSkinSaver`, run on `tests.benchmark.mayaStandIn`."""
+
+import os
+import random
+import shutil
+import sys
+import tempfile
+import unittest
+
+# Adds the source folder to sys.path, if it not already there,
+# so unit tests can see the modules:
+tests_dir = os.path.dirname(os.path.realpath(__file__))
+root_dir = os.path.dirname(tests_dir)
+src_dir = os.path.join(root_dir, "code", "python", "src")
+
+for path in sys.path:
+    if path == src_dir:
+        break
+else:
+    sys.path.append(src_dir)
+
+from rigTools import skinWeightFile
+
+from .benchmark import mayaStandIn
+
+bSkinSaver = None
+
+
+def setUpModule():
+    global bSkinSaver
+
+    try:
+        mayaStandIn.install()
+    except RuntimeError:
+        raise unittest.SkipTest("the real Maya modules are imported")
+
+    from rigTools import bSkinSaver
+
+
+INFLUENCES = ["a_jnt", "b_jnt", "c_jnt"]
+
+
+def meshWeights(vertexCount, seed=0):
+    u"""Gets random positions and normalized weights of a mesh."""
+
+    randomValues = random.Random(seed)
+    positions = [randomValues.uniform(-1.0, 1.0)
+                 for i in range(vertexCount * 3)]
+    weights = []
+    for i in range(vertexCount):
+        a = randomValues.random()
+        weights.extend([a, (1.0 - a) / 2, (1.0 - a) / 2])
+
+    return positions, weights
+
+
+class TestSkinFiles(unittest.TestCase):
+
+    def setUp(self):
+        self.tempDir = tempfile.mkdtemp(prefix="test_bSkinSaver")
+        self.scene = mayaStandIn.install()
+        bSkinSaver.invalidateInfluenceIndex()
+        bSkinSaver.invalidateSkinClusterCache()
+
+        self.positions, self.weights = meshWeights(40)
+        self.scene.addSkinnedMesh("body_geo", self.positions, INFLUENCES,
+                                  self.weights)
+
+    def tearDown(self):
+        shutil.rmtree(self.tempDir, ignore_errors=True)
+
+    def path(self, fileName):
+        return os.path.join(self.tempDir, fileName)
+
+    def assertWeights(self, meshName, influences, weights, places=6):
+        sceneInfluences, sceneWeights = self.scene.weights(meshName)
+        self.assertEqual(sceneInfluences, influences)
+        self.assertEqual(len(sceneWeights), len(weights))
+        for a, b in zip(sceneWeights, weights):
+            self.assertAlmostEqual(a, b, places=places)
+
+    def testRoundTrip(self):
+        # the rest positions are only saved in text files on request
+        for fileName, positions, saved in [("body.swt", None, False),
+                                           ("body.swt", True, True),
+                                           ("body.swb", None, True),
+                                           ("body.swz", None, False)]:
+            self.scene.select(["body_geo"])
+            bSkinSaver.bSaveSkinValues(self.path(fileName),
+                                       positions=positions)
+
+            self.scene.addSkinCluster("body_geo", INFLUENCES)
+            bSkinSaver.bLoadSkinValues(False, self.path(fileName))
+            self.assertWeights("body_geo", INFLUENCES, self.weights)
+
+            skinWeights = skinWeightFile.readWeightFile(
+                self.path(fileName))[0]
+            self.assertEqual(skinWeights.vertexCount, 40)
+            if not saved:
+                self.assertIsNone(skinWeights.positions)
+                continue
+            for a, b in zip(skinWeightFile.toFloatList(skinWeights.positions),
+                            self.positions):
+                self.assertAlmostEqual(a, b, places=6)
+
+    def testBlocks(self):
+        bSkinSaver.bSaveSkinValues(self.path("body.swt"),
+                                   objectNames=["body_geo"])
+
+        # one setWeights call, then range components and a shorter last
+        # block
+        for blockSize in (None, 7):
+            self.scene.addSkinCluster("body_geo", INFLUENCES)
+            bSkinSaver.bLoadSkinValues(False, self.path("body.swt"),
+                                       blockSize=blockSize)
+            self.assertWeights("body_geo", INFLUENCES, self.weights)
+
+    def testPrune(self):
+        bSkinSaver.bSaveSkinValues(self.path("body.swt"),
+                                   objectNames=["body_geo"])
+        weights = skinWeightFile.readWeightFile(
+            self.path("body.swt"))[0].weights
+        expected = skinWeightFile.toFloatList(skinWeightFile.pruneWeights(
+            weights, len(INFLUENCES), 0.3, 2)[0])
+
+        for blockSize in (None, 7):
+            self.scene.addSkinCluster("body_geo", INFLUENCES)
+            bSkinSaver.bLoadSkinValues(False, self.path("body.swt"),
+                                       blockSize=blockSize,
+                                       pruneThreshold=0.3, maxInfluences=2)
+            self.assertEqual(list(self.scene.weights("body_geo")[1]),
+                             expected)
+
+    def testUnindexedStream(self):
+        self.scene.addMesh("head_geo", self.positions[:60])
+        skinWeightFile.writeSwt(self.path("body.swt"), [
+            skinWeightFile.SkinWeights("missing_geo", INFLUENCES,
+                                       self.weights),
+            skinWeightFile.SkinWeights("body_geo", INFLUENCES, self.weights),
+            skinWeightFile.SkinWeights("head_geo", INFLUENCES, self.weights)])
+
+        # the rows are counted as they are set, without an index
+        self.scene.addSkinCluster("body_geo", INFLUENCES)
+        streams = skinWeightFile.iterWeightFile(self.path("body.swt"), 7)
+        self.assertEqual(bSkinSaver.bLoadSkinObjects(streams, 7),
+                         ["missing_geo", "head_geo"])
+        self.assertWeights("body_geo", INFLUENCES, self.weights)
+
+    def testHeadless(self):
+        self.scene.select([])
+        bSkinSaver.bSaveSkinValues(self.path("body.swb"),
+                                   objectNames=["body_geo"])
+
+        self.scene.addSkinCluster("body_geo", INFLUENCES)
+        bSkinSaver.bLoadSkinValues(False, self.path("body.swb"))
+        self.assertWeights("body_geo", INFLUENCES, self.weights)
+        self.assertEqual(self.scene.selection, [])
+
+    def testTransferByPosition(self):
+        self.scene.addMesh("head_geo", self.positions[:60])
+        skinWeightFile.writeSwt(self.path("head.swt"), [
+            skinWeightFile.SkinWeights("head_geo", INFLUENCES, self.weights,
+                                       self.positions)])
+
+        bSkinSaver.bLoadSkinValues(False, self.path("head.swt"))
+        self.assertWeights("head_geo", INFLUENCES, self.weights[:60])
+
+    def testVertexCountMismatch(self):
+        self.scene.addMesh("head_geo", self.positions[:60])
+        objects = [skinWeightFile.SkinWeights("head_geo", INFLUENCES,
+                                              self.weights)]
+
+        self.assertEqual(bSkinSaver.bLoadSkinObjects(objects), ["head_geo"])
+        self.assertIsNone(self.scene.find("head_geoShape").skinCluster)
+
+    def testMissingInfluence(self):
+        self.scene.addMesh("head_geo", self.positions)
+        objects = [skinWeightFile.SkinWeights(
+            "head_geo", ["a_jnt", "b_jnt", "d_jnt"], self.weights)]
+
+        self.assertEqual(bSkinSaver.bLoadSkinObjects(objects), ["head_geo"])
+        self.assertIsNone(self.scene.find("head_geoShape").skinCluster)
+
+    def testAmbiguousInfluence(self):
+        self.scene.addJoint("A:d_jnt")
+        self.scene.addJoint("B:d_jnt")
+        self.scene.addMesh("head_geo", self.positions)
+        objects = [skinWeightFile.SkinWeights(
+            "head_geo", ["a_jnt", "b_jnt", "d_jnt"], self.weights)]
+
+        self.assertEqual(bSkinSaver.bLoadSkinObjects(objects), ["head_geo"])
+        self.assertIsNone(self.scene.find("head_geoShape").skinCluster)
+
+    def testVertexFile(self):
+        vertices = list(range(0, 40, 4))
+        self.scene.select(["body_geo"], vertices)
+        bSkinSaver.bSaveVertexSkinValues(self.path("body.vtx"), True)
+
+        self.scene.addSkinCluster("body_geo", INFLUENCES)
+        self.scene.select(["body_geo"])
+        bSkinSaver.bLoadVertexSkinValues(self.path("body.vtx"), True)
+
+        expected = [1.0, 0.0, 0.0] * 40
+        for i in vertices:
+            expected[i * 3:i * 3 + 3] = self.weights[i * 3:i * 3 + 3]
+        self.assertWeights("body_geo", INFLUENCES, expected)
+
+
+    def testSelectedVertices(self):
+        self.scene.select(["body_geo"], [3, 5, 8], [1.0, 0.5, 0.25])
+
+        self.assertEqual(bSkinSaver.getSelectedVertices(), [3, 5, 8])
+        self.assertEqual(bSkinSaver.getSoftSelection(),
+                         ([3, 5, 8], [1.0, 0.5, 0.25]))
+
+
+    def testTopologyFingerprint(self):
+        quads = [[0, 1, 4, 3], [1, 2, 5, 4]]
+        self.scene.addMesh("left_geo", self.positions[:18], quads)
+        self.scene.addMesh("right_geo", self.positions[18:36], quads)
+        self.scene.addMesh("other_geo", self.positions[:18],
+                           [[0, 1, 4, 3], [2, 1, 4, 5]])
+
+        fingerprint = bSkinSaver.bTopologyFingerprint("left_geo")
+        self.assertEqual(bSkinSaver.bTopologyFingerprint("right_geo"),
+                         fingerprint)
+        self.assertNotEqual(bSkinSaver.bTopologyFingerprint("other_geo"),
+                            fingerprint)
+
+
+    def testVertexToId(self):
+        self.assertEqual(bSkinSaver.vertexToId("body_geo.vtx[12]"), 12)
+        self.assertEqual(bSkinSaver.vertexToIdList(["body_geo.vtx[3]",
+                                                    "body_geo.vtx[5]"]),
+                         [3, 5])
+
+
+if __name__ == "__main__":
+    unittest.main()
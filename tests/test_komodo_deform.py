@@ -0,0 +1,241 @@
+# -*- coding: utf-8 -*-
+u"""Tests of the skin weight functions of `komodoRig.komodo_deform`, run on
+`tests.benchmark.mayaStandIn`."""
+
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import unittest
+
+# Adds the source folder to sys.path, if it not already there,
+# so unit tests can see the modules:
+tests_dir = os.path.dirname(os.path.realpath(__file__))
+root_dir = os.path.dirname(tests_dir)
+src_dir = os.path.join(root_dir, "code", "python", "src")
+
+for path in sys.path:
+    if path == src_dir:
+        break
+else:
+    sys.path.append(src_dir)
+
+from rigTools import skinWeightCache
+from rigTools import skinWeightFile
+
+from .benchmark import mayaStandIn
+
+bSkinSaver = None
+komodo_deform = None
+
+
+def setUpModule():
+    global bSkinSaver, komodo_deform
+
+    try:
+        mayaStandIn.install()
+    except RuntimeError:
+        raise unittest.SkipTest("the real Maya modules are imported")
+
+    # the komodoRig package uses implicit relative imports
+    if sys.version_info[0] > 2:
+        raise unittest.SkipTest("komodoRig only imports under Python 2")
+
+    from rigTools import bSkinSaver
+    from komodoRig import komodo_deform
+
+
+INFLUENCES = ["a_jnt", "b_jnt", "c_jnt"]
+CHARACTER = "komodo"
+
+
+def meshWeights(vertexCount, seed=0):
+    u"""Gets random positions and normalized weights of a mesh."""
+
+    randomValues = random.Random(seed)
+    positions = [randomValues.uniform(-1.0, 1.0)
+                 for i in range(vertexCount * 3)]
+    weights = []
+    for i in range(vertexCount):
+        a = randomValues.random()
+        weights.extend([a, (1.0 - a) / 2, (1.0 - a) / 2])
+
+    return positions, weights
+
+
+class TestSkinWeights(unittest.TestCase):
+
+    def setUp(self):
+        self.tempDir = tempfile.mkdtemp(prefix="test_komodo_deform")
+        self.mainProjectPath = komodo_deform.project.mainProjectPath
+        komodo_deform.project.mainProjectPath = self.tempDir
+        self.wtDir = os.path.join(self.tempDir, CHARACTER,
+                                  komodo_deform.skinWeightsDir)
+        os.makedirs(self.wtDir)
+
+        self.scene = mayaStandIn.install()
+        bSkinSaver.invalidateInfluenceIndex()
+        bSkinSaver.invalidateSkinClusterCache()
+        skinWeightCache.sessionCache.invalidate()
+        skinWeightCache.sessionCache.resetStats()
+
+        self.meshes = {}
+        for i, meshName in enumerate(["body_geo", "head_geo", "tail_geo"]):
+            positions, weights = meshWeights(20 + i * 5, seed=i)
+            self.scene.addSkinnedMesh(meshName, positions, INFLUENCES,
+                                      weights)
+            self.meshes[meshName] = weights
+
+    def tearDown(self):
+        komodo_deform.project.mainProjectPath = self.mainProjectPath
+        shutil.rmtree(self.tempDir, ignore_errors=True)
+
+    def assertWeights(self, meshName, weights, places=6):
+        sceneInfluences, sceneWeights = self.scene.weights(meshName)
+        self.assertEqual(sceneInfluences, INFLUENCES)
+        self.assertEqual(len(sceneWeights), len(weights))
+        for a, b in zip(sceneWeights, weights):
+            self.assertAlmostEqual(a, b, places=places)
+
+    def clearWeights(self):
+        for meshName in self.meshes:
+            self.scene.addSkinCluster(meshName, INFLUENCES)
+
+    def testIncremental(self):
+        meshNames = sorted(self.meshes)
+        komodo_deform.saveSkinWeights(CHARACTER, meshNames)
+
+        self.scene.addSkinCluster("head_geo", INFLUENCES)
+        report = komodo_deform.saveSkinWeights(CHARACTER, meshNames,
+                                               incremental=True)
+        self.assertEqual(report["written"], ["head_geo"])
+        self.assertEqual(report["skipped"], ["body_geo", "tail_geo"])
+
+    def testStaleObjects(self):
+        staleFile = os.path.join(self.wtDir, "missing_geo.swt")
+        skinWeightFile.writeSwt(staleFile, [skinWeightFile.SkinWeights(
+            "missing_geo", INFLUENCES, self.meshes["body_geo"])])
+
+        # saving never deletes weights unless asked to
+        report = komodo_deform.saveSkinWeights(CHARACTER,
+                                               ["body_geo", "missing_geo"])
+        self.assertEqual(report["stale"], ["missing_geo"])
+        self.assertEqual(report["removed"], [])
+        self.assertTrue(os.path.exists(staleFile))
+
+        report = komodo_deform.saveSkinWeights(
+            CHARACTER, ["body_geo", "missing_geo"], removeStale=True)
+        self.assertEqual(report["stale"], ["missing_geo"])
+        self.assertEqual(report["removed"], ["missing_geo"])
+        self.assertFalse(os.path.exists(staleFile))
+
+    def testBlocks(self):
+        komodo_deform.saveSkinWeights(CHARACTER, sorted(self.meshes))
+
+        # one setWeights call per object, then one per block of 7 vertices
+        for blockSize, calls in [(None, 3), (7, 3 + 4 + 5)]:
+            self.clearWeights()
+            self.scene.setWeightsCalls = 0
+            komodo_deform.loadSkinWeights(CHARACTER, blockSize=blockSize)
+            self.assertEqual(self.scene.setWeightsCalls, calls)
+            for meshName, weights in self.meshes.items():
+                self.assertWeights(meshName, weights)
+
+    def testCache(self):
+        komodo_deform.saveSkinWeights(CHARACTER, sorted(self.meshes))
+
+        for hits in (0, 3):
+            self.clearWeights()
+            komodo_deform.loadSkinWeights(CHARACTER, cache=True)
+            self.assertEqual(skinWeightCache.sessionCache.stats().hits, hits)
+            for meshName, weights in self.meshes.items():
+                self.assertWeights(meshName, weights)
+
+        # not in batch mode
+        self.scene.batch = True
+        komodo_deform.loadSkinWeights(CHARACTER, cache=True)
+        self.assertEqual(skinWeightCache.sessionCache.stats().hits, 3)
+
+    def testValidate(self):
+        komodo_deform.saveSkinWeights(CHARACTER, sorted(self.meshes))
+
+        # change a digit of the first weight of the body, leaving the index
+        # to describe the file as it is on disk
+        wtFile = os.path.join(self.wtDir, "body_geo.swt")
+        with open(wtFile, "rb") as f:
+            data = bytearray(f.read())
+        offset = data.index(skinWeightFile.SEPARATOR.encode("ascii")) + \
+            len(skinWeightFile.SEPARATOR) + 3
+        data[offset] = ord("1") if data[offset] != ord("1") else ord("2")
+        with open(wtFile, "wb") as output:
+            output.write(data)
+
+        indexFile = skinWeightFile.indexPath(wtFile)
+        with open(indexFile, "r") as f:
+            index = json.load(f)
+        index["mtime"] = os.path.getmtime(wtFile)
+        with open(indexFile, "w") as output:
+            json.dump(index, output)
+
+        self.clearWeights()
+        komodo_deform.loadSkinWeights(CHARACTER, validate=True)
+        self.assertWeights("body_geo", [1.0, 0.0, 0.0] * 20)
+        self.assertWeights("head_geo", self.meshes["head_geo"])
+        self.assertWeights("tail_geo", self.meshes["tail_geo"])
+
+    def testVersion(self):
+        meshNames = sorted(self.meshes)
+        komodo_deform.saveSkinWeights(CHARACTER, meshNames, snapshot=True,
+                                      tag="first")
+        self.scene.addSkinCluster("head_geo", INFLUENCES)
+        komodo_deform.saveSkinWeights(CHARACTER, meshNames, snapshot=True)
+
+        self.clearWeights()
+        komodo_deform.loadSkinWeights(CHARACTER, version="first")
+        for meshName, weights in self.meshes.items():
+            self.assertWeights(meshName, weights)
+
+        # the last snapshot saved by now, only for the head
+        komodo_deform.loadSkinWeights(CHARACTER, ["head_geo"],
+                                      version=time.time())
+        self.assertWeights("head_geo", [1.0, 0.0, 0.0] * 25)
+
+    def testShareWeights(self):
+        # the same weights on meshes moved apart, with their positions saved
+        weights = meshWeights(40, seed=3)[1]
+        for meshName, seed in [("l_arm_geo", 4), ("r_arm_geo", 5)]:
+            positions = meshWeights(40, seed=seed)[0]
+            self.scene.addSkinnedMesh(meshName, positions, INFLUENCES,
+                                      weights)
+            self.meshes[meshName] = weights
+        meshNames = sorted(self.meshes)
+        komodo_deform.saveSkinWeights(CHARACTER, meshNames, binary=True)
+
+        wtFiles = [os.path.join(self.wtDir, meshName + ".swb")
+                   for meshName in meshNames]
+        self.assertEqual(
+            komodo_deform._sharedWeightFiles(self.wtDir, wtFiles),
+            [[os.path.join(self.wtDir, "l_arm_geo.swb"),
+              os.path.join(self.wtDir, "r_arm_geo.swb")]])
+
+        self.clearWeights()
+        komodo_deform.loadSkinWeights(CHARACTER, shareWeights=True)
+        for meshName, weights in self.meshes.items():
+            self.assertWeights(meshName, weights)
+
+    def testWorkers(self):
+        komodo_deform.saveSkinWeights(CHARACTER, sorted(self.meshes))
+
+        # serial, and more and fewer files than parsed ahead
+        for workers in (0, 1, 4):
+            self.clearWeights()
+            komodo_deform.loadSkinWeights(CHARACTER, workers=workers)
+            for meshName, weights in self.meshes.items():
+                self.assertWeights(meshName, weights)
+
+
+if __name__ == "__main__":
+    unittest.main()
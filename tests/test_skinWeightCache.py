@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+u"""Tests of `rigTools.skinWeightCache`."""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+# Adds the source folder to sys.path, if it not already there,
+# so unit tests can see the modules:
+tests_dir = os.path.dirname(os.path.realpath(__file__))
+root_dir = os.path.dirname(tests_dir)
+src_dir = os.path.join(root_dir, "code", "python", "src")
+
+for path in sys.path:
+    if path == src_dir:
+        break
+else:
+    sys.path.append(src_dir)
+
+from rigTools import skinWeightCache
+from rigTools import skinWeightFile
+
+
+def skinWeights(name, vertexCount, value=1.0):
+    u"""Gets the weights of an object with a single influence."""
+
+    return skinWeightFile.SkinWeights(name, ["root_jnt"],
+                                      [value] * vertexCount)
+
+
+class TestSkinWeightCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tempDir = tempfile.mkdtemp(prefix="test_skinWeightCache")
+        self.cache = skinWeightCache.SkinWeightCache()
+
+    def tearDown(self):
+        shutil.rmtree(self.tempDir, ignore_errors=True)
+
+    def path(self, fileName):
+        return os.path.join(self.tempDir, fileName)
+
+    def writeText(self, fileName, vertexCount, value=1.0):
+        filePath = self.path(fileName)
+        skinWeightFile.writeSwt(filePath,
+                                [skinWeights(fileName, vertexCount, value)])
+        return filePath
+
+    def testHit(self):
+        filePath = self.writeText("body.swt", 10)
+
+        objects = self.cache.read(filePath)
+        self.assertIs(self.cache.read(filePath), objects)
+
+        stats = self.cache.stats()
+        self.assertEqual((stats.hits, stats.misses, stats.entries),
+                         (1, 1, 1))
+        self.assertEqual(stats.size, 10 * 8)
+
+        self.cache.resetStats()
+        self.assertEqual(self.cache.stats().hits, 0)
+        self.assertEqual(self.cache.stats().entries, 1)
+
+    def testStaleStamp(self):
+        filePath = self.writeText("body.swt", 10)
+        self.cache.read(filePath)
+
+        # same size, only the modification time tells the file changed
+        self.writeText("body.swt", 10, 0.5)
+        fileStat = os.stat(filePath)
+        os.utime(filePath, (fileStat.st_atime, fileStat.st_mtime + 10))
+
+        objects = self.cache.read(filePath)
+        self.assertEqual(skinWeightFile.toFloatList(objects[0].weights),
+                         [0.5] * 10)
+
+        # other size
+        self.writeText("body.swt", 12)
+        objects = self.cache.read(filePath)
+        self.assertEqual(objects[0].vertexCount, 12)
+
+        stats = self.cache.stats()
+        self.assertEqual((stats.hits, stats.misses, stats.entries),
+                         (0, 3, 1))
+        self.assertEqual(stats.size, 12 * 8)
+
+    def testEviction(self):
+        self.cache.maxBytes = 25 * 8
+        first = self.writeText("first.swt", 10)
+        second = self.writeText("second.swt", 10)
+        third = self.writeText("third.swt", 10)
+
+        self.cache.read(first)
+        self.cache.read(second)
+        self.cache.read(first)
+        self.cache.read(third)
+
+        # second was the least recently used
+        stats = self.cache.stats()
+        self.assertEqual((stats.evictions, stats.entries, stats.size),
+                         (1, 2, 20 * 8))
+        self.cache.read(first)
+        self.cache.read(third)
+        self.assertEqual(self.cache.stats().hits, 3)
+
+        self.cache.maxBytes = 10 * 8
+        stats = self.cache.stats()
+        self.assertEqual((stats.evictions, stats.entries), (2, 1))
+
+    def testTooLarge(self):
+        self.cache.maxBytes = 5 * 8
+        filePath = self.writeText("body.swt", 10)
+
+        self.assertFalse(self.cache.fits(filePath))
+        self.assertEqual(len(self.cache.read(filePath)), 1)
+        self.assertEqual(self.cache.stats().entries, 0)
+
+    def testFits(self):
+        filePath = self.writeText("body.swt", 10)
+        self.cache.maxBytes = os.path.getsize(filePath) * 4
+        self.assertTrue(self.cache.fits(filePath))
+
+        # the index gives the decoded size, positions included
+        skinWeightFile.writeIndex(filePath)
+        self.cache.maxBytes = 10 * 4 * 8 - 1
+        self.assertFalse(self.cache.fits(filePath))
+        self.cache.maxBytes = 10 * 4 * 8
+        self.assertTrue(self.cache.fits(filePath))
+
+        skinWeightFile.compressWeightFile(filePath, self.path("body.swz"))
+        self.assertFalse(self.cache.fits(self.path("body.swz")))
+
+    def testBinaryReadThrough(self):
+        filePath = self.path("body.swb")
+        skinWeightFile.writeSwb(filePath, [skinWeights("body_geo", 10)])
+
+        self.assertTrue(self.cache.fits(filePath))
+        self.assertEqual(len(self.cache.read(filePath)), 1)
+        self.assertEqual(self.cache.read(filePath)[0].vertexCount, 10)
+
+        stats = self.cache.stats()
+        self.assertEqual((stats.hits, stats.misses, stats.entries),
+                         (0, 2, 0))
+
+    def testCompressed(self):
+        filePath = self.writeText("body.swt", 10)
+        skinWeightFile.compressWeightFile(filePath, self.path("body.swz"))
+
+        objects = self.cache.read(self.path("body.swz"))
+        self.assertIs(self.cache.read(self.path("body.swz")), objects)
+
+    def testInvalidate(self):
+        first = self.writeText("first.swt", 10)
+        second = self.writeText("second.swt", 10)
+        self.cache.read(first)
+        self.cache.read(second)
+
+        self.cache.invalidate(first)
+        stats = self.cache.stats()
+        self.assertEqual((stats.entries, stats.size), (1, 10 * 8))
+
+        self.cache.invalidate()
+        stats = self.cache.stats()
+        self.assertEqual((stats.entries, stats.size), (0, 0))
+
+    def testFrozenWeights(self):
+        if skinWeightFile.numpy is None:
+            self.skipTest("NumPy is not available")
+
+        objects = self.cache.read(self.writeText("body.swt", 10))
+        self.assertFalse(objects[0].weights.flags.writeable)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,803 @@
+# -*- coding: utf-8 -*-
+u"""Tests of `rigTools.skinWeightFile`."""
+
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import unittest
+
+# Adds the source folder to sys.path, if it not already there,
+# so unit tests can see the modules:
+tests_dir = os.path.dirname(os.path.realpath(__file__))
+root_dir = os.path.dirname(tests_dir)
+src_dir = os.path.join(root_dir, "code", "python", "src")
+
+for path in sys.path:
+    if path == src_dir:
+        break
+else:
+    sys.path.append(src_dir)
+
+from rigTools import skinWeightFile
+
+
+def syntheticWeights(vertexCount, influenceCount, nonZero=3, seed=0):
+    u"""Gets normalized row major weights with ``nonZero`` weights per row.
+
+    The first row has no weight at all.
+    """
+
+    randomValues = random.Random(seed)
+    weights = [0.0] * (vertexCount * influenceCount)
+    for i in range(1, vertexCount):
+        columns = randomValues.sample(range(influenceCount),
+                                      min(nonZero, influenceCount))
+        values = [randomValues.random() + 0.01 for k in columns]
+        total = sum(values)
+        for k, value in zip(columns, values):
+            weights[i * influenceCount + k] = value / total
+
+    return weights
+
+
+def syntheticPositions(vertexCount, seed=0):
+    u"""Gets distinct x, y and z values of ``vertexCount`` points."""
+
+    randomValues = random.Random(seed)
+    return [randomValues.uniform(-10.0, 10.0)
+            for i in range(vertexCount * 3)]
+
+
+def syntheticObject(name="body_geo", vertexCount=20, influenceCount=5,
+                    positions=False):
+    u"""Gets a `rigTools.skinWeightFile.SkinWeights` of synthetic weights."""
+
+    influences = ["joint{}_jnt".format(k) for k in range(influenceCount)]
+    return skinWeightFile.SkinWeights(
+        name, influences, syntheticWeights(vertexCount, influenceCount),
+        syntheticPositions(vertexCount) if positions else None)
+
+
+class WeightFileTestCase(unittest.TestCase):
+    u"""Test case with a temporary folder for weight files."""
+
+    def setUp(self):
+        self.tempDir = tempfile.mkdtemp(prefix="test_skinWeightFile")
+
+    def tearDown(self):
+        shutil.rmtree(self.tempDir, ignore_errors=True)
+
+    def path(self, fileName):
+        return os.path.join(self.tempDir, fileName)
+
+    def assertValuesAlmostEqual(self, first, second, places=6):
+        first = skinWeightFile.toFloatList(first)
+        second = skinWeightFile.toFloatList(second)
+        self.assertEqual(len(first), len(second))
+        for a, b in zip(first, second):
+            self.assertAlmostEqual(a, b, places=places)
+
+    def assertObjectsAlmostEqual(self, first, second, places=6):
+        self.assertEqual([skinWeights.name for skinWeights in first],
+                         [skinWeights.name for skinWeights in second])
+        for a, b in zip(first, second):
+            self.assertEqual(a.influences, b.influences)
+            self.assertValuesAlmostEqual(
+                skinWeightFile.expandWeights(a.weights, a.influenceCount),
+                skinWeightFile.expandWeights(b.weights, b.influenceCount),
+                places)
+            if b.positions is None:
+                self.assertIsNone(a.positions)
+            else:
+                self.assertValuesAlmostEqual(a.positions, b.positions, 5)
+
+
+class TestEmptyRows(WeightFileTestCase):
+
+    def testNoInfluences(self):
+        skinWeights = skinWeightFile.SkinWeights("empty_geo", [], [])
+        self.assertEqual(skinWeights.vertexCount, 0)
+        self.assertEqual(skinWeightFile.expandWeights([], 0), [])
+        self.assertEqual(list(skinWeightFile.iterBlocks([], 0)), [])
+        self.assertEqual(skinWeightFile.formatWeightRows([], 0), "")
+
+    def testNoVertices(self):
+        skinWeights = skinWeightFile.SkinWeights("empty_geo", ["a_jnt"], [])
+
+        for fileName, write in [("empty.swt", skinWeightFile.writeSwt),
+                                ("empty.swb", skinWeightFile.writeSwb)]:
+            write(self.path(fileName), [skinWeights])
+            objects = skinWeightFile.readWeightFile(self.path(fileName))
+            self.assertEqual(len(objects), 1)
+            self.assertEqual(objects[0].vertexCount, 0)
+            self.assertEqual(objects[0].influences, ["a_jnt"])
+
+    def testZeroInfluenceRows(self):
+        skinWeights = skinWeightFile.SkinWeights(
+            "body_geo", ["a_jnt", "b_jnt"], [0.0, 0.0, 0.25, 0.75, 0.0, 0.0])
+
+        quantized, error = skinWeightFile.quantizeWeights(
+            skinWeights.weights, 2, 8)
+        self.assertEqual(list(quantized), [0, 0, 64, 191, 0, 0])
+
+        pruned, report = skinWeightFile.pruneWeights(skinWeights.weights, 2,
+                                                     0.5)
+        self.assertValuesAlmostEqual(pruned, [0, 0, 0, 1, 0, 0])
+        self.assertEqual(report.removed, 1)
+
+        sparse = skinWeightFile.SparseWeights.fromDense(skinWeights.weights, 2)
+        self.assertEqual(list(sparse.rowOffsets), [0, 0, 2, 2])
+
+        for fileName, write in [("zero.swt", skinWeightFile.writeSwt),
+                                ("zero.swb", skinWeightFile.writeSwb)]:
+            write(self.path(fileName), [skinWeights])
+            self.assertObjectsAlmostEqual(
+                skinWeightFile.readWeightFile(self.path(fileName)),
+                [skinWeights])
+
+    def testSparseZeroInfluenceRows(self):
+        skinWeights = skinWeightFile.SkinWeights("body_geo", ["a_jnt"],
+                                                 [0.0, 0.0, 0.0])
+        skinWeightFile.writeSwb(self.path("zero.swb"), [skinWeights],
+                                sparse=True)
+
+        weights = skinWeightFile.readSwb(self.path("zero.swb"))[0].weights
+        self.assertIsInstance(weights, skinWeightFile.SparseWeights)
+        self.assertEqual(weights.vertexCount, 3)
+        self.assertEqual(len(weights.values), 0)
+        self.assertEqual(weights.toDense(), [0.0, 0.0, 0.0])
+
+
+class TestSparseWeights(WeightFileTestCase):
+
+    def setUp(self):
+        super(TestSparseWeights, self).setUp()
+        self.skinWeights = syntheticObject(vertexCount=50, influenceCount=16)
+        self.skinWeights.positions = syntheticPositions(50)
+        self.sparse = skinWeightFile.SparseWeights.fromDense(
+            self.skinWeights.weights, 16)
+
+    def testRoundTrip(self):
+        self.assertEqual(self.sparse.vertexCount, 50)
+        self.assertEqual(len(self.sparse), 50 * 16)
+        self.assertEqual(len(self.sparse.values), 49 * 3)
+        self.assertValuesAlmostEqual(self.sparse.toDense(),
+                                     self.skinWeights.weights, 12)
+
+    def testPartialRows(self):
+        self.assertValuesAlmostEqual(
+            self.sparse.toDense(18, 10, 12),
+            [value for i in range(10, 12) for value in
+             self.skinWeights.weights[i * 16:(i + 1) * 16] + [0.0, 0.0]], 12)
+
+    def testBlocks(self):
+        denseBlocks = list(skinWeightFile.iterBlocks(
+            self.skinWeights.weights, 16, rowWidth=18, blockSize=16))
+        sparseBlocks = list(skinWeightFile.iterBlocks(
+            self.sparse, 16, rowWidth=18, blockSize=16))
+
+        self.assertEqual([(block.start, block.rowCount) for block in
+                          denseBlocks],
+                         [(0, 16), (16, 16), (32, 16), (48, 2)])
+        self.assertEqual([(block.start, block.rowCount) for block in
+                          sparseBlocks],
+                         [(block.start, block.rowCount) for block in
+                          denseBlocks])
+        for dense, sparse in zip(denseBlocks, sparseBlocks):
+            self.assertValuesAlmostEqual(sparse.values, dense.values, 12)
+
+    def testSparseFileMatchesDenseFile(self):
+        for valueSize in (4, 8, 2, 1):
+            skinWeightFile.writeSwb(self.path("dense.swb"),
+                                    [self.skinWeights], valueSize)
+            skinWeightFile.writeSwb(self.path("sparse.swb"),
+                                    [self.skinWeights], valueSize, True)
+
+            dense = skinWeightFile.readSwb(self.path("dense.swb"))[0]
+            sparse = skinWeightFile.readSwb(self.path("sparse.swb"))[0]
+            self.assertIsInstance(sparse.weights, skinWeightFile.SparseWeights)
+            self.assertObjectsAlmostEqual([sparse], [dense], 12)
+            if valueSize >= 4:
+                self.assertLess(os.path.getsize(self.path("sparse.swb")),
+                                os.path.getsize(self.path("dense.swb")))
+
+    def testSparseFingerprint(self):
+        sparseObject = skinWeightFile.SkinWeights(
+            self.skinWeights.name, self.skinWeights.influences, self.sparse,
+            self.skinWeights.positions)
+
+        self.assertEqual(skinWeightFile.fingerprint([sparseObject]),
+                         skinWeightFile.fingerprint([self.skinWeights]))
+
+
+class TestQuantization(WeightFileTestCase):
+
+    def setUp(self):
+        super(TestQuantization, self).setUp()
+        self.weights = syntheticWeights(200, 6, nonZero=4, seed=3)
+
+    def checkQuantized(self, bits):
+        scale = (1 << bits) - 1
+        quantized, error = skinWeightFile.quantizeWeights(self.weights, 6,
+                                                          bits)
+        quantized = [int(value) for value in quantized]
+
+        for i in range(200):
+            row = quantized[i * 6:(i + 1) * 6]
+            self.assertEqual(sum(row), scale if i else 0)
+            for value, weight in zip(row, self.weights[i * 6:(i + 1) * 6]):
+                self.assertLessEqual(abs(value / float(scale) - weight),
+                                     1.0 / scale + 1e-12)
+
+        self.assertLessEqual(error.maxError, 1.0 / scale + 1e-12)
+        self.assertLessEqual(error.meanError, error.maxError)
+
+    def test8Bit(self):
+        self.checkQuantized(8)
+
+    def test16Bit(self):
+        self.checkQuantized(16)
+
+    def testFileErrorBounds(self):
+        for valueSize, bits in [(1, 8), (2, 16)]:
+            scale = float((1 << bits) - 1)
+            skinWeights = skinWeightFile.SkinWeights(
+                "body_geo", ["joint{}_jnt".format(k) for k in range(6)],
+                self.weights)
+
+            with open(self.path("quantized.swb"), "wb") as output:
+                output.write(skinWeightFile.BINARY_MAGIC)
+                error = skinWeightFile.writeSwbObject(output, skinWeights,
+                                                      valueSize)
+            self.assertLessEqual(error.maxError, 1.0 / scale + 1e-12)
+
+            weights = skinWeightFile.toFloatList(skinWeightFile.readSwb(
+                self.path("quantized.swb"))[0].weights)
+            for i in range(1, 200):
+                self.assertAlmostEqual(sum(weights[i * 6:(i + 1) * 6]), 1.0,
+                                       places=9)
+            for value, weight in zip(weights, self.weights):
+                self.assertLessEqual(abs(value - weight), 1.0 / scale + 1e-12)
+
+    def testUnsupportedBits(self):
+        self.assertRaises(ValueError, skinWeightFile.quantizeWeights,
+                          self.weights, 6, 12)
+        self.assertRaises(ValueError, skinWeightFile.writeSwb,
+                          self.path("bad.swb"), [syntheticObject()], 3)
+
+
+class TestPackValues(unittest.TestCase):
+
+    def testFloats(self):
+        values = [0.0, 0.5, 1.0, 0.125, 0.3]
+        for valueSize, places in [(4, 6), (8, 15)]:
+            packed = skinWeightFile.packValues(values, valueSize)
+            self.assertEqual(len(packed), len(values) * valueSize)
+            unpacked = skinWeightFile.unpackValues(b"xx" + packed, 2,
+                                                   len(values), valueSize)
+            for a, b in zip(unpacked, values):
+                self.assertAlmostEqual(a, b, places=places)
+
+    def testFixedPoint(self):
+        for valueSize, scale in [(1, 255), (2, 65535)]:
+            packed = skinWeightFile.packValues([0, scale, scale // 2],
+                                               valueSize)
+            unpacked = skinWeightFile.toFloatList(skinWeightFile.unpackValues(
+                packed, 0, 3, valueSize))
+            self.assertEqual(unpacked, [0.0, 1.0, (scale // 2) / float(scale)])
+
+
+class TestPruneWeights(unittest.TestCase):
+
+    def testThresholdAndMaxInfluences(self):
+        weights = [0.05, 0.15, 0.3, 0.5, 0.6, 0.2, 0.1, 0.1]
+        pruned, report = skinWeightFile.pruneWeights(weights, 4, 0.12, 2)
+        pruned = skinWeightFile.toFloatList(pruned)
+
+        self.assertEqual(report.removed, 4)
+        self.assertEqual([value > 0 for value in pruned],
+                         [False, False, True, True, True, True, False, False])
+        self.assertAlmostEqual(sum(pruned[:4]), 1.0)
+        self.assertAlmostEqual(sum(pruned[4:]), 1.0)
+        self.assertAlmostEqual(pruned[3], 0.5 / 0.8)
+
+    def testLargestWeightIsKept(self):
+        pruned, report = skinWeightFile.pruneWeights([0.01, 0.02], 2, 0.5)
+        self.assertEqual(skinWeightFile.toFloatList(pruned), [0.0, 1.0])
+
+    def testPruneSkinWeights(self):
+        skinWeights = syntheticObject(vertexCount=10, influenceCount=5,
+                                      positions=True)
+        pruned, report = skinWeightFile.pruneSkinWeights(skinWeights,
+                                                         maxInfluences=1)
+        self.assertEqual(pruned.name, skinWeights.name)
+        self.assertIs(pruned.positions, skinWeights.positions)
+        self.assertEqual(report.removed, 9 * 2)
+
+
+class TestCompressedFile(WeightFileTestCase):
+
+    def setUp(self):
+        super(TestCompressedFile, self).setUp()
+        self.objects = [syntheticObject("body_geo", 300, 6),
+                        syntheticObject("head_geo", 40, 3)]
+        skinWeightFile.writeSwt(self.path("weights.swt"), self.objects)
+        skinWeightFile.writeSwb(self.path("weights.swb"), self.objects)
+
+    def compressions(self):
+        compressions = [skinWeightFile.ZLIB]
+        if skinWeightFile.lzma is not None:
+            compressions.append(skinWeightFile.LZMA)
+        return compressions
+
+    def testRoundTrip(self):
+        for compression in self.compressions():
+            for fileName, places in [("weights.swt", 9), ("weights.swb", 6)]:
+                skinWeightFile.compressWeightFile(
+                    self.path(fileName), self.path("weights.swz"),
+                    compression, chunkSize=1000)
+
+                self.assertTrue(skinWeightFile.isCompressedFile(
+                    self.path("weights.swz")))
+                with open(self.path(fileName), "rb") as f:
+                    self.assertEqual(b"".join(skinWeightFile.iterChunks(
+                        self.path("weights.swz"), workers=2)), f.read())
+                self.assertObjectsAlmostEqual(
+                    skinWeightFile.readWeightFile(self.path("weights.swz")),
+                    self.objects, places)
+                self.assertObjectsAlmostEqual(
+                    skinWeightFile.readSwz(self.path("weights.swz"), 2),
+                    self.objects, places)
+
+    def testTruncatedChunk(self):
+        skinWeightFile.compressWeightFile(self.path("weights.swb"),
+                                          self.path("weights.swz"),
+                                          chunkSize=1000)
+        with open(self.path("weights.swz"), "rb") as f:
+            data = f.read()
+
+        # in the middle of the data of the last chunk, then of its header
+        for size in (len(data) - 10, len(data) - 3):
+            with open(self.path("truncated.swz"), "wb") as output:
+                output.write(data[:size])
+            self.assertRaises(IOError, skinWeightFile.readSwz,
+                              self.path("truncated.swz"))
+
+    def testCorruptChunkSize(self):
+        with skinWeightFile.CompressedWriter(self.path("weights.swz"),
+                                             chunkSize=100) as output:
+            output.write(b"x" * 100)
+        with open(self.path("weights.swz"), "rb") as f:
+            data = bytearray(f.read())
+
+        # uncompressed size of the chunk
+        data[16] += 1
+        with open(self.path("weights.swz"), "wb") as output:
+            output.write(bytes(data))
+        self.assertRaises(IOError, list,
+                          skinWeightFile.iterChunks(self.path("weights.swz")))
+
+    def testBadSettings(self):
+        self.assertRaises(ValueError, skinWeightFile.CompressedWriter,
+                          self.path("bad.swz"), "gzip")
+        self.assertRaises(ValueError, skinWeightFile.CompressedWriter,
+                          self.path("bad.swz"), level=10)
+        self.assertRaises(ValueError, skinWeightFile.CompressedWriter,
+                          self.path("bad.swz"), chunkSize=0)
+
+
+class TestIndex(WeightFileTestCase):
+
+    def setUp(self):
+        super(TestIndex, self).setUp()
+        self.objects = [syntheticObject("body_geo", 30, 4, positions=True),
+                        syntheticObject("head_geo", 12, 3, positions=True),
+                        syntheticObject("hand_geo", 7, 2)]
+
+    def files(self):
+        skinWeightFile.writeSwt(self.path("weights.swt"), self.objects)
+        skinWeightFile.writeSwb(self.path("weights.swb"), self.objects)
+        return [self.path("weights.swt"), self.path("weights.swb")]
+
+    def testEntries(self):
+        for filePath in self.files():
+            index = skinWeightFile.writeIndex(filePath)
+            self.assertEqual(skinWeightFile.readIndex(filePath), index)
+            self.assertEqual(
+                [(entry["name"], entry["influences"], entry["vertexCount"])
+                 for entry in index["objects"]],
+                [(skinWeights.name, skinWeights.influences,
+                  skinWeights.vertexCount) for skinWeights in self.objects])
+            self.assertEqual(skinWeightFile.verifyWeightFile(filePath), [])
+
+    def testReadObjects(self):
+        for filePath in self.files():
+            skinWeightFile.writeIndex(filePath)
+            objects = [skinWeights if isinstance(
+                skinWeights, skinWeightFile.SkinWeights) else
+                skinWeightFile.collectStream(skinWeights) for skinWeights in
+                skinWeightFile.iterWeightFile(
+                    filePath, objectNames=["hand_geo", "head_geo"])]
+            self.assertObjectsAlmostEqual(objects, self.objects[1:])
+
+    def testCorruptCrc(self):
+        for filePath in self.files():
+            index = skinWeightFile.writeIndex(filePath)
+            entry = index["objects"][1]
+
+            with open(filePath, "r+b") as f:
+                f.seek(entry["offset"] + entry["length"] - 3)
+                data = f.read(1)
+                f.seek(-1, os.SEEK_CUR)
+                f.write(b"7" if data != b"7" else b"8")
+
+            self.assertTrue(skinWeightFile.verifyObject(filePath,
+                                                        index["objects"][0]))
+            self.assertFalse(skinWeightFile.verifyObject(filePath, entry))
+            self.assertTrue(skinWeightFile.verifyObject(filePath,
+                                                        index["objects"][2]))
+
+    def testCorruptCrcInIndex(self):
+        filePath = self.files()[1]
+        index = skinWeightFile.writeIndex(filePath)
+        index["objects"][0]["crc32"] ^= 1
+        with open(skinWeightFile.indexPath(filePath), "w") as output:
+            json.dump(index, output)
+
+        self.assertEqual(skinWeightFile.verifyWeightFile(filePath),
+                         ["body_geo"])
+
+    def testStaleIndex(self):
+        for filePath in self.files():
+            skinWeightFile.writeIndex(filePath)
+            with open(filePath, "ab") as output:
+                output.write(b"\n")
+
+            self.assertIsNone(skinWeightFile.readIndex(filePath))
+            self.assertIsNone(skinWeightFile.verifyWeightFile(filePath))
+
+    def testNoIndexForCompressedFiles(self):
+        filePath = self.files()[0]
+        skinWeightFile.compressWeightFile(filePath, self.path("weights.swz"))
+        self.assertRaises(IOError, skinWeightFile.buildIndex,
+                          self.path("weights.swz"))
+
+
+class TestManifest(WeightFileTestCase):
+
+    def testMissing(self):
+        manifest = skinWeightFile.readManifest(self.path("manifest.json"))
+        self.assertEqual(manifest, {"version": skinWeightFile.MANIFEST_VERSION,
+                                    "objects": {}})
+
+    def testRoundTrip(self):
+        manifest = skinWeightFile.readManifest(self.path("manifest.json"))
+        manifest["objects"]["body_geo"] = {
+            "fingerprint": skinWeightFile.fingerprint([syntheticObject()])}
+        skinWeightFile.writeManifest(self.path("manifest.json"), manifest)
+
+        self.assertEqual(
+            skinWeightFile.readManifest(self.path("manifest.json")), manifest)
+
+    def testOtherVersion(self):
+        skinWeightFile.writeManifest(self.path("manifest.json"),
+                                     {"version": -1, "objects": {"a": {}}})
+        self.assertEqual(
+            skinWeightFile.readManifest(self.path("manifest.json"))["objects"],
+            {})
+
+
+class TestFingerprint(unittest.TestCase):
+
+    def testWeights(self):
+        skinWeights = syntheticObject()
+        changed = syntheticObject()
+        changed.weights[30] += 0.01
+
+        self.assertEqual(skinWeightFile.fingerprint([skinWeights]),
+                         skinWeightFile.fingerprint([syntheticObject()]))
+        self.assertNotEqual(skinWeightFile.fingerprint([skinWeights]),
+                            skinWeightFile.fingerprint([changed]))
+
+    def testNames(self):
+        body = syntheticObject("body_geo")
+        head = syntheticObject("head_geo")
+
+        self.assertNotEqual(skinWeightFile.fingerprint([body]),
+                            skinWeightFile.fingerprint([head]))
+        self.assertEqual(skinWeightFile.fingerprint([body], names=False),
+                         skinWeightFile.fingerprint([head], names=False))
+
+    def testPositions(self):
+        body = syntheticObject("body_geo", positions=True)
+        moved = syntheticObject("body_geo", positions=True)
+        moved.positions[0] += 1.0
+
+        self.assertNotEqual(skinWeightFile.fingerprint([body]),
+                            skinWeightFile.fingerprint([moved]))
+        self.assertEqual(
+            skinWeightFile.fingerprint([body], positions=False),
+            skinWeightFile.fingerprint([moved], positions=False))
+
+    def testTopology(self):
+        quads = skinWeightFile.topologyFingerprint(6, [4, 4],
+                                                   [0, 1, 4, 3, 1, 2, 5, 4])
+
+        self.assertEqual(quads, skinWeightFile.topologyFingerprint(
+            6, [4, 4], [0, 1, 4, 3, 1, 2, 5, 4]))
+        self.assertNotEqual(quads, skinWeightFile.topologyFingerprint(
+            6, [4, 4], [0, 1, 4, 3, 2, 1, 5, 4]))
+        self.assertNotEqual(quads, skinWeightFile.topologyFingerprint(
+            6, [3, 3, 2], [0, 1, 4, 3, 1, 2, 5, 4]))
+        self.assertNotEqual(quads, skinWeightFile.topologyFingerprint(
+            7, [4, 4], [0, 1, 4, 3, 1, 2, 5, 4]))
+
+
+class TestTransfer(unittest.TestCase):
+
+    def testSamePositions(self):
+        skinWeights = syntheticObject(vertexCount=40, positions=True)
+        weights, report = skinWeightFile.transferWeights(
+            skinWeights.positions, skinWeights.weights, 5,
+            skinWeights.positions)
+
+        self.assertEqual(report, skinWeightFile.TransferReport(40, 0.0))
+        self.assertEqual(skinWeightFile.toFloatList(weights),
+                         skinWeights.weights)
+
+    def testBlend(self):
+        weights, report = skinWeightFile.transferWeights(
+            [0, 0, 0, 2, 0, 0], [1.0, 0.0, 0.0, 1.0], 2, [1, 0, 0, 0.5, 0, 0],
+            neighbours=2)
+        weights = skinWeightFile.toFloatList(weights)
+
+        self.assertEqual(report.exact, 0)
+        self.assertAlmostEqual(report.maxDistance, 1.0)
+        self.assertAlmostEqual(weights[0], 0.5)
+        self.assertAlmostEqual(weights[1], 0.5)
+        self.assertAlmostEqual(weights[2], (1 / 0.25) / (1 / 0.25 + 1 / 2.25))
+
+    def testNoSource(self):
+        weights, report = skinWeightFile.transferWeights([], [], 2,
+                                                         [0, 0, 0])
+        self.assertEqual(list(weights), [0.0, 0.0])
+
+    def testMatchVertices(self):
+        positions = syntheticPositions(30)
+        order = list(range(30))
+        random.Random(1).shuffle(order)
+        shuffled = [positions[i * 3 + axis] for i in order
+                    for axis in range(3)]
+
+        matched, report = skinWeightFile.matchVertices(shuffled, positions)
+        self.assertEqual(matched, order)
+        self.assertEqual(report, skinWeightFile.TransferReport(30, 0.0))
+
+    def testMatchVerticesOnce(self):
+        matched, report = skinWeightFile.matchVertices(
+            [0, 0, 0, 0.1, 0, 0, 5, 0, 0], [0.1, 0, 0])
+
+        self.assertEqual(matched, [-1, 0, -1])
+        self.assertEqual(report.exact, 1)
+
+
+class TestColumns(unittest.TestCase):
+
+    def setUp(self):
+        self.weights = [0.0, 0.5, 0.0, 0.5,
+                        0.0, 1.0, 0.0, 0.0,
+                        0.0, 0.25, 0.0, 0.75]
+
+    def testUsedInfluences(self):
+        self.assertEqual(skinWeightFile.usedInfluences(self.weights, 4),
+                         [False, True, False, True])
+
+    def testSelectColumns(self):
+        self.assertEqual(
+            skinWeightFile.toFloatList(
+                skinWeightFile.selectColumns(self.weights, 4, [3, 1])),
+            [0.5, 0.5, 0.0, 1.0, 0.75, 0.25])
+
+
+class TestTextFile(WeightFileTestCase):
+
+    def testRoundTrip(self):
+        objects = [syntheticObject("body_geo", positions=True),
+                   syntheticObject("head_geo", 8, 3)]
+        skinWeightFile.writeSwt(self.path("weights.swt"), objects)
+
+        self.assertObjectsAlmostEqual(
+            skinWeightFile.readSwt(self.path("weights.swt")), objects, 9)
+
+    def testPositionsSection(self):
+        skinWeights = skinWeightFile.SkinWeights(
+            "body_geo", ["a_jnt"], [1.0, 1.0], [0, 1, 2, 3, 4, 5.5])
+        skinWeightFile.writeSwt(self.path("weights.swt"), [skinWeights])
+
+        with open(self.path("weights.swt")) as f:
+            lines = f.read().splitlines()
+        self.assertEqual(lines, ["body_geo", "a_jnt",
+                                 skinWeightFile.POSITIONS_SEPARATOR,
+                                 "0 1 2", "3 4 5.5",
+                                 skinWeightFile.SEPARATOR, "1", "1", ""])
+
+        stream = next(skinWeightFile.iterSwt(self.path("weights.swt")))
+        self.assertEqual(stream.vertexCount, 2)
+        self.assertEqual(skinWeightFile.toFloatList(stream.positions),
+                         [0, 1, 2, 3, 4, 5.5])
+
+    def testLayout(self):
+        skinWeights = skinWeightFile.SkinWeights(
+            "body_geo", ["a_jnt", "b_jnt"], [1.0, 0.0, 0.25, 0.75])
+        skinWeightFile.writeSwt(self.path("weights.swt"), [skinWeights])
+
+        with open(self.path("weights.swt")) as f:
+            lines = f.read().splitlines()
+        self.assertEqual(lines, ["body_geo", "a_jnt", "b_jnt",
+                                 skinWeightFile.SEPARATOR, "1 0", "0.25 0.75",
+                                 ""])
+
+    def testFormatRows(self):
+        self.assertEqual(
+            skinWeightFile.formatWeightRows(
+                [0.0, 0.25, 0.75, 1.0, -0.0, 1 / 3.0], 3),
+            "0 0.25 0.75\n1 0 0.333333333333\n")
+
+    def testRowPrefixes(self):
+        self.assertEqual(
+            skinWeightFile.formatWeightRows([0.5, 0.5, 1.0, 0.0], 2,
+                                            rowPrefixes=["3 ", "7 "]),
+            "3 0.5 0.5\n7 1 0\n")
+        self.assertEqual(
+            skinWeightFile.formatWeightRows([], 0, rowPrefixes=["3 ", "7 "]),
+            "3 \n7 \n")
+
+    def testStream(self):
+        objects = [syntheticObject("body_geo", 30), syntheticObject("head_geo")]
+        skinWeightFile.writeSwt(self.path("weights.swt"), objects)
+
+        for i, stream in enumerate(skinWeightFile.iterSwt(
+                self.path("weights.swt"), blockSize=4)):
+            skinWeights = objects[i]
+            self.assertEqual(stream.name, skinWeights.name)
+            weights = []
+            for block in stream.blocks:
+                self.assertLessEqual(block.rowCount, 4)
+                weights.extend(skinWeightFile.toFloatList(block.values))
+            self.assertValuesAlmostEqual(weights, skinWeights.weights, 9)
+
+    def testLongStreamBlocksAreSplit(self):
+        skinWeights = syntheticObject("body_geo", 30)
+        skinWeightFile.writeSwt(self.path("weights.swt"), [skinWeights])
+
+        streams = skinWeightFile.iterSwt(self.path("weights.swt"),
+                                         blockSize=20)
+        stream = next(streams)
+        blocks = list(skinWeightFile.iterBlocks(stream.blocks, 5,
+                                                rowWidth=6, blockSize=8))
+        self.assertEqual([(block.start, block.rowCount) for block in blocks],
+                         [(0, 8), (8, 8), (16, 4), (20, 8), (28, 2)])
+        self.assertValuesAlmostEqual(
+            [value for block in blocks for value in block.values],
+            skinWeightFile.expandWeights(skinWeights.weights, 5, 6), 9)
+
+    def testUnusedBlocksAreSkipped(self):
+        objects = [syntheticObject("body_geo", 30), syntheticObject("head_geo")]
+        skinWeightFile.writeSwt(self.path("weights.swt"), objects)
+
+        names = [stream.name for stream in skinWeightFile.iterSwt(
+            self.path("weights.swt"), blockSize=4)]
+        self.assertEqual(names, ["body_geo", "head_geo"])
+
+    def testDecode(self):
+        values = skinWeightFile.decodeWeightRows(["0 0.25 0.75", "1 0 0"], 3)
+        if hasattr(values, "ravel"):
+            self.assertEqual(values.shape, (2, 3))
+            values = values.ravel()
+
+        self.assertEqual(skinWeightFile.toFloatList(values),
+                         [0.0, 0.25, 0.75, 1.0, 0.0, 0.0])
+
+    def testBadRow(self):
+        self.assertRaises(ValueError, skinWeightFile.decodeWeightRows,
+                          ["0.5 0.5", "1"], 2)
+
+    def testConversions(self):
+        objects = [syntheticObject()]
+        skinWeightFile.writeSwt(self.path("weights.swt"), objects)
+        skinWeightFile.convertSwtToSwb(self.path("weights.swt"),
+                                       self.path("weights.swb"), 8, True)
+        skinWeightFile.convertSwbToSwt(self.path("weights.swb"),
+                                       self.path("back.swt"))
+
+        self.assertTrue(skinWeightFile.isBinaryFile(self.path("weights.swb")))
+        self.assertFalse(skinWeightFile.isBinaryFile(self.path("back.swt")))
+        self.assertObjectsAlmostEqual(
+            skinWeightFile.readSwt(self.path("back.swt")), objects, 9)
+
+
+class TestBinaryFile(WeightFileTestCase):
+
+    def testRoundTrip(self):
+        objects = [syntheticObject("body_geo", positions=True),
+                   syntheticObject("head_geo", 8, 3)]
+        skinWeightFile.writeSwb(self.path("weights.swb"), objects, 8)
+
+        self.assertObjectsAlmostEqual(
+            skinWeightFile.readSwb(self.path("weights.swb")), objects, 12)
+
+    def testFloats(self):
+        objects = [syntheticObject(positions=True)]
+        skinWeightFile.writeSwb(self.path("weights.swb"), objects)
+
+        self.assertObjectsAlmostEqual(
+            skinWeightFile.readSwb(self.path("weights.swb")), objects)
+
+    def testNotBinary(self):
+        skinWeightFile.writeSwt(self.path("weights.swt"), [syntheticObject()])
+        self.assertRaises(IOError, skinWeightFile.readSwb,
+                          self.path("weights.swt"))
+
+    def testPositionCountMismatch(self):
+        skinWeights = skinWeightFile.SkinWeights("body_geo", ["a_jnt"],
+                                                 [1.0, 1.0], [0.0, 0.0, 0.0])
+        self.assertRaises(ValueError, skinWeightFile.writeSwb,
+                          self.path("weights.swb"), [skinWeights])
+
+
+class TestMirror(unittest.TestCase):
+
+    @staticmethod
+    def mirrorName(name):
+        if name.startswith("l_"):
+            return "r_" + name[2:]
+        if name.startswith("r_"):
+            return "l_" + name[2:]
+        return name
+
+    def testMirror(self):
+        positions = [1, 0, 0, -1, 0, 0, 0, 1, 0, -3, 0, 0, 2, 0, 1]
+        weights = [0.8, 0.2,
+                   0.0, 1.0,
+                   0.5, 0.5,
+                   0.0, 1.0,
+                   1.0, 0.0]
+        mirrored, influences, report = skinWeightFile.mirrorWeights(
+            positions, weights, ["l_arm_jnt", "spine_jnt"], self.mirrorName)
+        mirrored = skinWeightFile.toFloatList(mirrored)
+
+        self.assertEqual(influences, ["l_arm_jnt", "spine_jnt", "r_arm_jnt"])
+        self.assertEqual(report.mirrored, 1)
+        self.assertEqual(report.unmatched, [3])
+        self.assertEqual(mirrored, [0.8, 0.2, 0.0,
+                                    0.0, 0.2, 0.8,
+                                    0.5, 0.5, 0.0,
+                                    0.0, 1.0, 0.0,
+                                    1.0, 0.0, 0.0])
+
+    def testNegativeSide(self):
+        mirrored, influences, report = skinWeightFile.mirrorWeights(
+            [0, 2, 0, 0, -2, 0], [1.0, 0.0, 0.0, 1.0],
+            ["r_leg_jnt", "l_leg_jnt"], self.mirrorName, axis=1,
+            positive=False)
+
+        self.assertEqual(influences, ["r_leg_jnt", "l_leg_jnt"])
+        self.assertEqual(report, skinWeightFile.MirrorReport(1, []))
+        self.assertEqual(skinWeightFile.toFloatList(mirrored),
+                         [1.0, 0.0, 0.0, 1.0])
+
+    def testSparse(self):
+        sparse = skinWeightFile.SparseWeights.fromDense([0.0, 1.0, 1.0, 0.0],
+                                                        2)
+        mirrored, influences, report = skinWeightFile.mirrorWeights(
+            [1, 0, 0, -1, 0, 0], sparse, ["l_jnt", "r_jnt"], self.mirrorName)
+
+        self.assertEqual(skinWeightFile.toFloatList(mirrored),
+                         [0.0, 1.0, 1.0, 0.0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+u"""Tests of `rigTools.skinWeightStore`."""
+
+import datetime
+import os
+import shutil
+import sys
+import tempfile
+import time
+import unittest
+import zlib
+
+# Adds the source folder to sys.path, if it not already there,
+# so unit tests can see the modules:
+tests_dir = os.path.dirname(os.path.realpath(__file__))
+root_dir = os.path.dirname(tests_dir)
+src_dir = os.path.join(root_dir, "code", "python", "src")
+
+for path in sys.path:
+    if path == src_dir:
+        break
+else:
+    sys.path.append(src_dir)
+
+from rigTools import skinWeightFile
+from rigTools import skinWeightStore
+
+
+def skinWeights(name, vertexCount, value=0.25, positions=True):
+    u"""Gets the weights of an object with two influences.
+
+    ``value`` should be exact in float32, as the store keeps float32.
+    """
+
+    weights = []
+    for i in range(vertexCount):
+        weights.extend([value, 1.0 - value])
+    return skinWeightFile.SkinWeights(
+        name, ["a_jnt", "b_jnt"], weights,
+        [float(i) for i in range(vertexCount * 3)] if positions else None)
+
+
+class TestSkinWeightStore(unittest.TestCase):
+
+    def setUp(self):
+        self.tempDir = tempfile.mkdtemp(prefix="test_skinWeightStore")
+        self.store = skinWeightStore.SkinWeightStore(
+            os.path.join(self.tempDir, "store"), chunkRows=4)
+
+    def tearDown(self):
+        shutil.rmtree(self.tempDir, ignore_errors=True)
+
+    def chunkCount(self):
+        return sum([len(fileNames) for dirPath, dirNames, fileNames in
+                    os.walk(self.store.chunksDir)])
+
+    def assertObjectsEqual(self, first, second):
+        self.assertEqual([(a.name, a.influences) for a in first],
+                         [(b.name, b.influences) for b in second])
+        for a, b in zip(first, second):
+            self.assertEqual(skinWeightFile.toFloatList(a.weights),
+                             skinWeightFile.toFloatList(b.weights))
+            if b.positions is None:
+                self.assertIsNone(a.positions)
+            else:
+                self.assertEqual(skinWeightFile.toFloatList(a.positions),
+                                 skinWeightFile.toFloatList(b.positions))
+
+    def testRoundTrip(self):
+        objects = [skinWeights("body_geo", 10),
+                   skinWeights("head_geo", 3, 0.5, positions=False)]
+        snapshot = self.store.commit(objects, "first").snapshot
+
+        self.assertEqual(snapshot["version"], skinWeightStore.SNAPSHOT_VERSION)
+        self.assertObjectsEqual(self.store.load(), objects)
+        self.assertObjectsEqual(self.store.load("first", ["head_geo"]),
+                                objects[1:])
+
+    def testSparse(self):
+        dense = skinWeights("body_geo", 10)
+        sparse = skinWeightFile.SkinWeights(
+            "body_geo", dense.influences,
+            skinWeightFile.SparseWeights.fromDense(dense.weights, 2),
+            dense.positions)
+        self.store.commit([sparse])
+
+        self.assertObjectsEqual(self.store.load(), [dense])
+
+    def testSharedChunks(self):
+        self.store.commit([skinWeights("body_geo", 10)])
+        chunkCount = self.chunkCount()
+        report = self.store.commit([skinWeights("body_geo", 10)])
+        self.assertEqual(self.chunkCount(), chunkCount)
+        self.assertEqual(report.newChunks, 0)
+
+        # only the last chunk of weights changes
+        changed = skinWeights("body_geo", 10)
+        changed.weights[-2:] = [1.0, 0.0]
+        report = self.store.commit([changed])
+        self.assertEqual(self.chunkCount(), chunkCount + 1)
+        self.assertEqual((report.chunks, report.newChunks), (6, 1))
+
+    def testFindSnapshot(self):
+        first = self.store.commit([skinWeights("body_geo", 4)], "rig").snapshot
+        time.sleep(0.01)
+        between = time.time()
+        time.sleep(0.01)
+        second = self.store.commit([skinWeights("body_geo", 4, 0.5)],
+                                   "rig").snapshot
+
+        self.assertEqual([snapshot["id"] for snapshot in
+                          self.store.snapshots()], [first["id"], second["id"]])
+        self.assertEqual(self.store.findSnapshot(), second["id"])
+        self.assertEqual(self.store.findSnapshot("rig"), second["id"])
+        self.assertEqual(self.store.findSnapshot(first["id"]), first["id"])
+        self.assertEqual(self.store.findSnapshot(between), first["id"])
+        self.assertEqual(self.store.findSnapshot(
+            datetime.datetime.fromtimestamp(between)), first["id"])
+        self.assertRaises(ValueError, self.store.findSnapshot, "anim")
+        self.assertRaises(ValueError, self.store.findSnapshot, 0.0)
+
+    def testEmptyStore(self):
+        self.assertEqual(self.store.snapshots(), [])
+        self.assertRaises(ValueError, self.store.load)
+
+    def testCorruptChunk(self):
+        self.store.commit([skinWeights("body_geo", 4, positions=False)])
+        for dirPath, dirNames, fileNames in os.walk(self.store.chunksDir):
+            for fileName in fileNames:
+                with open(os.path.join(dirPath, fileName), "wb") as output:
+                    output.write(zlib.compress(b"\0" * 32))
+
+        self.assertRaises(IOError, self.store.load)
+
+    def testPrune(self):
+        self.store.commit([skinWeights("body_geo", 8, 0.125)])
+        self.store.commit([skinWeights("body_geo", 8, 0.25)])
+        last = self.store.commit([skinWeights("body_geo", 8, 0.375)]).snapshot
+        chunkCount = self.chunkCount()
+
+        # the positions are shared by all snapshots, and the two weight
+        # chunks of a snapshot are the same
+        self.assertEqual(self.store.prune(1), (2, 2))
+        self.assertEqual(self.chunkCount(), chunkCount - 2)
+        self.assertEqual([snapshot["id"] for snapshot in
+                          self.store.snapshots()], [last["id"]])
+        self.assertObjectsEqual(self.store.load(),
+                                [skinWeights("body_geo", 8, 0.375)])
+        self.assertEqual(self.store.prune(1), (0, 0))
+
+    def testPruneStrayFiles(self):
+        self.store.commit([skinWeights("body_geo", 8, 0.125)])
+        self.store.commit([skinWeights("body_geo", 8, 0.25)])
+        with open(os.path.join(self.store.chunksDir, "notes.txt"), "w"):
+            pass
+
+        self.assertEqual(self.store.prune(1), (1, 1))
+        self.assertTrue(os.path.exists(os.path.join(self.store.chunksDir,
+                                                    "notes.txt")))
+
+        # snapshots without chunks
+        self.store.commit([])
+        shutil.rmtree(self.store.chunksDir)
+        self.assertEqual(self.store.prune(1), (1, 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+u"""Tests of `rigTools.spatialIndex`."""
+
+import math
+import os
+import random
+import sys
+import unittest
+
+# Adds the source folder to sys.path, if it not already there,
+# so unit tests can see the modules:
+tests_dir = os.path.dirname(os.path.realpath(__file__))
+root_dir = os.path.dirname(tests_dir)
+src_dir = os.path.join(root_dir, "code", "python", "src")
+
+for path in sys.path:
+    if path == src_dir:
+        break
+else:
+    sys.path.append(src_dir)
+
+from rigTools import spatialIndex
+
+
+def randomPoints(count, seed, scale=10.0):
+    u"""Gets x, y and z of ``count`` random points."""
+
+    randomValues = random.Random(seed)
+    return [randomValues.uniform(-scale, scale) for i in range(count * 3)]
+
+
+def bruteForce(points, queries, k, maxDistance=float("inf")):
+    u"""Gets the distances to the ``k`` nearest points of every query."""
+
+    distances = []
+    for q in range(0, len(queries), 3):
+        found = sorted([math.sqrt(sum([(points[p + axis] - queries[q + axis])
+                                       ** 2 for axis in range(3)]))
+                        for p in range(0, len(points), 3)])
+        found = [distance for distance in found[:k]
+                 if distance <= maxDistance]
+        distances.append(found + [float("inf")] * (k - len(found)))
+
+    return distances
+
+
+class TestSpatialGrid(unittest.TestCase):
+
+    def assertNearest(self, points, queries, k, maxDistance=None):
+        grid = spatialIndex.SpatialGrid(points)
+        indices, distances = grid.nearest(queries, k, maxDistance)
+        expected = bruteForce(points, queries, k, maxDistance or float("inf"))
+
+        self.assertEqual(len(indices), len(queries) // 3)
+        for q in range(len(queries) // 3):
+            self.assertEqual(len(indices[q]), k)
+            for i, distance, expectedDistance in zip(indices[q], distances[q],
+                                                     expected[q]):
+                if math.isinf(expectedDistance):
+                    self.assertEqual(i, -1)
+                    self.assertTrue(math.isinf(distance))
+                    continue
+
+                self.assertAlmostEqual(distance, expectedDistance, places=9)
+                point = points[i * 3:i * 3 + 3]
+                self.assertAlmostEqual(distance, math.sqrt(sum(
+                    [(point[axis] - queries[q * 3 + axis]) ** 2
+                     for axis in range(3)])), places=9)
+
+    def testNearest(self):
+        self.assertNearest(randomPoints(500, 1), randomPoints(100, 2), 1)
+
+    def testKNearest(self):
+        self.assertNearest(randomPoints(500, 3), randomPoints(100, 4), 5)
+
+    def testQueriesFarOutside(self):
+        self.assertNearest(randomPoints(200, 5), randomPoints(30, 6, 100.0), 3)
+
+    def testClusteredPoints(self):
+        points = randomPoints(300, 7, 0.01) + randomPoints(10, 8, 50.0)
+        self.assertNearest(points, randomPoints(60, 9, 20.0), 2)
+
+    def testMaxDistance(self):
+        self.assertNearest(randomPoints(300, 10), randomPoints(60, 11), 4,
+                           1.5)
+
+    def testMorePointsAsked(self):
+        self.assertNearest(randomPoints(3, 12), randomPoints(5, 13), 6)
+
+    def testExactMatches(self):
+        points = randomPoints(100, 14)
+        indices, distances = spatialIndex.SpatialGrid(points).nearest(points)
+
+        self.assertEqual([int(row[0]) for row in indices], list(range(100)))
+        self.assertEqual([float(row[0]) for row in distances], [0.0] * 100)
+
+    def testCellSize(self):
+        points = randomPoints(100, 15)
+        grid = spatialIndex.SpatialGrid(points, cellSize=100.0)
+
+        self.assertEqual(grid.cellCount, 1)
+        self.assertNearest(points, randomPoints(20, 16), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()